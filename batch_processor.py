@@ -6,6 +6,9 @@ Módulo contendo todas as classes necessárias para processamento em lote
 import threading
 import time
 import json
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
@@ -14,6 +17,7 @@ from typing import List, Dict, Optional, Callable, Any
 import uuid
 import os
 import config
+import json_codec
 import re
 
 
@@ -39,8 +43,23 @@ class PromptItem:
     video_url: Optional[str] = None
     error_message: Optional[str] = None
     retry_count: int = 0
+    # Fila de retry com atraso: tentativas automáticas do ciclo atual, horário mínimo (time.time())
+    # para a próxima tentativa e último backoff aplicado (base do jitter decorrelacionado)
+    attempts: int = 0
+    next_attempt_at: Optional[float] = None
+    retry_backoff: float = 0.0
+    # Chave de idempotência da geração atual (mantida entre retries automáticos)
+    idempotency_key: Optional[str] = None
+    # Provedor que atendeu (ou está atendendo) a geração; fixo quando definido na importação JSON
+    provider: Optional[str] = None
+    provider_pinned: bool = False
+    # Formato ('16:9'/'9:16') e endpoint de submissão (Veta) próprios; None = padrão do lote
+    aspect: Optional[str] = None
+    endpoint: Optional[str] = None
     # Indica imagem específica do prompt (tem prioridade sobre a imagem de referência do lote)
     image_path: Optional[str] = None
+    # Fan-out multi-idioma: ID do item cuja requisição também gera o vídeo deste idioma (None = envio próprio)
+    fanout_parent: Optional[str] = None
     
     def __post_init__(self):
         """Gera ID único se não fornecido"""
@@ -57,6 +76,14 @@ class BatchConfiguration:
     request_delay: float = 0.0
     request_timeout: int = 300
     max_retries: int = 2
+    # Duplicar submissões lentas (acima do percentil de latência) em outro endpoint/chave
+    hedge_enabled: bool = False
+    # Submissões Veta com callback_url: o n8n devolve o resultado no receptor local (slot liberado)
+    callback_enabled: bool = False
+    # Vários prompts Veta do mesmo endpoint por requisição (envelope com resultado por item)
+    bulk_enabled: bool = False
+    # Distribuir o lote entre os provedores com credenciais (peso x saúde, com failover)
+    multi_provider: bool = False
     auto_download: bool = False
     download_folder: Optional[str] = None
 
@@ -67,8 +94,22 @@ class PromptManager:
     def __init__(self):
         self.prompts: List[PromptItem] = []
         self._lock = threading.Lock()
+        # Chamados com o ID do prompt editado ou removido (ex.: invalidar payload pré-montado)
+        self._change_listeners: List[Callable[[str], None]] = []
     
-    def add_prompts_from_text(self, text: str, language: str = 'pt', delimiter: str = '\n') -> int:
+    def add_change_listener(self, callback: Callable[[str], None]) -> None:
+        """Registra um callback para edições e remoções de prompts"""
+        self._change_listeners.append(callback)
+    
+    def _notify_change(self, prompt_id: str) -> None:
+        for callback in list(self._change_listeners):
+            try:
+                callback(prompt_id)
+            except Exception:
+                pass
+    
+    def add_prompts_from_text(self, text: str, language: str = 'pt', delimiter: str = '\n',
+                              languages: Optional[List[str]] = None) -> int:
         """
         Adiciona prompts a partir de texto
         
@@ -76,19 +117,22 @@ class PromptManager:
             text: Texto contendo prompts separados por delimitador
             language: Idioma padrão para os prompts
             delimiter: Separador entre prompts
+            languages: Idiomas gerados na mesma requisição (fan-out); cada um diferente de `language`
+                vira um item filho
             
         Returns:
-            Número de prompts adicionados
+            Número de prompts adicionados (itens filhos incluídos)
         """
+        extra_languages = self._extra_languages(language, languages)
         with self._lock:
             lines = [line.strip() for line in text.split(delimiter) if line.strip()]
             
-            # Verificar limite de 50 prompts
+            # Verificar limite de 50 prompts (cada idioma ocupa uma linha da lista)
             current_count = len(self.prompts)
-            available_slots = 50 - current_count
+            available_slots = (50 - current_count) // (1 + len(extra_languages))
             
             if len(lines) > available_slots:
-                lines = lines[:available_slots]
+                lines = lines[:max(0, available_slots)]
             
             added_count = 0
             for raw_line in lines:
@@ -111,16 +155,19 @@ class PromptManager:
                         image_path=image_path or None
                     )
                     self.prompts.append(prompt_item)
-                    added_count += 1
+                    added_count += 1 + self._append_fanout(prompt_item, extra_languages)
             
             return added_count
 
-    def add_prompts_from_json_text(self, text: str, language: str = 'pt') -> int:
+    def add_prompts_from_json_text(self, text: str, language: str = 'pt',
+                                   languages: Optional[List[str]] = None) -> int:
         """Adiciona prompts a partir de objetos JSON no texto.
         Aceita:
         - Um único objeto JSON
         - Uma lista JSON de objetos
         - Múltiplos objetos JSON concatenados no texto (detecta por balanceamento de chaves)
+        Idiomas extras (`languages` ou "languages"/"idiomas" no objeto) viram itens filhos gerados na
+        mesma requisição do prompt (fan-out multi-idioma)
         """
         with self._lock:
             added_count = 0
@@ -128,7 +175,7 @@ class PromptManager:
 
             # 1) Tentar carregar como JSON puro (objeto único ou lista)
             try:
-                parsed = json.loads(text)
+                parsed = json_codec.loads(text)
                 if isinstance(parsed, list):
                     objects = [o for o in parsed if isinstance(o, dict)]
                 elif isinstance(parsed, dict):
@@ -166,23 +213,29 @@ class PromptManager:
                                 if brace == 0 and start_idx is not None:
                                     obj_str = s[start_idx:i+1]
                                     try:
-                                        obj = json.loads(obj_str)
+                                        obj = json_codec.loads(obj_str)
                                         if isinstance(obj, dict):
                                             objects.append(obj)
                                     except Exception:
                                         pass
                                     start_idx = None
 
-            # Respeitar limite
-            current_count = len(self.prompts)
-            available_slots = config.MAX_PROMPTS_PER_BATCH - current_count
-            if available_slots <= 0:
-                return 0
-            if len(objects) > available_slots:
-                objects = objects[:available_slots]
+            # Respeitar limite (cada idioma do fan-out ocupa uma linha da lista)
+            available_slots = config.MAX_PROMPTS_PER_BATCH - len(self.prompts)
 
             # Adicionar objetos, extraindo prompt e imagem quando disponíveis
             for obj in objects:
+                obj_language = language
+                obj_languages = languages
+                for key in ("languages", "idiomas"):
+                    val = obj.get(key)
+                    if isinstance(val, list) and val:
+                        obj_languages = [str(v).strip() for v in val if str(v).strip()]
+                        obj_language = obj_languages[0] if obj_languages else language
+                        break
+                extra_languages = self._extra_languages(obj_language, obj_languages)
+                if available_slots < 1 + len(extra_languages):
+                    break
                 # texto do prompt: aceita chaves usuais, senão mantém JSON minificado
                 prompt_text: Optional[str] = None
                 # Preferir campos de descrição quando presentes; 'text' costuma indicar texto sobreposto (ex.: 'none')
@@ -198,6 +251,7 @@ class PromptManager:
                         prompt_text = val_str
                         break
                 if prompt_text is None:
+                    # Formato legível do json padrão: este texto é o próprio prompt enviado
                     prompt_text = json.dumps(obj, ensure_ascii=False)
 
                 # caminho da imagem: aceita várias chaves comuns
@@ -208,17 +262,105 @@ class PromptManager:
                         image_path = val.strip()
                         break
 
+                # formato, provedor e endpoint por prompt (opcionais)
+                aspect = self._parse_aspect(obj.get("aspect") or obj.get("aspect_ratio") or obj.get("formato"))
+                provider = self._parse_provider(obj.get("provider") or obj.get("provedor"))
+                endpoint: Optional[str] = None
+                for key in ("endpoint", "webhook", "webhook_url"):
+                    val = obj.get(key)
+                    if isinstance(val, str) and val.strip().startswith("http"):
+                        endpoint = val.strip()
+                        break
+
                 prompt_item = PromptItem(
                     id=str(uuid.uuid4())[:8],
                     prompt_text=prompt_text,
-                    language=language,
-                    image_path=image_path or None
+                    language=obj_language,
+                    image_path=image_path or None,
+                    provider=provider,
+                    provider_pinned=provider is not None,
+                    aspect=aspect,
+                    endpoint=endpoint
                 )
                 self.prompts.append(prompt_item)
-                added_count += 1
+                added = 1 + self._append_fanout(prompt_item, extra_languages)
+                added_count += added
+                available_slots -= added
 
             return added_count
     
+    @staticmethod
+    def _extra_languages(language: str, languages: Optional[List[str]]) -> List[str]:
+        """Idiomas do fan-out além do idioma principal, sem repetições"""
+        extra: List[str] = []
+        for lang in languages or []:
+            if lang and lang != language and lang not in extra:
+                extra.append(lang)
+        return extra
+    
+    def _append_fanout(self, parent: PromptItem, extra_languages: List[str]) -> int:
+        """Cria os itens filhos (um por idioma extra) logo após o item pai; chamado com o lock"""
+        for lang in extra_languages:
+            self.prompts.append(PromptItem(
+                id=str(uuid.uuid4())[:8],
+                prompt_text=parent.prompt_text,
+                language=lang,
+                image_path=parent.image_path,
+                provider=parent.provider,
+                provider_pinned=parent.provider_pinned,
+                aspect=parent.aspect,
+                endpoint=parent.endpoint,
+                fanout_parent=parent.id
+            ))
+        return len(extra_languages)
+    
+    def _is_fanout_rider(self, prompt: PromptItem) -> bool:
+        """Filho que ainda segue na requisição do pai (pai existe e não terminou); chamado com o lock"""
+        if not prompt.fanout_parent:
+            return False
+        for p in self.prompts:
+            if p.id == prompt.fanout_parent:
+                return p.status in (PromptStatus.PENDING, PromptStatus.PROCESSING)
+        return False
+    
+    def get_fanout_children(self, prompt_id: str, pending_only: bool = True) -> List[PromptItem]:
+        """Itens filhos do fan-out (por padrão só os pendentes, que entram na próxima requisição do pai)"""
+        with self._lock:
+            return [p for p in self.prompts if p.fanout_parent == prompt_id
+                    and (not pending_only or p.status == PromptStatus.PENDING)]
+    
+    def detach_fanout(self, prompt_id: str) -> bool:
+        """Filho passa a ter envio próprio (ex.: o webhook não devolveu o vídeo do idioma)"""
+        with self._lock:
+            for p in self.prompts:
+                if p.id == prompt_id and p.fanout_parent:
+                    parent_id = p.fanout_parent
+                    p.fanout_parent = None
+                    break
+            else:
+                return False
+        self._notify_change(parent_id)
+        return True
+    
+    @staticmethod
+    def _parse_aspect(value: Any) -> Optional[str]:
+        """Normaliza o formato informado no JSON ('9:16', 'vertical', 'reels', '16:9', 'horizontal')"""
+        if not isinstance(value, str):
+            return None
+        value = value.strip().lower()
+        if value in ("9:16", "vertical", "reels", "portrait"):
+            return "9:16"
+        if value in ("16:9", "horizontal", "landscape"):
+            return "16:9"
+        return None
+
+    @staticmethod
+    def _parse_provider(value: Any) -> Optional[str]:
+        """Normaliza o provedor informado no JSON (Veta, Gemini ou WAN)"""
+        if not isinstance(value, str):
+            return None
+        return {"veta": "Veta", "gemini": "Gemini", "wan": "WAN"}.get(value.strip().lower())
+
     def add_single_prompt(self, prompt: str, language: str = 'pt') -> Optional[str]:
         """
         Adiciona um prompt individual
@@ -253,11 +395,20 @@ class PromptManager:
             True se removido com sucesso
         """
         with self._lock:
+            removed = False
             for i, prompt in enumerate(self.prompts):
                 if prompt.id == prompt_id:
                     del self.prompts[i]
-                    return True
-            return False
+                    removed = True
+                    break
+            # Filhos do fan-out de um pai removido passam a ter envio próprio
+            if removed:
+                for prompt in self.prompts:
+                    if prompt.fanout_parent == prompt_id:
+                        prompt.fanout_parent = None
+        if removed:
+            self._notify_change(prompt_id)
+        return removed
 
     # --- Novos utilitários para edição e retry ---
     def find_prompt(self, prompt_id: str) -> Optional[PromptItem]:
@@ -271,23 +422,40 @@ class PromptManager:
     def update_prompt(self, prompt_id: str, new_text: Optional[str] = None, new_language: Optional[str] = None) -> bool:
         """Atualiza texto e/ou idioma de um prompt existente mantendo posição e ID."""
         with self._lock:
+            updated = False
             for p in self.prompts:
                 if p.id == prompt_id:
                     if new_text is not None:
                         p.prompt_text = new_text
                     if new_language is not None:
                         p.language = new_language
-                    return True
-            return False
+                    # Conteúdo alterado: a próxima submissão é uma nova geração
+                    p.idempotency_key = None
+                    # Filho editado deixa de ser o mesmo prompt do pai: envio próprio
+                    p.fanout_parent = None
+                    updated = True
+                    break
+            if updated and new_text is not None:
+                # Texto do pai vale para os idiomas do fan-out ainda não gerados
+                for child in self.prompts:
+                    if child.fanout_parent == prompt_id and child.status != PromptStatus.COMPLETED:
+                        child.prompt_text = new_text
+        if updated:
+            self._notify_change(prompt_id)
+        return updated
 
     def set_prompt_image(self, prompt_id: str, image_path: Optional[str]) -> bool:
         """Define ou remove a imagem específica de um prompt."""
         with self._lock:
+            updated = False
             for p in self.prompts:
                 if p.id == prompt_id:
                     p.image_path = image_path if image_path else None
-                    return True
-            return False
+                    updated = True
+                    break
+        if updated:
+            self._notify_change(prompt_id)
+        return updated
     
     def reset_for_retry(self, prompt_id: str) -> bool:
         """Reseta campos do prompt para nova tentativa, preservando a numeração (posição)."""
@@ -304,6 +472,48 @@ class PromptManager:
                     # Mantém video_url antigo? Vamos limpar para refletir o novo resultado quando concluir novamente
                     p.video_url = None
                     p.retry_count = (p.retry_count or 0) + 1
+                    # Retry manual inicia um novo ciclo de tentativas automáticas
+                    p.attempts = 0
+                    p.next_attempt_at = None
+                    p.retry_backoff = 0.0
+                    p.idempotency_key = None
+                    if not p.provider_pinned:
+                        p.provider = None
+                    # Retry de um filho do fan-out: gerado sozinho. Retry do pai: idiomas que falharam voltam junto
+                    p.fanout_parent = None
+                    for child in self.prompts:
+                        if child.fanout_parent == prompt_id and child.status == PromptStatus.FAILED:
+                            child.status = PromptStatus.PENDING
+                            child.started_at = None
+                            child.completed_at = None
+                            child.error_message = None
+                            child.video_url = None
+                            child.retry_count = (child.retry_count or 0) + 1
+                    return True
+            return False
+    
+    def schedule_retry(self, prompt_id: str, delay: float, error_message: Optional[str] = None) -> bool:
+        """
+        Devolve o prompt à fila para uma nova tentativa após `delay` segundos
+        
+        Args:
+            prompt_id: ID do prompt
+            delay: Segundos até a tentativa poder ser despachada
+            error_message: Erro da tentativa que falhou
+            
+        Returns:
+            True se o prompt foi reagendado
+        """
+        with self._lock:
+            for p in self.prompts:
+                if p.id == prompt_id:
+                    p.status = PromptStatus.PENDING
+                    p.retry_count = (p.retry_count or 0) + 1
+                    p.attempts = (p.attempts or 0) + 1
+                    p.retry_backoff = delay
+                    p.next_attempt_at = time.time() + max(0.0, delay)
+                    if error_message:
+                        p.error_message = error_message
                     return True
             return False
     
@@ -336,11 +546,37 @@ class PromptManager:
                     
                     break
     
+    def claim_prompt(self, prompt_id: str) -> bool:
+        """
+        Passa o prompt de PENDING para PROCESSING de forma atômica
+        
+        Returns:
+            False se outro despacho já o assumiu (ou ele não está mais pendente)
+        """
+        with self._lock:
+            for prompt in self.prompts:
+                if prompt.id == prompt_id:
+                    if prompt.status != PromptStatus.PENDING:
+                        return False
+                    prompt.status = PromptStatus.PROCESSING
+                    prompt.started_at = datetime.now()
+                    return True
+            return False
+    
     def get_pending_prompts(self) -> List[PromptItem]:
         """Retorna prompts pendentes de processamento"""
         with self._lock:
             return [p for p in self.prompts if p.status == PromptStatus.PENDING]
     
+    def get_due_prompts(self, now: Optional[float] = None) -> List[PromptItem]:
+        """Retorna prompts pendentes cuja próxima tentativa já pode ser despachada"""
+        now = time.time() if now is None else now
+        with self._lock:
+            # Filhos do fan-out seguem na requisição do pai, não são despachados sozinhos
+            return [p for p in self.prompts
+                    if p.status == PromptStatus.PENDING and (not p.next_attempt_at or p.next_attempt_at <= now)
+                    and not self._is_fanout_rider(p)]
+    
     def get_all_prompts(self) -> List[PromptItem]:
         """Retorna todos os prompts"""
         with self._lock:
@@ -502,6 +738,205 @@ class ThreadPoolManager:
         self._stop_event.clear()
 
 
+class AsyncBatchEngine:
+    """Alternativa ao ThreadPoolManager: prompts viram corrotinas em um único event loop.
+
+    Prompts aguardando slot não ocupam threads do sistema. Funções async rodam direto
+    no loop; as síncronas (requisições do requests) são aguardadas com asyncio.to_thread
+    só depois de obter o slot, então as threads em uso nunca passam dos slots ocupados.
+    Cada slot liberado é avisado na thread da UI (ui_scheduler, ex.: root.after).
+    """
+
+    def __init__(self, max_threads: int = 2, on_slot_released: Optional[Callable[[], None]] = None,
+                 ui_scheduler: Optional[Callable[[Callable[[], None]], None]] = None):
+        """
+        Args:
+            max_threads: Prompts executando simultaneamente (slots)
+            on_slot_released: Chamado quando um slot fica livre (ex.: despachar o próximo prompt)
+            ui_scheduler: Executa uma função na thread da UI (ex.: lambda f: root.after(0, f));
+                None = chamar direto na thread do event loop
+        """
+        self.max_threads = max_threads
+        self.on_slot_released = on_slot_released
+        self.ui_scheduler = ui_scheduler
+        self.active_tasks: Dict[str, asyncio.Task] = {}
+        self.waiting_tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._slot_condition: Optional[asyncio.Condition] = None
+        self._slots_in_use = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Inicia (uma única vez) a thread do event loop"""
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                # Teto das threads de asyncio.to_thread (criadas sob demanda); a concorrência real
+                # é limitada pelos slots: prompts em execução + callbacks de conclusão
+                loop.set_default_executor(ThreadPoolExecutor(
+                    max_workers=2 * getattr(config, 'MAX_ALLOWED_THREADS', 10), thread_name_prefix="AsyncIO"))
+                self._slot_condition = asyncio.Condition()
+                ready.set()
+                loop.run_forever()
+
+            self._loop_thread = threading.Thread(target=run_loop, daemon=True, name="AsyncBatchLoop")
+            self._loop_thread.start()
+            ready.wait()
+            self._loop = loop
+            print(f"🔁 [AsyncEngine] Event loop iniciado ({self._loop_thread.name})")
+            return loop
+
+    def submit_prompt(self, prompt_item: PromptItem, process_function: Callable,
+                      callback: Optional[Callable] = None) -> None:
+        """
+        Submete um prompt para processamento como corrotina
+
+        Args:
+            prompt_item: Item do prompt a ser processado
+            process_function: Função (síncrona ou async) que processará o prompt
+            callback: Função de callback para notificação de conclusão
+        """
+        loop = self._ensure_loop()
+
+        def schedule():
+            task = loop.create_task(self._run_prompt(prompt_item, process_function, callback))
+            with self._lock:
+                self.waiting_tasks[prompt_item.id] = task
+
+        loop.call_soon_threadsafe(schedule)
+        print(f"🎯 [AsyncEngine] Prompt {prompt_item.id} enfileirado no event loop")
+
+    async def _run_prompt(self, prompt_item: PromptItem, process_function: Callable,
+                          callback: Optional[Callable]) -> None:
+        acquired = False
+        try:
+            async with self._slot_condition:
+                await self._slot_condition.wait_for(lambda: self._slots_in_use < self.max_threads)
+                self._slots_in_use += 1
+                acquired = True
+
+            if self._stop_event.is_set():
+                print(f"🛑 [AsyncEngine] Prompt {prompt_item.id} cancelado (stop event)")
+                return
+
+            with self._lock:
+                self.waiting_tasks.pop(prompt_item.id, None)
+                self.active_tasks[prompt_item.id] = asyncio.current_task()
+
+            try:
+                if inspect.iscoroutinefunction(process_function):
+                    result = await process_function(prompt_item)
+                else:
+                    result = await asyncio.to_thread(process_function, prompt_item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ [AsyncEngine] Erro no prompt {prompt_item.id}: {str(e)}")
+                result = {'success': False, 'error': str(e), 'processing_time': 0}
+
+            # Callback fora do loop e da UI: on_prompt_completed pode fazer downloads/IO bloqueante
+            if callback:
+                await asyncio.to_thread(callback, prompt_item.id, result)
+        except asyncio.CancelledError:
+            print(f"🛑 [AsyncEngine] Prompt {prompt_item.id} cancelado")
+        finally:
+            with self._lock:
+                self.waiting_tasks.pop(prompt_item.id, None)
+                self.active_tasks.pop(prompt_item.id, None)
+            if acquired:
+                async with self._slot_condition:
+                    self._slots_in_use -= 1
+                    self._slot_condition.notify_all()
+                self._announce_slot()
+
+    def _announce_slot(self) -> None:
+        """Avisa o slot livre na thread da UI (ponte com o Tk) ou direto, sem ui_scheduler"""
+        if self.on_slot_released is None or self._stop_event.is_set():
+            return
+        try:
+            if self.ui_scheduler is not None:
+                self.ui_scheduler(self.on_slot_released)
+            else:
+                self.on_slot_released()
+        except Exception as e:
+            print(f"❌ [AsyncEngine] Erro ao avisar slot livre: {str(e)}")
+
+    def _notify_slots(self) -> None:
+        """Acorda corrotinas aguardando slot (após mudança de limite)"""
+        loop = self._loop
+        if loop is None:
+            return
+
+        async def notify():
+            async with self._slot_condition:
+                self._slot_condition.notify_all()
+
+        asyncio.run_coroutine_threadsafe(notify(), loop)
+
+    def update_max_threads(self, new_max: int) -> None:
+        """
+        Atualiza o número máximo de prompts executando simultaneamente
+
+        Args:
+            new_max: Novo número máximo de slots
+        """
+        if 1 <= new_max <= 10:
+            self.max_threads = new_max
+            self._notify_slots()
+
+    def get_active_count(self) -> int:
+        """Retorna número de prompts em execução (ocupando slot)"""
+        with self._lock:
+            return len(self.active_tasks)
+
+    def get_waiting_count(self) -> int:
+        """Retorna número de prompts aguardando slot no event loop"""
+        with self._lock:
+            return len(self.waiting_tasks)
+
+    def stop_all_threads(self) -> None:
+        """Cancela prompts aguardando slot e aguarda os que estão em execução"""
+        print("🛑 [AsyncEngine] Parando processamento...")
+        self._stop_event.set()
+        loop = self._loop
+        if loop is None:
+            return
+
+        with self._lock:
+            waiting = list(self.waiting_tasks.values())
+            running = list(self.active_tasks.values())
+        for task in waiting:
+            loop.call_soon_threadsafe(task.cancel)
+
+        print(f"🔄 [AsyncEngine] Aguardando {len(running)} prompts em execução...")
+        # Chamadas síncronas em asyncio.to_thread não podem ser interrompidas; aguardar com limite
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            with self._lock:
+                if not self.active_tasks:
+                    break
+            time.sleep(0.05)
+
+        with self._lock:
+            remaining = len(self.active_tasks)
+            self.active_tasks.clear()
+            self.waiting_tasks.clear()
+        if remaining > 0:
+            print(f"⚠️ [AsyncEngine] {remaining} prompts não terminaram no tempo esperado")
+        print("✅ [AsyncEngine] Processamento parado")
+
+    def resume_threads(self) -> None:
+        """Retoma processamento"""
+        self._stop_event.clear()
+
+
 class ProgressTracker:
     """Rastreia e calcula progresso do processamento"""
     
@@ -547,6 +982,11 @@ class ProgressTracker:
             elif status == PromptStatus.FAILED:
                 self.failed_prompts += 1
     
+    def get_processing_times(self) -> List[float]:
+        """Cópia dos tempos de processamento dos prompts concluídos"""
+        with self._lock:
+            return list(self.processing_times)
+    
     def get_progress_percentage(self) -> float:
         """Retorna porcentagem de conclusão"""
         with self._lock:
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark do Codec JSON
+Compara a biblioteca padrão com o orjson nos caminhos quentes do app: serializar
+o payload de submissão com imagem em base64 (grande), parsear a resposta do webhook
+e o estado de uma operação WAN. Uso:
+
+    python bench_json_codec.py [--image-mb 4] [--repeat 20]
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def std_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def std_loads(data):
+    return json.loads(data)
+
+
+def build_cases(image_mb):
+    image = base64.b64encode(os.urandom(int(image_mb * 1024 * 1024))).decode('ascii')
+    payload = {
+        "prompt": "Um farol antigo em meio a uma tempestade, câmera lenta, luz dourada " * 4,
+        "api_key": "chave", "token": "token", "auth_token": "token",
+        "languages": ["pt", "en", "es"],
+        "idempotency_key": "0f8c2d7e-1a2b-4c3d-9e8f-0123456789ab",
+        "images": [{"name": "referencia.jpg", "type": "image/jpeg", "data": image}],
+    }
+    response = {"results": [{"id": f"p{i}", "video_url": f"https://cdn.exemplo/video_{i}.mp4",
+                             "videos": {"pt": f"https://cdn.exemplo/{i}_pt.mp4", "en": f"https://cdn.exemplo/{i}_en.mp4"}}
+                            for i in range(200)]}
+    wan_state = {"output": {"task_id": "abc", "task_status": "RUNNING", "submit_time": "2024-01-01 00:00:00",
+                            "scheduled_time": "2024-01-01 00:00:01", "task_metrics": {"TOTAL": 1, "SUCCEEDED": 0}},
+                 "request_id": "req-1", "usage": {"video_count": 1, "video_duration": 5}}
+    return [
+        ("dumps payload com imagem", "dumps", payload),
+        ("loads payload com imagem", "loads", payload),
+        ("loads resposta em bloco", "loads", response),
+        ("dumps estado WAN (log)", "dumps", wan_state),
+    ]
+
+
+def measure(func, arg, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara json (stdlib) e orjson nos payloads do app")
+    parser.add_argument("--image-mb", type=float, default=4.0, help="Tamanho da imagem antes do base64 (MB)")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetições por medida (mediana)")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("⚠️ orjson não instalado (pip install orjson): medindo apenas a biblioteca padrão")
+    backends = [("json", std_dumps, std_loads)]
+    if orjson is not None:
+        backends.append(("orjson", lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), orjson.loads))
+
+    print(f"{'caso':<28}" + "".join(f"{name:>12}" for name, _, _ in backends) + ("  ganho" if orjson else ""))
+    for label, operation, data in build_cases(args.image_mb):
+        encoded = std_dumps(data)
+        times = []
+        for _, dumps, loads in backends:
+            if operation == "dumps":
+                times.append(measure(dumps, data, args.repeat))
+            else:
+                times.append(measure(loads, encoded, args.repeat))
+        row = f"{label:<28}" + "".join(f"{t * 1000:>10.2f}ms" for t in times)
+        if len(times) > 1 and times[1] > 0:
+            row += f"  {times[0] / times[1]:.1f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Envio em Bloco
+Empacota até K prompts Veta do mesmo endpoint em uma única requisição ao webhook:
+credenciais vão uma vez no envelope e imagens repetidas (ex.: a referência do
+lote) entram uma única vez na lista `images`, referenciadas por índice em cada
+item. A resposta traz um resultado por item, devolvido ao PromptItem de origem
+
+Contrato (o fluxo do n8n precisa implementá-lo):
+    requisição: {"bulk": true, "api_key": ..., "auth_token": ..., "images": [...],
+                 "items": [{"id", "prompt", "languages", "idempotency_key", "image_refs": [0]}]}
+    resposta:   {"results": [{"id", "video_url"} | {"id", "videos": {idioma: url}} | {"id", "error", "retryable"}]}
+"""
+
+import threading
+from typing import Any, Dict, Hashable, List, Tuple
+
+import json_codec
+from json_stream import Base64File
+from results import parse_video_result
+
+
+def _attachment_key(attachment: Dict[str, Any]) -> Hashable:
+    """Mesma imagem = mesmo conteúdo do ImageCache (objeto compartilhado) ou mesmo arquivo em streaming"""
+    data = attachment.get("data")
+    if isinstance(data, Base64File):
+        source = ("file", data.path)
+    elif isinstance(data, (str, bytes)):
+        source = ("value", data)
+    else:
+        source = ("object", id(data))
+    return (attachment.get("name"), attachment.get("type"), source)
+
+
+def _encoded_length(attachment: Dict[str, Any]) -> int:
+    data = attachment.get("data")
+    if hasattr(data, "encoded_length"):
+        return data.encoded_length()
+    return len(data) if isinstance(data, (str, bytes)) else 0
+
+
+def build_bulk_envelope(items: List[Tuple[str, Dict[str, Any]]], common: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """
+    Monta o envelope do bloco
+
+    Args:
+        items: (id do item, payload do prompt com "images" opcional) na ordem de envio
+        common: Campos enviados uma vez para todos os itens (credenciais)
+
+    Returns:
+        (envelope, bytes de base64 que deixaram de ser repetidos)
+    """
+    images: List[Dict[str, Any]] = []
+    index: Dict[Hashable, int] = {}
+    saved = 0
+    entries = []
+    for item_id, payload in items:
+        entry = {"id": item_id}
+        entry.update((k, v) for k, v in payload.items() if k != "images")
+        refs = []
+        for attachment in payload.get("images") or []:
+            key = _attachment_key(attachment)
+            if key in index:
+                saved += _encoded_length(attachment)
+            else:
+                index[key] = len(images)
+                images.append(attachment)
+            refs.append(index[key])
+        if refs:
+            entry["image_refs"] = refs
+        entries.append(entry)
+    envelope = dict(common)
+    envelope["bulk"] = True
+    if images:
+        envelope["images"] = images
+    envelope["items"] = entries
+    return envelope, saved
+
+
+def _item_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    result = parse_video_result(entry)
+    if result is None:
+        return {'success': False, 'retryable': True, 'error': 'URL do vídeo não encontrada no resultado do item'}
+    if not result['success']:
+        result['retryable'] = bool(entry.get("retryable", False))
+        result['error'] = f"Webhook informou falha no item: {result['error']}"
+    return result
+
+
+def parse_bulk_response(raw: bytes, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Resultado de cada item do bloco. Itens ausentes na resposta voltam como falha retentável
+
+    Raises:
+        ValueError: Corpo não segue o contrato (o bloco inteiro é tratado como falha)
+    """
+    try:
+        data = json_codec.loads(raw)
+    except json_codec.JSONDecodeError:
+        raise ValueError("resposta do bloco não é JSON")
+    if isinstance(data, dict):
+        data = data.get("results")
+    if not isinstance(data, list):
+        raise ValueError("resposta do bloco sem lista 'results'")
+    wanted = set(item_ids)
+    results: Dict[str, Dict[str, Any]] = {}
+    for entry in data:
+        if isinstance(entry, dict) and str(entry.get("id")) in wanted:
+            results[str(entry["id"])] = _item_result(entry)
+    for item_id in item_ids:
+        if item_id not in results:
+            results[item_id] = {'success': False, 'retryable': True, 'error': 'Item ausente na resposta do bloco'}
+    return results
+
+
+class BulkStats:
+    """Blocos enviados, prompts por bloco e bytes de imagem não repetidos"""
+
+    def __init__(self):
+        self.envelopes = 0
+        self.items = 0
+        self.saved_bytes = 0
+        self.partial = 0
+        self.failed_items = 0
+        self._lock = threading.Lock()
+
+    def record(self, items: int, saved_bytes: int) -> None:
+        with self._lock:
+            self.envelopes += 1
+            self.items += items
+            self.saved_bytes += saved_bytes
+
+    def record_results(self, results: Dict[str, Dict[str, Any]]) -> None:
+        failed = sum(1 for r in results.values() if not r.get('success'))
+        with self._lock:
+            self.failed_items += failed
+            if 0 < failed < len(results):
+                self.partial += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "envelopes": self.envelopes,
+                "items": self.items,
+                "avg_items": (self.items / self.envelopes) if self.envelopes else 0.0,
+                "saved_bytes": self.saved_bytes,
+                "partial": self.partial,
+                "failed_items": self.failed_items,
+            }
@@ -0,0 +1,295 @@
+"""
+Receptor de Callbacks do Webhook
+Modo assíncrono das submissões Veta: cada envio leva um callback_url com id de
+correlação, o fluxo do n8n responde na hora e, ao terminar a geração, faz POST
+do resultado (JSON com a URL ou o próprio vídeo) neste servidor HTTP local.
+O worker não fica parado com a conexão aberta durante a geração
+"""
+
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Callable, List
+
+import json_codec
+from response_stream import SNIFF_BYTES, STREAM_CHUNK_SIZE, sniff_body
+from results import parse_callback_result
+
+
+@dataclass
+class PendingCallback:
+    """Submissão aguardando o POST de retorno do webhook"""
+    correlation_id: str
+    prompt_id: str
+    on_done: Callable[[str, Dict[str, Any]], None]
+    timeout: float
+    submitted_at: float = field(default_factory=time.time)
+    # Armado = o webhook aceitou a submissão; antes disso o resultado fica guardado para o worker
+    armed: bool = False
+    deadline: float = 0.0
+    early_result: Optional[Dict[str, Any]] = None
+
+
+class CallbackReceiver:
+    """Servidor HTTP local + tabela de callbacks pendentes com prazo"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, public_url: str = "",
+                 max_body_bytes: int = 2 * 1024 * 1024,
+                 video_path: Optional[Callable[[str], str]] = None,
+                 log: Optional[Callable] = None):
+        """
+        Args:
+            host: Interface de escuta ("0.0.0.0" para aceitar o n8n remoto)
+            port: Porta de escuta (0 = escolhida pelo sistema)
+            public_url: URL base vista pelo n8n (túnel/proxy); vazio = http://host:porta
+            max_body_bytes: Maior corpo JSON aceito (vídeos binários vão direto para o disco)
+            video_path: prompt_id -> caminho onde gravar um vídeo recebido no corpo do callback
+            log: Função de log do app
+        """
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip("/")
+        self.max_body_bytes = max_body_bytes
+        self.video_path = video_path
+        self._log = log or (lambda message, level="INFO": print(message))
+        # Segredo do caminho: só quem recebeu o callback_url consegue entregar resultados
+        self._token = secrets.token_urlsafe(16)
+        self._pending: Dict[str, PendingCallback] = {}
+        self._received = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._sweeper: Optional[threading.Thread] = None
+        self._deliver_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="CallbackDeliver")
+        self._cond = threading.Condition()
+
+    # ---------- servidor ----------
+
+    def start(self) -> str:
+        """
+        Sobe o servidor (idempotente) e retorna a URL base dos callbacks
+
+        Raises:
+            OSError: Porta ocupada ou interface inválida
+        """
+        if self._server is not None:
+            return self.base_url
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                receiver._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="CallbackReceiver").start()
+        self._sweeper = threading.Thread(target=self._sweep, daemon=True, name="CallbackSweeper")
+        self._sweeper.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    @property
+    def base_url(self) -> str:
+        base = self.public_url or f"http://{'127.0.0.1' if self.host in ('', '0.0.0.0') else self.host}:{self.port}"
+        return f"{base}/callback/{self._token}"
+
+    def url_for(self, correlation_id: str) -> str:
+        return f"{self.base_url}/{correlation_id}"
+
+    # ---------- tabela de pendentes ----------
+
+    def register(self, correlation_id: str, prompt_id: str, on_done: Callable[[str, Dict[str, Any]], None],
+                 timeout: float) -> str:
+        """Registra a submissão antes do envio (o callback pode chegar antes da resposta do POST)"""
+        with self._cond:
+            self._pending[correlation_id] = PendingCallback(correlation_id, prompt_id, on_done, timeout)
+        return self.url_for(correlation_id)
+
+    def arm(self, correlation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Webhook aceitou a submissão: o prazo começa a contar e o resultado vai para on_done
+
+        Returns:
+            Resultado que chegou antes do aceite (o worker conclui o prompt) ou None
+        """
+        with self._cond:
+            pending = self._pending.get(correlation_id)
+            if pending is None:
+                return None
+            if pending.early_result is not None:
+                self._pending.pop(correlation_id, None)
+                return pending.early_result
+            pending.armed = True
+            pending.deadline = time.time() + pending.timeout
+            self._cond.notify_all()
+            return None
+
+    def discard(self, correlation_id: str) -> None:
+        """Submissão não aceita (erro/retry): callbacks tardios desta correlação são recusados"""
+        with self._cond:
+            self._pending.pop(correlation_id, None)
+
+    def cancel_prompts(self, prompt_ids: List[str]) -> List[str]:
+        """Deixa de aguardar os prompts informados; retorna os prompts que estavam aguardando"""
+        ids = set(prompt_ids)
+        with self._cond:
+            cancelled = [c for c, p in self._pending.items() if p.prompt_id in ids]
+            return [self._pending.pop(c).prompt_id for c in cancelled]
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(1 for p in self._pending.values() if p.armed)
+
+    def _sweep(self) -> None:
+        while True:
+            expired = []
+            with self._cond:
+                now = time.time()
+                deadlines = [p.deadline for p in self._pending.values() if p.armed]
+                if deadlines and min(deadlines) > now:
+                    self._cond.wait(timeout=min(deadlines) - now)
+                    continue
+                if not deadlines:
+                    self._cond.wait(timeout=5.0)
+                    continue
+                for correlation_id, pending in list(self._pending.items()):
+                    if pending.armed and pending.deadline <= now:
+                        expired.append(self._pending.pop(correlation_id))
+                self._timeouts += len(expired)
+            for pending in expired:
+                elapsed = time.time() - pending.submitted_at
+                self._log(f"⏰ [Callback] Prompt {pending.prompt_id}: sem retorno do webhook em {pending.timeout:.0f}s", "WARNING")
+                self._deliver(pending, {'success': False, 'processing_time': elapsed,
+                                        'error': f"Callback do webhook não recebido em {pending.timeout:.0f}s"})
+
+    def _deliver(self, pending: PendingCallback, result: Dict[str, Any]) -> None:
+        def run():
+            try:
+                pending.on_done(pending.prompt_id, result)
+            except Exception as e:
+                self._log(f"❌ [Callback] Erro ao concluir {pending.prompt_id}: {e}", "ERROR")
+        self._deliver_executor.submit(run)
+
+    def _complete(self, correlation_id: str, result: Dict[str, Any]) -> bool:
+        with self._cond:
+            pending = self._pending.get(correlation_id)
+            if pending is None:
+                return False
+            self._received += 1
+            result['processing_time'] = time.time() - pending.submitted_at
+            if not pending.armed:
+                # Chegou antes da resposta do POST: o worker recolhe em arm()
+                pending.early_result = result
+                return True
+            self._pending.pop(correlation_id, None)
+        self._log(f"📬 [Callback] Prompt {pending.prompt_id}: {'vídeo pronto' if result['success'] else 'falha'} "
+                  f"após {result['processing_time']:.0f}s")
+        self._deliver(pending, result)
+        return True
+
+    # ---------- HTTP ----------
+
+    def _reply(self, handler: BaseHTTPRequestHandler, status: int, payload: Dict[str, Any]) -> None:
+        body = json_codec.dumps(payload)
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        parts = handler.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "callback" or not secrets.compare_digest(parts[1], self._token):
+            with self._cond:
+                self._rejected += 1
+            handler.close_connection = True
+            return self._reply(handler, 404, {"error": "não encontrado"})
+        correlation_id = parts[2]
+        with self._cond:
+            pending = self._pending.get(correlation_id)
+        if pending is None:
+            # Prompt já concluído, expirado ou cancelado
+            handler.close_connection = True
+            return self._reply(handler, 410, {"error": "correlation_id desconhecido ou expirado"})
+        length = handler.headers.get("Content-Length")
+        if length is None:
+            handler.close_connection = True
+            return self._reply(handler, 411, {"error": "Content-Length obrigatório"})
+        try:
+            remaining = int(length)
+        except ValueError:
+            remaining = -1
+        if remaining < 0:
+            handler.close_connection = True
+            return self._reply(handler, 400, {"error": "Content-Length inválido"})
+        head = handler.rfile.read(min(remaining, SNIFF_BYTES))
+        remaining -= len(head)
+        kind = sniff_body(head, handler.headers.get("Content-Type", ""))
+        try:
+            if kind in ("video", "binary"):
+                result = self._receive_video(handler, pending, head, remaining)
+            else:
+                if remaining + len(head) > self.max_body_bytes:
+                    handler.close_connection = True
+                    return self._reply(handler, 413, {"error": "corpo grande demais"})
+                result = parse_callback_result(head + handler.rfile.read(remaining))
+        except ValueError as e:
+            handler.close_connection = True
+            return self._reply(handler, 422, {"error": str(e)})
+        except OSError as e:
+            handler.close_connection = True
+            return self._reply(handler, 500, {"error": str(e)})
+        if not self._complete(correlation_id, result):
+            return self._reply(handler, 410, {"error": "correlation_id desconhecido ou expirado"})
+        self._reply(handler, 200, {"status": "ok", "correlation_id": correlation_id})
+
+    def _receive_video(self, handler: BaseHTTPRequestHandler, pending: PendingCallback,
+                       head: bytes, remaining: int) -> Dict[str, Any]:
+        """Vídeo no corpo do callback: gravado em blocos no caminho do prompt"""
+        if self.video_path is None:
+            raise ValueError("callbacks binários não aceitos")
+        path = self.video_path(pending.prompt_id)
+        tmp_path = f"{path}.part"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(head)
+                while remaining > 0:
+                    chunk = handler.rfile.read(min(STREAM_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise OSError("conexão encerrada antes do fim do corpo")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return {'success': True, 'video_url': f"file:///{os.path.abspath(path).replace(os.sep, '/')}"}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "pending": sum(1 for p in self._pending.values() if p.armed),
+                "received": self._received,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+            }
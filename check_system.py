@@ -20,6 +20,63 @@ def check_imports():
         from batch_processor import PromptManager, ThreadPoolManager, ProgressTracker
         print("✅ batch_processor OK")
         
+        from http_client import SessionPool
+        print("✅ http_client OK")
+        
+        from rate_limiter import RateLimiter
+        print("✅ rate_limiter OK")
+        
+        from circuit_breaker import CircuitBreakerRegistry
+        print("✅ circuit_breaker OK")
+        
+        from retry_policy import RetryPolicy
+        print("✅ retry_policy OK")
+        
+        from idempotency import IdempotencyStore
+        print("✅ idempotency OK")
+        
+        from hedging import HedgePolicy
+        print("✅ hedging OK")
+        
+        from routing import ProviderRouter
+        print("✅ routing OK")
+        
+        from key_pool import KeyPool
+        print("✅ key_pool OK")
+        
+        from quota import QuotaManager
+        print("✅ quota OK")
+        
+        import json_codec
+        print(f"✅ json_codec OK (backend: {json_codec.BACKEND})")
+        
+        from json_stream import StreamingJSONBody
+        print("✅ json_stream OK")
+        
+        from response_stream import ResponseBody
+        print("✅ response_stream OK")
+        
+        from results import parse_callback_result
+        print("✅ results OK")
+        
+        from callback_receiver import CallbackReceiver
+        print("✅ callback_receiver OK")
+        
+        from bulk_submit import build_bulk_envelope
+        print("✅ bulk_submit OK")
+        
+        from image_cache import ImageCache
+        print("✅ image_cache OK")
+        
+        from image_preprocess import ImagePreprocessor
+        print("✅ image_preprocess OK")
+        
+        from prefetch import PayloadPrefetcher
+        print("✅ prefetch OK")
+        
+        from providers import OperationTracker
+        print("✅ providers OK")
+        
         import config
         print("✅ config OK")
         
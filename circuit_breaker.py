@@ -0,0 +1,183 @@
+"""
+Circuit Breaker por Endpoint
+Interrompe o envio para webhooks/provedores que estão falhando (5xx, timeouts)
+e libera uma única requisição de teste após o período de espera
+"""
+
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Dict, Any, Optional, Callable
+
+import config
+
+
+class CircuitState(Enum):
+    """Estados do circuit breaker"""
+    CLOSED = "Fechado"
+    OPEN = "Aberto"
+    HALF_OPEN = "Meio-aberto"
+
+
+class CircuitBreaker:
+    """Circuit breaker de um endpoint (fechado -> aberto -> meio-aberto -> fechado)"""
+
+    def __init__(self, name: str,
+                 failure_rate_threshold: float = 0.5,
+                 window_size: int = 10,
+                 min_calls: int = 4,
+                 consecutive_timeouts: int = 2,
+                 open_seconds: float = 60.0,
+                 probe_timeout: Optional[float] = None,
+                 on_state_change: Optional[Callable[[str, CircuitState, CircuitState], None]] = None):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = max(1, int(min_calls))
+        self.consecutive_timeouts_threshold = max(1, int(consecutive_timeouts))
+        self.open_seconds = float(open_seconds)
+        # Sonda sem resposta por mais que isso libera outra (ex.: thread cancelada)
+        self.probe_timeout = float(probe_timeout if probe_timeout is not None else config.REQUEST_TIMEOUT + 30)
+        self.on_state_change = on_state_change
+        self._outcomes: deque = deque(maxlen=max(1, int(window_size)))
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._consecutive_timeouts = 0
+        self._trips = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, new_state: CircuitState) -> None:
+        old_state = self._state
+        if old_state == new_state:
+            return
+        self._state = new_state
+        if new_state == CircuitState.OPEN:
+            self._opened_at = time.time()
+            self._trips += 1
+        if new_state != CircuitState.HALF_OPEN:
+            self._probe_started_at = None
+        if self.on_state_change:
+            try:
+                self.on_state_change(self.name, old_state, new_state)
+            except Exception:
+                pass
+
+    def _refresh(self) -> None:
+        if self._state == CircuitState.OPEN and time.time() - self._opened_at >= self.open_seconds:
+            self._set_state(CircuitState.HALF_OPEN)
+
+    def _probe_busy(self) -> bool:
+        return (self._probe_started_at is not None
+                and time.time() - self._probe_started_at < self.probe_timeout)
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def can_dispatch(self) -> bool:
+        """Consulta sem efeito colateral: há chance de allow_request() liberar agora?"""
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            return self._state == CircuitState.HALF_OPEN and not self._probe_busy()
+
+    def allow_request(self) -> bool:
+        """Reserva o envio de uma requisição (no meio-aberto, apenas uma sonda por vez)"""
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN and not self._probe_busy():
+                self._probe_started_at = time.time()
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_timeouts = 0
+            if self._state == CircuitState.HALF_OPEN:
+                self._outcomes.clear()
+                self._set_state(CircuitState.CLOSED)
+            self._outcomes.append(True)
+
+    def record_failure(self, timeout: bool = False) -> None:
+        """
+        Registra uma falha do endpoint
+
+        Args:
+            timeout: True para timeout/erro de conexão (conta para o limite de timeouts seguidos)
+        """
+        with self._lock:
+            self._consecutive_timeouts = self._consecutive_timeouts + 1 if timeout else 0
+            if self._state == CircuitState.HALF_OPEN:
+                # Sonda falhou: volta a abrir por mais um período
+                self._set_state(CircuitState.OPEN)
+                return
+            if self._state == CircuitState.OPEN:
+                return
+            self._outcomes.append(False)
+            failures = sum(1 for ok in self._outcomes if not ok)
+            rate_tripped = (len(self._outcomes) >= self.min_calls
+                            and failures / len(self._outcomes) >= self.failure_rate_threshold)
+            if rate_tripped or self._consecutive_timeouts >= self.consecutive_timeouts_threshold:
+                self._set_state(CircuitState.OPEN)
+
+    def retry_in(self) -> float:
+        """Segundos até a próxima sonda (0 quando fechado ou meio-aberto)"""
+        with self._lock:
+            self._refresh()
+            if self._state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.time() - self._opened_at))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            calls = len(self._outcomes)
+            failures = sum(1 for ok in self._outcomes if not ok)
+            return {
+                "state": self._state.value,
+                "failure_rate": (failures / calls * 100) if calls else 0.0,
+                "window_calls": calls,
+                "consecutive_timeouts": self._consecutive_timeouts,
+                "trips": self._trips,
+                "rejected": self._rejected,
+                "retry_in": max(0.0, self.open_seconds - (time.time() - self._opened_at))
+                if self._state == CircuitState.OPEN else 0.0,
+            }
+
+
+class CircuitBreakerRegistry:
+    """Mantém um circuit breaker por endpoint, criado sob demanda com os limites de config"""
+
+    def __init__(self, on_state_change: Optional[Callable[[str, CircuitState, CircuitState], None]] = None):
+        self.on_state_change = on_state_change
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    endpoint,
+                    failure_rate_threshold=getattr(config, 'CIRCUIT_FAILURE_RATE', 0.5),
+                    window_size=getattr(config, 'CIRCUIT_WINDOW_SIZE', 10),
+                    min_calls=getattr(config, 'CIRCUIT_MIN_CALLS', 4),
+                    consecutive_timeouts=getattr(config, 'CIRCUIT_CONSECUTIVE_TIMEOUTS', 2),
+                    open_seconds=getattr(config, 'CIRCUIT_OPEN_SECONDS', 60),
+                    on_state_change=self.on_state_change,
+                )
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.get_stats() for endpoint, breaker in breakers.items()}
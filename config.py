@@ -11,11 +11,82 @@ AUTO_SCROLL_LOGS = True   # auto-scroll dos logs
 DEFAULT_MAX_THREADS = 2   # threads padrão para processamento
 MAX_ALLOWED_THREADS = 10  # máximo de threads permitidas
 THREAD_TIMEOUT = 600      # timeout em segundos para requisições (10 minutos)
+# Motor do lote: "threads" (uma thread por prompt, paradas no semáforo enquanto aguardam)
+# ou "asyncio" (fila em um event loop; E/S em asyncio.to_thread limitada pelos slots)
+BATCH_ENGINE = "threads"
 
 # Configurações de Rede
 REQUEST_TIMEOUT = 120     # timeout para requisições HTTP (2 minutos)
 CONNECTION_RETRIES = 3    # tentativas de reconexão
-RETRY_DELAY = 2.0        # delay entre tentativas (segundos)
+RETRY_DELAY = 2.0        # delay base entre tentativas (segundos; jitter decorrelacionado a partir daqui)
+RETRY_MAX_DELAY = 60.0   # teto do backoff entre tentativas
+RETRY_MAX_RETRY_AFTER = 300.0  # maior Retry-After respeitado (segundos)
+RETRY_BUDGET_RATIO = 0.2       # retries permitidos por requisição original (20% do tráfego)
+RETRY_BUDGET_MAX_TOKENS = 10   # retries acumuláveis para rajadas de falhas
+# Compressão do corpo das submissões (opt-in): URL ou prefixo do webhook -> "gzip" ou "deflate"
+# Use apenas em endpoints que aceitam Content-Encoding na requisição (ex.: {WEBHOOK_URL: "gzip"})
+REQUEST_COMPRESSION = {}
+REQUEST_COMPRESSION_MIN_BYTES = 16 * 1024   # corpos menores seguem sem compressão
+REQUEST_COMPRESSION_LEVEL = 6
+# Backend JSON: "auto" usa orjson quando instalado (mais rápido), "json" força a biblioteca padrão
+JSON_BACKEND = "auto"
+# Respostas do webhook chegam em streaming: vídeos vão direto para o disco; JSON/texto maior que isto é recusado
+RESPONSE_MAX_TEXT_BYTES = 2 * 1024 * 1024
+# Aquecimento de conexões (DNS + TCP/TLS, HEAD só na raiz do host) no início do lote
+PREWARM_ENABLED = True
+PREWARM_ON_STARTUP = False     # também aquece o provedor selecionado ao abrir o app
+PREWARM_TIMEOUT = 5.0          # tempo máximo de cada conexão aquecida (segundos)
+# Modo callback do webhook Veta: cada submissão leva callback_url + correlation_id e o fluxo do
+# n8n responde na hora (202/ack), fazendo POST do resultado (JSON com video_url ou o vídeo) no receptor local
+CALLBACK_MODE = False
+CALLBACK_HOST = "127.0.0.1"      # interface do receptor local ("0.0.0.0" expõe na rede: só com n8n remoto e firewall)
+CALLBACK_PORT = 8765             # 0 = porta livre escolhida pelo sistema
+CALLBACK_PUBLIC_URL = ""         # URL vista pelo n8n (túnel/proxy, ex.: "https://meu-tunel.exemplo.com"); vazio = http://host:porta
+CALLBACK_TIMEOUT = 1800          # sem retorno neste prazo (segundos) o prompt falha
+# Envio em bloco do webhook Veta: até BULK_MAX_ITEMS prompts do mesmo endpoint por requisição, com
+# credenciais e imagens repetidas enviadas uma vez (o fluxo do n8n precisa aceitar o envelope "items")
+BULK_SUBMIT = False
+BULK_MAX_ITEMS = 10
+# Hedge de requisições lentas no lote (latência de cauda)
+HEDGE_ENABLED = False
+HEDGE_PERCENTILE = 0.95   # percentil da latência observada que dispara o hedge
+HEDGE_MIN_SAMPLES = 5     # submissões concluídas no endpoint necessárias antes do primeiro hedge
+HEDGE_MIN_DELAY = 30      # nunca dispara hedge antes disso (segundos)
+HEDGE_MAX_RATIO = 0.1     # no máximo 10% das submissões viram hedge
+# Endpoints alternativos para o hedge (None = mesmo endpoint); o hedge sempre usa outra chave de API
+HEDGE_WEBHOOK_URL = None
+HEDGE_REELS_WEBHOOK_URL = None
+
+# Roteamento multi-provedor do lote: peso de cada provedor e limites de saúde para failover
+ROUTING_WEIGHTS = {"Veta": 1.0, "Gemini": 1.0, "WAN": 1.0}
+ROUTING_ERROR_RATE = 0.5      # fração de falhas na janela que tira o provedor da rota
+ROUTING_MAX_LATENCY = 900     # latência média (s) acima disso tira o provedor da rota
+ROUTING_WINDOW_SIZE = 10      # últimas N gerações consideradas por provedor
+ROUTING_MIN_CALLS = 3         # gerações necessárias antes de avaliar a saúde
+# Credenciais dos provedores não selecionados na interface (o selecionado usa os campos da tela)
+PROVIDER_CREDENTIALS = {
+    "Veta": {"api_key": "", "token": ""},
+    "Gemini": {"api_key": ""},
+    "WAN": {"api_key": ""},
+}
+
+# Idempotência das submissões: chave estável por geração + registro local dos resultados
+IDEMPOTENCY_STORE_FILE = "idempotency_keys.json"
+IDEMPOTENCY_TTL_SECONDS = 7 * 24 * 3600   # registros mais antigos são descartados ao carregar e ao gravar
+IDEMPOTENCY_FLUSH_INTERVAL = 2.0          # alterações agrupadas em uma escrita a cada N segundos
+# Limite de taxa por provedor (token bucket compartilhado por lote, individual e polling):
+# rate = requisições/segundo, burst = requisições permitidas em rajada
+RATE_LIMITS = {
+    "Veta": {"rate": 1.0, "burst": 3},
+    "Gemini": {"rate": 1.0, "burst": 5},
+    "WAN": {"rate": 2.0, "burst": 5},
+}
+# Circuit breaker por endpoint: abre por taxa de erro (5xx/timeout) na janela ou por timeouts seguidos
+CIRCUIT_FAILURE_RATE = 0.5          # fração de falhas na janela que abre o circuito
+CIRCUIT_WINDOW_SIZE = 10            # últimas N chamadas consideradas
+CIRCUIT_MIN_CALLS = 4               # mínimo de chamadas na janela antes de avaliar a taxa
+CIRCUIT_CONSECUTIVE_TIMEOUTS = 2    # timeouts/erros de conexão seguidos que abrem o circuito
+CIRCUIT_OPEN_SECONDS = 60           # tempo aberto antes de liberar uma requisição de teste
 
 # Configurações de Logging
 LOG_LEVEL = "INFO"        # nível de log (DEBUG, INFO, WARNING, ERROR)
@@ -23,7 +94,6 @@ LOG_TO_FILE = True        # salvar logs em arquivo
 LOG_FILE = "gerador_video.log"
 
 # Configurações de Performance
-BATCH_SUBMIT_DELAY = 0.1  # delay entre submissões de prompts (segundos)
 UI_FORCE_UPDATE = True    # forçar atualização da UI
 MEMORY_MONITORING = True  # monitorar uso de memória
 
@@ -32,6 +102,11 @@ WEBHOOK_URL = "https://n8n.srv943626.hstgr.cloud/webhook/9a20b730-2fd6-4d92-9c62
 # Endpoint específico para geração vertical 9:16 (Reels Premium)
 REELS_WEBHOOK_URL = "https://n8n.srv943626.hstgr.cloud/webhook/testevetareelspremium"
 DEFAULT_PRESENTER_URL = "https://create-images-results.d-id.com/DefaultPresenters/Noelle_f/image.jpeg"
+# Pool próprio por endpoint de submissão no lote: prompts simultâneos e intervalo mínimo entre envios.
+# Endpoints sem entrada usam apenas o limite de threads e o "Delay entre gerações" do lote.
+ENDPOINT_POOLS = {
+    REELS_WEBHOOK_URL: {"max_concurrent": 1, "min_interval": 120.0},
+}
 
 # Endpoint do provedor Gemini (defina seu webhook/endpoint aqui; deixe vazio se não usar)
 GEMINI_WEBHOOK_URL = ""  # ex.: "https://seu-servidor.com/webhook/gemini-video"
@@ -59,6 +134,13 @@ GEMINI_HEADERS = {
     "Accept": "application/json"
 }
 
+# Gemini (Veo 3) - operação longa (predictLongRunning + polling da operação)
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_VEO_MODEL = "veo-3.0-generate-001"
+GEMINI_VEO_START_URL = f"{GEMINI_API_BASE}/models/{GEMINI_VEO_MODEL}:predictLongRunning"
+GEMINI_MAX_WAIT_SECONDS = 1800        # desiste da operação após 30 minutos
+GEMINI_MAX_INFLIGHT_OPERATIONS = 4    # operações simultâneas em geração por chave de API (lote)
+
 # Wan (DashScope) - Text-to-Image (URLs internacionais)
 # Endpoint para criação de tarefa de síntese de imagem
 WAN_IMAGE_CREATE_URL = "https://dashscope-intl.aliyuncs.com/api/v1/services/aigc/text2image/image-synthesis"
@@ -73,4 +155,43 @@ WAN_HEADERS_BASE = {
     "X-DashScope-Async": "enable"
 }
 # Modelo padrão para Text-to-Video (região internacional/Singapura)
-WAN_DEFAULT_T2V_MODEL = "wan2.5-t2v-preview"
\ No newline at end of file
+WAN_DEFAULT_T2V_MODEL = "wan2.5-t2v-preview"
+# Tamanho usado quando o lote WAN está em 9:16 (16:9 mantém o default do modelo)
+WAN_VERTICAL_SIZE = "720*1280"
+WAN_MAX_WAIT_SECONDS = 1800           # corte duro do polling (30 minutos)
+WAN_MAX_INFLIGHT_TASKS = 4            # tarefas simultâneas em geração por chave de API (lote)
+
+# Pool de chaves de API do lote (além das credenciais da tela e de PROVIDER_CREDENTIALS)
+API_KEY_POOL = {"Veta": [], "Gemini": [], "WAN": []}   # listas de {"api_key": ..., "token": ...}
+API_KEYS_FILE = "api_keys.json"       # opcional, mesmo formato de API_KEY_POOL
+# Requisições simultâneas por chave e limite de taxa por chave (None = só o limite do endpoint)
+KEY_MAX_CONCURRENT = {"Veta": MAX_ALLOWED_THREADS, "Gemini": GEMINI_MAX_INFLIGHT_OPERATIONS, "WAN": WAN_MAX_INFLIGHT_TASKS}
+KEY_RATE_LIMITS = {"Veta": None, "Gemini": None, "WAN": None}
+KEY_AUTH_QUARANTINE_SECONDS = 600     # chave com 401/403 fica fora do rodízio
+KEY_THROTTLE_QUARANTINE_SECONDS = 60  # chave com 429 fica fora do rodízio (ou o Retry-After, se maior)
+# Cotas por chave de API em janelas deslizantes: provedor -> [[janela_em_segundos, máximo_de_requisições], ...]
+# Ex.: "Gemini": [[60, 10], [86400, 100]] = até 10 por minuto e 100 por dia em cada chave
+QUOTA_LIMITS = {"Veta": [], "Gemini": [], "WAN": []}
+QUOTA_STATE_FILE = "quota_usage.json"   # consumo persistido entre execuções
+
+# Cache em memória do base64 das imagens de referência (LRU por caminho/mtime/tamanho)
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Pré-processamento das imagens antes do upload: redimensiona pelo formato, remove metadados e recomprime
+PREPROCESS_IMAGES = False           # opt-in: a recompressão com perdas altera a imagem enviada à geração
+PREPROCESS_MAX_SIZE = {"16:9": (1920, 1080), "9:16": (1080, 1920)}
+PREPROCESS_FORMAT = "JPEG"        # "JPEG" ou "WEBP"
+PREPROCESS_QUALITY = 85
+PREPROCESS_WORKERS = 2
+PREPROCESS_FOLDER = "imagens_processadas"
+# Payloads montados antecipadamente para os próximos prompts pendentes do lote (0 = desativado)
+PREFETCH_DEPTH = 3
+
+# Acompanhamento de operações longas (Gemini/WAN) - um único rastreador compartilhado
+LRO_POLL_INTERVAL = 8                 # segundos entre consultas
+LRO_SLOW_POLL_INTERVAL = 15           # intervalo após THREAD_TIMEOUT de geração
+LRO_POLL_TIMEOUT = 30                 # timeout HTTP de cada consulta
+LRO_POLL_WORKERS = 4                  # consultas vencidas em paralelo (uma lenta não atrasa as outras)
+LRO_DENSE_POLL_INTERVAL = 3           # intervalo dentro da janela provável de conclusão (p10-p90)
+LRO_MAX_BACKOFF = 120                 # teto do backoff de polling em 429/5xx
+LRO_STATS_FILE = "lro_poll_stats.json"  # tempos de conclusão observados (aprendizado do agendador)
@@ -1,20 +1,42 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import requests
-import json
 import threading
 import time
 import webbrowser
-import base64
 import os
 import logging
+import uuid
 from PIL import Image, ImageTk
 from datetime import datetime
 from urllib.parse import urlparse
 from batch_processor import (
-    PromptManager, ThreadPoolManager, ProgressTracker,
+    PromptManager, ThreadPoolManager, AsyncBatchEngine, ProgressTracker,
     PromptItem, PromptStatus, BatchConfiguration
 )
+from http_client import SessionPool
+from rate_limiter import RateLimiter, RateLimitCancelled
+from circuit_breaker import CircuitBreakerRegistry, CircuitState
+from retry_policy import RetryPolicy, RetryBudget, parse_retry_after
+from idempotency import IdempotencyStore
+from hedging import HedgePolicy
+from routing import ProviderRouter
+from key_pool import KeyPool
+from quota import QuotaManager
+import json_codec
+from json_stream import CompressedBody, CompressionStats, encode_body
+from image_cache import ImageCache
+from image_preprocess import ImagePreprocessor
+from response_stream import ResponseBody, read_preview, video_mime
+from callback_receiver import CallbackReceiver
+from results import parse_callback_result, parse_language_videos
+from bulk_submit import BulkStats, build_bulk_envelope, parse_bulk_response
+from prefetch import PayloadPrefetcher
+from providers import (
+    LRO_PROVIDERS, OperationTracker, PendingOperation, ProviderError, operation_profile,
+    build_gemini_payload, gemini_start_operation, gemini_poll_url, gemini_headers,
+    build_wan_payload, wan_create_task, wan_poll_url, wan_headers
+)
 import config
 
 class VideoGeneratorApp:
@@ -35,18 +57,118 @@ class VideoGeneratorApp:
         
         # Sistema de processamento em lote
         self.prompt_manager = PromptManager()
-        self.thread_pool = ThreadPoolManager(max_threads=config.DEFAULT_MAX_THREADS)
+        if getattr(config, 'BATCH_ENGINE', 'threads') == 'asyncio':
+            # Slot livre -> despacho na thread do Tk (root.after), sem esperar o ciclo do despachante
+            self.thread_pool = AsyncBatchEngine(
+                max_threads=config.DEFAULT_MAX_THREADS,
+                on_slot_released=self.dispatch_pending_prompts,
+                ui_scheduler=lambda func: self.root.after(0, func)
+            )
+        else:
+            self.thread_pool = ThreadPoolManager(max_threads=config.DEFAULT_MAX_THREADS)
         self.progress_tracker = ProgressTracker()
         self.batch_config = BatchConfiguration()
         self.batch_processing = False
         self.dispatcher_running = False
         
+        # Limite de taxa por endpoint (token bucket) compartilhado por lote, individual e polling
+        self.rate_limiter = RateLimiter()
+        self.delay_limit_endpoint = None
+        self.configure_rate_limits()
+        # Política de retry compartilhada (jitter decorrelacionado + Retry-After + orçamento global)
+        self.retry_policy = RetryPolicy(
+            base_delay=config.RETRY_DELAY,
+            max_delay=config.RETRY_MAX_DELAY,
+            budget=RetryBudget(ratio=config.RETRY_BUDGET_RATIO, max_tokens=config.RETRY_BUDGET_MAX_TOKENS),
+            max_retry_after=config.RETRY_MAX_RETRY_AFTER
+        )
+        # Chaves de idempotência e resultados por geração (evita gerações duplicadas em retries)
+        self.idempotency = IdempotencyStore(
+            path=getattr(config, 'IDEMPOTENCY_STORE_FILE', None),
+            ttl_seconds=getattr(config, 'IDEMPOTENCY_TTL_SECONDS', 7 * 24 * 3600),
+            flush_interval=getattr(config, 'IDEMPOTENCY_FLUSH_INTERVAL', 2.0)
+        )
+        # Modo callback: o n8n devolve o resultado no receptor local em vez de segurar a conexão
+        self.batch_config.callback_enabled = getattr(config, 'CALLBACK_MODE', False)
+        self.callback_receiver = CallbackReceiver(
+            host=getattr(config, 'CALLBACK_HOST', "127.0.0.1"),
+            port=getattr(config, 'CALLBACK_PORT', 8765),
+            public_url=getattr(config, 'CALLBACK_PUBLIC_URL', ""),
+            max_body_bytes=getattr(config, 'RESPONSE_MAX_TEXT_BYTES', 2 * 1024 * 1024),
+            video_path=self.batch_video_path,
+            log=self.log
+        )
+        # Envio em bloco: vários prompts Veta por requisição (endpoints que recusarem o envelope voltam ao envio individual)
+        self.batch_config.bulk_enabled = getattr(config, 'BULK_SUBMIT', False)
+        self.bulk_stats = BulkStats()
+        self.bulk_rejected = set()
+        # Hedge de submissões lentas do lote (desligado por padrão)
+        self.batch_config.hedge_enabled = getattr(config, 'HEDGE_ENABLED', False)
+        self.hedge_policy = HedgePolicy(
+            percentile=getattr(config, 'HEDGE_PERCENTILE', 0.95),
+            min_samples=getattr(config, 'HEDGE_MIN_SAMPLES', 5),
+            min_delay=getattr(config, 'HEDGE_MIN_DELAY', 30),
+            max_ratio=getattr(config, 'HEDGE_MAX_RATIO', 0.1)
+        )
+        # Roteamento multi-provedor do lote (peso x saúde observada)
+        self.provider_router = ProviderRouter(
+            weights=getattr(config, 'ROUTING_WEIGHTS', {"Veta": 1.0}),
+            error_rate_threshold=getattr(config, 'ROUTING_ERROR_RATE', 0.5),
+            max_latency=getattr(config, 'ROUTING_MAX_LATENCY', None),
+            window_size=getattr(config, 'ROUTING_WINDOW_SIZE', 10),
+            min_calls=getattr(config, 'ROUTING_MIN_CALLS', 3)
+        )
+        # Pool de chaves de API do lote (carregado em start_batch_processing)
+        self.key_pool = KeyPool(
+            max_concurrent=getattr(config, 'KEY_MAX_CONCURRENT', {}),
+            rate_limits={p: l for p, l in getattr(config, 'KEY_RATE_LIMITS', {}).items() if l},
+            auth_quarantine_seconds=getattr(config, 'KEY_AUTH_QUARANTINE_SECONDS', 600),
+            throttle_quarantine_seconds=getattr(config, 'KEY_THROTTLE_QUARANTINE_SECONDS', 60)
+        )
+        # Cotas por chave (admissão do lote), persistidas entre execuções
+        self.quota = QuotaManager(
+            limits=getattr(config, 'QUOTA_LIMITS', {}),
+            path=getattr(config, 'QUOTA_STATE_FILE', None)
+        )
+        # Imagens de referência codificadas uma vez e reaproveitadas por todos os prompts
+        self.image_cache = ImageCache(max_bytes=getattr(config, 'IMAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        # Payloads dos próximos prompts do lote montados em segundo plano (descartados ao editar o prompt)
+        self.payload_prefetcher = PayloadPrefetcher(
+            build=self.build_batch_payload,
+            fingerprint=self.get_payload_fingerprint,
+            depth=getattr(config, 'PREFETCH_DEPTH', 3)
+        )
+        self.prompt_manager.add_change_listener(self.payload_prefetcher.invalidate)
+        # Compressão opt-in do corpo das submissões (config.REQUEST_COMPRESSION)
+        self.compression_stats = CompressionStats()
+        self.compression_rejected = set()
+        # Redução/recompressão das imagens antes do upload (pool próprio, resultado em cache)
+        self.image_preprocessor = ImagePreprocessor(
+            max_sizes=getattr(config, 'PREPROCESS_MAX_SIZE', {"16:9": (1920, 1080), "9:16": (1080, 1920)}),
+            output_dir=getattr(config, 'PREPROCESS_FOLDER', "imagens_processadas"),
+            image_format=getattr(config, 'PREPROCESS_FORMAT', "JPEG"),
+            quality=getattr(config, 'PREPROCESS_QUALITY', 85),
+            workers=getattr(config, 'PREPROCESS_WORKERS', 2),
+            on_done=lambda result: self.log(f"🗜️ Imagem {result.summary()}", "WARNING" if result.error else "INFO")
+        )
+        # Chave emprestada a cada operação Gemini/WAN do lote até a conclusão (prompt_id -> KeyLease)
+        self.operation_leases = {}
+        # Circuit breaker por endpoint de submissão (webhook Veta, Gemini, WAN)
+        self.circuit_breakers = CircuitBreakerRegistry(on_state_change=self.on_circuit_state_change)
+        # Conexões HTTP keep-alive compartilhadas (um pool por host, dimensionado pelas threads)
+        self.http_pool = SessionPool(max_connections=self.thread_pool.max_threads, rate_limiter=self.rate_limiter)
+        # Rastreador único para operações longas (Gemini/WAN) individuais e do lote
+        self.lro_tracker = OperationTracker(self.http_pool, log=self.log)
+        
         # Controle de UI responsiva
         self.ui_update_interval = config.UI_UPDATE_INTERVAL
         self.last_ui_update = time.time()
         
         self.setup_ui()
         self.log("✅ Interface configurada com sucesso")
+        # Opcional: conexão do provedor selecionado pronta antes da primeira geração
+        if getattr(config, 'PREWARM_ON_STARTUP', False):
+            self.prewarm_connections([self.provider_var.get() if hasattr(self, 'provider_var') else 'Veta'], connections=1)
     
     def setup_logging(self):
         """Configura sistema de logging"""
@@ -218,6 +340,70 @@ class VideoGeneratorApp:
         ttk.Label(status_grid, text="Status da API:").grid(row=1, column=2, sticky="w", padx=(20, 10))
         self.api_status_label = ttk.Label(status_grid, text="Não testada")
         self.api_status_label.grid(row=1, column=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Conexões HTTP:").grid(row=2, column=0, sticky="w", padx=(0, 10))
+        self.http_pool_status_label = ttk.Label(status_grid, text="—")
+        self.http_pool_status_label.grid(row=2, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Polling LRO:").grid(row=3, column=0, sticky="w", padx=(0, 10))
+        self.lro_poll_status_label = ttk.Label(status_grid, text="—")
+        self.lro_poll_status_label.grid(row=3, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Limite de taxa:").grid(row=4, column=0, sticky="nw", padx=(0, 10))
+        self.rate_limit_status_label = ttk.Label(status_grid, text="—", justify="left")
+        self.rate_limit_status_label.grid(row=4, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Circuit breakers:").grid(row=5, column=0, sticky="nw", padx=(0, 10))
+        self.circuit_status_label = ttk.Label(status_grid, text="—", justify="left")
+        self.circuit_status_label.grid(row=5, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Retries:").grid(row=6, column=0, sticky="w", padx=(0, 10))
+        self.retry_status_label = ttk.Label(status_grid, text="—")
+        self.retry_status_label.grid(row=6, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Hedge:").grid(row=7, column=0, sticky="w", padx=(0, 10))
+        self.hedge_status_label = ttk.Label(status_grid, text="—")
+        self.hedge_status_label.grid(row=7, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Roteamento:").grid(row=8, column=0, sticky="nw", padx=(0, 10))
+        self.routing_status_label = ttk.Label(status_grid, text="—", justify="left")
+        self.routing_status_label.grid(row=8, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Chaves de API:").grid(row=9, column=0, sticky="nw", padx=(0, 10))
+        self.key_pool_status_label = ttk.Label(status_grid, text="—", justify="left")
+        self.key_pool_status_label.grid(row=9, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Cotas:").grid(row=10, column=0, sticky="nw", padx=(0, 10))
+        self.quota_status_label = ttk.Label(status_grid, text="—", justify="left")
+        self.quota_status_label.grid(row=10, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Aquecimento:").grid(row=11, column=0, sticky="nw", padx=(0, 10))
+        self.warmup_status_label = ttk.Label(status_grid, text="—", justify="left")
+        self.warmup_status_label.grid(row=11, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Cache de imagens:").grid(row=12, column=0, sticky="w", padx=(0, 10))
+        self.image_cache_status_label = ttk.Label(status_grid, text="—")
+        self.image_cache_status_label.grid(row=12, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Pré-processamento:").grid(row=13, column=0, sticky="w", padx=(0, 10))
+        self.preprocess_status_label = ttk.Label(status_grid, text="—")
+        self.preprocess_status_label.grid(row=13, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Compressão:").grid(row=14, column=0, sticky="w", padx=(0, 10))
+        self.compression_status_label = ttk.Label(status_grid, text="—")
+        self.compression_status_label.grid(row=14, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Prefetch:").grid(row=15, column=0, sticky="w", padx=(0, 10))
+        self.prefetch_status_label = ttk.Label(status_grid, text="—")
+        self.prefetch_status_label.grid(row=15, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Callbacks:").grid(row=16, column=0, sticky="w", padx=(0, 10))
+        self.callback_status_label = ttk.Label(status_grid, text="—")
+        self.callback_status_label.grid(row=16, column=1, columnspan=3, sticky="w")
+        
+        ttk.Label(status_grid, text="Envio em bloco:").grid(row=17, column=0, sticky="w", padx=(0, 10))
+        self.bulk_status_label = ttk.Label(status_grid, text="—")
+        self.bulk_status_label.grid(row=17, column=1, columnspan=3, sticky="w")
     
     def clear_logs(self):
         """Limpa área de logs"""
@@ -303,7 +489,7 @@ class VideoGeneratorApp:
                 if provider == "Gemini":
                     self.log("📐 Formato: N/A (Gemini)")
                     self.log(f"🔗 Endpoint de teste: {endpoint}")
-                    response = requests.get(
+                    response = self.http_pool.get(
                         endpoint,
                         headers=headers,
                         timeout=config.REQUEST_TIMEOUT
@@ -311,7 +497,7 @@ class VideoGeneratorApp:
                 elif provider == "WAN":
                     self.log("📐 Formato: N/A (WAN)")
                     self.log(f"🔗 Endpoint de teste: {endpoint}")
-                    response = requests.get(
+                    response = self.http_pool.get(
                         endpoint,
                         headers=headers,
                         timeout=config.REQUEST_TIMEOUT
@@ -319,10 +505,10 @@ class VideoGeneratorApp:
                 else:
                     self.log(f"📐 Formato: {'9:16 (REELS)' if use_reels else '16:9'}")
                     self.log(f"🔗 Endpoint de teste: {endpoint}")
-                    response = requests.post(
+                    response = self.http_pool.post(
                         endpoint,
                         headers=headers,
-                        data=json.dumps(test_data),
+                        data=json_codec.dumps(test_data),
                         timeout=config.REQUEST_TIMEOUT
                     )
                 
@@ -363,6 +549,165 @@ class VideoGeneratorApp:
                 current_time = datetime.now().strftime("%H:%M:%S")
                 self.last_update_label.config(text=current_time)
                 
+                # Reuso de conexões HTTP (hits = conexão reaproveitada, misses = novo handshake)
+                if hasattr(self, 'http_pool') and hasattr(self, 'http_pool_status_label'):
+                    totals = self.http_pool.get_totals()
+                    self.http_pool_status_label.config(
+                        text=f"{totals['hits']} reusos / {totals['misses']} novas ({totals['hit_rate']:.0f}%) em {totals['hosts']} hosts"
+                    )
+                
+                # Tokens disponíveis e espera por endpoint (token bucket)
+                if hasattr(self, 'rate_limiter') and hasattr(self, 'rate_limit_status_label'):
+                    lines = []
+                    for endpoint, st in self.rate_limiter.get_stats().items():
+                        if not st['requests']:
+                            continue
+                        line = f"{urlparse(endpoint).netloc}{urlparse(endpoint).path[:30]}: {st['tokens']:.1f}/{st['burst']} tokens"
+                        if st['next_wait'] > 0:
+                            line += f", próximo em {st['next_wait']:.1f}s"
+                        if st['waits']:
+                            line += f", espera média {st['avg_wait']:.1f}s ({st['waits']}x)"
+                        lines.append(line)
+                    self.rate_limit_status_label.config(text="\n".join(lines) if lines else "—")
+                
+                # Estado dos circuit breakers por endpoint
+                if hasattr(self, 'circuit_breakers') and hasattr(self, 'circuit_status_label'):
+                    lines = []
+                    for endpoint, st in self.circuit_breakers.get_stats().items():
+                        line = f"{urlparse(endpoint).netloc}{urlparse(endpoint).path[:30]}: {st['state']} (falhas {st['failure_rate']:.0f}% em {st['window_calls']})"
+                        if st['retry_in'] > 0:
+                            line += f", teste em {st['retry_in']:.0f}s"
+                        if st['trips']:
+                            line += f", aberto {st['trips']}x"
+                        lines.append(line)
+                    self.circuit_status_label.config(text="\n".join(lines) if lines else "—")
+                
+                # Amplificação de retries e orçamento restante
+                if hasattr(self, 'retry_policy') and hasattr(self, 'retry_status_label'):
+                    rs = self.retry_policy.get_stats()
+                    if rs['requests']:
+                        self.retry_status_label.config(
+                            text=f"{rs['retries']} retries / {rs['requests']} requisições (x{rs['amplification']:.2f}), "
+                                 f"{rs['denied']} negados, orçamento {rs['budget_tokens']:.1f}"
+                        )
+                
+                # Hedges disparados e quantos venceram a requisição original
+                if hasattr(self, 'hedge_policy') and hasattr(self, 'hedge_status_label'):
+                    hs = self.hedge_policy.get_stats()
+                    if hs['hedges'] or hs['suppressed']:
+                        self.hedge_status_label.config(
+                            text=f"{hs['hedges']} hedges / {hs['requests']} submissões ({hs['hedge_rate'] * 100:.0f}%), "
+                                 f"{hs['hedge_wins']} venceram ({hs['win_rate'] * 100:.0f}%), {hs['suppressed']} limitados"
+                        )
+                
+                # Distribuição e saúde por provedor no roteamento multi-provedor
+                if hasattr(self, 'provider_router') and hasattr(self, 'routing_status_label'):
+                    rs = self.provider_router.get_stats()
+                    lines = []
+                    for name, st in rs['providers'].items():
+                        if not st['routed'] and not st['calls']:
+                            continue
+                        line = (f"{name}: {st['routed']} prompts, erros {st['error_rate'] * 100:.0f}%, "
+                                f"latência {st['avg_latency']:.0f}s{'' if st['healthy'] else ' (fora da rota)'}")
+                        lines.append(line)
+                    if rs['failovers']:
+                        lines.append(f"{rs['failovers']} failovers")
+                    self.routing_status_label.config(text="\n".join(lines) if lines else "—")
+                
+                # Uso de cada chave do pool (em andamento, utilização e quarentena)
+                if hasattr(self, 'key_pool') and hasattr(self, 'key_pool_status_label'):
+                    lines = []
+                    for st in self.key_pool.get_stats().values():
+                        if not st['requests']:
+                            continue
+                        line = (f"{st['provider']} {st['label']}: {st['in_flight']}/{st['max_concurrent']} em uso, "
+                                f"utilização {st['utilization'] * 100:.0f}%, {st['requests']} requisições")
+                        if st['quarantined_for'] > 0:
+                            line += f", quarentena {st['quarantined_for']:.0f}s"
+                        lines.append(line)
+                    self.key_pool_status_label.config(text="\n".join(lines) if lines else "—")
+                
+                # Consumo de cota por chave em cada janela
+                if hasattr(self, 'quota') and hasattr(self, 'quota_status_label'):
+                    lines = []
+                    for key_id, st in self.quota.get_stats().items():
+                        parts = [f"{used}/{limit} em {window:.0f}s" for window, used, limit in st['windows']]
+                        if st['blocked_for'] > 0:
+                            parts.append(f"suspensa {st['blocked_for']:.0f}s")
+                        if parts:
+                            lines.append(f"{key_id}: {', '.join(parts)}")
+                    self.quota_status_label.config(text="\n".join(lines) if lines else "—")
+                
+                # Tempos de DNS/TCP/TLS medidos no último aquecimento de cada host
+                if hasattr(self, 'http_pool') and hasattr(self, 'warmup_status_label'):
+                    lines = [f"{urlparse(host).netloc}: {self.format_warmup(st)}"
+                             for host, st in self.http_pool.get_warmup_stats().items()]
+                    self.warmup_status_label.config(text="\n".join(lines) if lines else "—")
+                
+                # Reaproveitamento do base64 das imagens de referência
+                if hasattr(self, 'image_cache') and hasattr(self, 'image_cache_status_label'):
+                    cs = self.image_cache.get_stats()
+                    if cs['hits'] or cs['misses']:
+                        text = (f"{cs['hits']} reusos / {cs['misses']} leituras ({cs['hit_rate']:.0f}%), "
+                                f"{cs['entries']} imagens, {cs['bytes'] / 1048576:.1f}/{cs['max_bytes'] / 1048576:.0f} MB")
+                        if cs['evictions']:
+                            text += f", {cs['evictions']} descartadas"
+                        self.image_cache_status_label.config(text=text)
+                
+                # Bytes das imagens antes/depois da redução e recompressão
+                if hasattr(self, 'image_preprocessor') and hasattr(self, 'preprocess_status_label'):
+                    ps = self.image_preprocessor.get_stats()
+                    if ps['images']:
+                        text = (f"{ps['images']} imagens: {ps['original_bytes'] / 1048576:.1f} MB → "
+                                f"{ps['processed_bytes'] / 1048576:.1f} MB (-{ps['saved_ratio'] * 100:.0f}%)")
+                        if ps['errors']:
+                            text += f", {ps['errors']} sem processar"
+                        self.preprocess_status_label.config(text=text)
+                
+                # Payloads entregues prontos aos workers
+                if hasattr(self, 'payload_prefetcher') and hasattr(self, 'prefetch_status_label'):
+                    fs = self.payload_prefetcher.get_stats()
+                    if fs['hits'] or fs['misses'] or fs['stale']:
+                        self.prefetch_status_label.config(
+                            text=f"{fs['hits']} prontos / {fs['misses'] + fs['stale']} montados no envio ({fs['hit_rate']:.0f}%), "
+                                 f"{fs['ready']} na fila, {fs['invalidated']} descartados por edição"
+                        )
+                
+                # Retornos do webhook no modo callback
+                if hasattr(self, 'callback_receiver') and hasattr(self, 'callback_status_label') and self.callback_receiver.running:
+                    cs = self.callback_receiver.get_stats()
+                    self.callback_status_label.config(
+                        text=f"{cs['pending']} aguardando, {cs['received']} recebidos, {cs['timeouts']} expirados"
+                             + (f", {cs['rejected']} recusados" if cs['rejected'] else "")
+                    )
+                
+                # Prompts empacotados por requisição no envio em bloco
+                if hasattr(self, 'bulk_stats') and hasattr(self, 'bulk_status_label'):
+                    bs = self.bulk_stats.get_stats()
+                    if bs['envelopes']:
+                        self.bulk_status_label.config(
+                            text=f"{bs['items']} prompts em {bs['envelopes']} requisições ({bs['avg_items']:.1f}/req), "
+                                 f"{bs['saved_bytes'] / 1048576:.1f} MB de imagens não repetidos"
+                                 + (f", {bs['partial']} blocos com falha parcial" if bs['partial'] else "")
+                        )
+                
+                # Economia da compressão dos corpos enviados
+                if hasattr(self, 'compression_stats') and hasattr(self, 'compression_status_label'):
+                    zs = self.compression_stats.get_stats()
+                    if zs['requests']:
+                        self.compression_status_label.config(
+                            text=f"{zs['requests']} corpos: {zs['raw_bytes'] / 1048576:.1f} MB → "
+                                 f"{zs['compressed_bytes'] / 1048576:.1f} MB (-{zs['saved_ratio'] * 100:.0f}%)"
+                        )
+                
+                # Eficiência do polling de operações longas (consultas por job e atraso de detecção)
+                if hasattr(self, 'lro_tracker') and hasattr(self, 'lro_poll_status_label'):
+                    poll_stats = self.lro_tracker.scheduler.get_stats()
+                    if poll_stats['jobs']:
+                        self.lro_poll_status_label.config(
+                            text=f"{poll_stats['avg_polls']:.1f} consultas/job, atraso médio {poll_stats['avg_lag']:.1f}s ({poll_stats['jobs']} jobs)"
+                        )
+                
                 # Status da memória (simples verificação)
                 try:
                     import psutil
@@ -570,6 +915,31 @@ class VideoGeneratorApp:
         self.sequential_mode_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(config_frame, text="Modo sequencial", variable=self.sequential_mode_var, command=self.on_toggle_sequential_mode).grid(row=1, column=5, sticky=tk.W, pady=5)
         
+        # Hedge: duplica submissões que passam do percentil de latência observado
+        self.hedge_var = tk.BooleanVar(value=self.batch_config.hedge_enabled)
+        ttk.Checkbutton(config_frame, text="Hedge (lentos)", variable=self.hedge_var).grid(row=0, column=6, sticky=tk.W, padx=(20, 0), pady=5)
+        
+        # Roteamento multi-provedor: usa também os provedores com credenciais em config.PROVIDER_CREDENTIALS
+        self.multi_provider_var = tk.BooleanVar(value=self.batch_config.multi_provider)
+        ttk.Checkbutton(config_frame, text="Multi-provedor", variable=self.multi_provider_var).grid(row=1, column=6, sticky=tk.W, padx=(20, 0), pady=5)
+        
+        # Callback: o webhook Veta responde na hora e devolve o vídeo no receptor local
+        self.callback_var = tk.BooleanVar(value=self.batch_config.callback_enabled)
+        ttk.Checkbutton(config_frame, text="Callback (Veta)", variable=self.callback_var).grid(row=0, column=7, sticky=tk.W, padx=(20, 0), pady=5)
+        
+        # Envio em bloco: até BULK_MAX_ITEMS prompts Veta por requisição ao webhook
+        self.bulk_var = tk.BooleanVar(value=self.batch_config.bulk_enabled)
+        ttk.Checkbutton(config_frame, text="Envio em bloco (Veta)", variable=self.bulk_var).grid(row=1, column=7, sticky=tk.W, padx=(20, 0), pady=5)
+        
+        # Fan-out multi-idioma: idiomas extras gerados na mesma requisição do prompt (webhook devolve "videos" por idioma)
+        ttk.Label(config_frame, text="Idiomas extras (fan-out):").grid(row=4, column=0, sticky=tk.W, pady=5)
+        fanout_frame = ttk.Frame(config_frame)
+        fanout_frame.grid(row=4, column=1, columnspan=6, sticky=tk.W, pady=5)
+        self.fanout_language_vars = {}
+        for lang in getattr(config, 'SUPPORTED_LANGUAGES', ["pt", "en", "es", "fr", "de", "it"]):
+            self.fanout_language_vars[lang] = tk.BooleanVar(value=False)
+            ttk.Checkbutton(fanout_frame, text=lang, variable=self.fanout_language_vars[lang]).pack(side=tk.LEFT, padx=(0, 8))
+        
         # Imagem de referência para 9:16 (aplicada a todos os prompts)
         ttk.Label(config_frame, text="Imagem referência (9:16):").grid(row=2, column=0, sticky=tk.W, pady=5)
         self.batch_ref_image_path = tk.StringVar(value="")
@@ -781,303 +1151,53 @@ class VideoGeneratorApp:
     def send_request(self, data):
         thread_name = threading.current_thread().name
         self.log(f"📡 [{thread_name}] Iniciando envio de requisição...")
+        # Operações longas concluem no rastreador; a UI é liberada por on_individual_operation_done
+        deferred = False
         
         try:
             provider = self.provider_var.get() if hasattr(self, 'provider_var') else 'Veta'
             self.log(f"🏷️ [{thread_name}] Provedor: {provider}")
 
-            if provider == "Gemini":
-                # Chamada direta à Gemini API (Veo 3 - Long Running Operation)
-                api_key = self.api_key_entry.get().strip()
-                if not api_key:
-                    self.log(f"⚠️ [{thread_name}] Gemini API Key não informada", "WARNING")
-                    self.update_status("Informe sua Gemini API Key para continuar")
-                    return
-                prompt_text = data.get("script", {}).get("input", "").strip()
-                if not prompt_text:
-                    self.update_status("Prompt vazio. Nada para enviar.")
-                    return
-                headers = {
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                    "x-goog-api-key": api_key,
-                }
-                start_endpoint = "https://generativelanguage.googleapis.com/v1beta/models/veo-3.0-generate-001:predictLongRunning"
-                payload = {
-                    "instances": [
-                        {"prompt": prompt_text}
-                    ]
-                }
-                self.log(f"📤 [{thread_name}] Iniciando operação Veo 3 (predictLongRunning)...")
-                self.log(f"🔗 URL: {start_endpoint}")
-                self.log(f"📦 Payload size: {len(json.dumps(payload))} bytes")
-                start_time = time.time()
-                start_resp = requests.post(start_endpoint, headers=headers, data=json.dumps(payload), timeout=config.REQUEST_TIMEOUT)
-                elapsed = time.time() - start_time
-                self.log(f"⏱️ [{thread_name}] Requisição de início concluída em {elapsed:.2f}s")
-                if start_resp.status_code not in (200, 201):
-                    self.log(f"❌ [{thread_name}] Erro ao iniciar operação: {start_resp.status_code} - {start_resp.text[:300]}", "ERROR")
-                    self.update_status("Falha ao iniciar geração de vídeo na Gemini API")
-                    return
-                op = start_resp.json()
-                op_name = op.get("name") or op.get("operation")
-                if not op_name:
-                    self.log(f"❌ [{thread_name}] Resposta sem nome de operação: {op}", "ERROR")
-                    self.update_status("Resposta inválida da Gemini API (sem operação)")
-                    return
-                self.log(f"🆔 [{thread_name}] Operação: {op_name}")
-                poll_url = op_name
-                if not poll_url.startswith("http"):
-                    poll_url = f"https://generativelanguage.googleapis.com/v1beta/{op_name.lstrip('/')}"
-                self.update_status("Aguardando geração do vídeo (Gemini)...")
-                while True:
-                    time.sleep(8)
-                    self.log(f"🔄 [{thread_name}] Polling operação...")
-                    poll_resp = requests.get(poll_url, headers={"Accept": "application/json", "x-goog-api-key": api_key}, timeout=config.REQUEST_TIMEOUT)
-                    if poll_resp.status_code != 200:
-                        self.log(f"⚠️ [{thread_name}] Falha no polling: {poll_resp.status_code} - {poll_resp.text[:200]}", "WARNING")
-                        continue
-                    op_state = poll_resp.json()
-                    if op_state.get("done") is True:
-                        self.log(f"✅ [{thread_name}] Operação concluída")
-                        if op_state.get("error"):
-                            self.log(f"❌ [{thread_name}] Erro na operação: {op_state.get('error')}", "ERROR")
-                            self.update_status("A geração falhou na Gemini API")
-                            return
-                        resp = op_state.get("response") or {}
-                        video_uri = None
-                        try:
-                            gen = resp.get("generated_videos") or []
-                            if gen:
-                                vid_obj = gen[0].get("video") or {}
-                                video_uri = vid_obj.get("uri") or vid_obj.get("videoUri")
-                                if not video_uri and isinstance(vid_obj, dict):
-                                    inner = vid_obj.get("video") or {}
-                                    if isinstance(inner, dict):
-                                        video_uri = inner.get("uri") or inner.get("videoUri")
-                        except Exception:
-                            video_uri = None
-                        if not video_uri:
-                            self.log(f"❓ [{thread_name}] Não foi possível extrair a URI do vídeo: {json.dumps(op_state)[:400]}", "WARNING")
-                            self.update_status("Geração concluída, mas não encontrei a URI do vídeo")
-                            return
-                        self.log(f"🎯 [{thread_name}] URI do vídeo obtida: {video_uri}")
-                        self.video_url = video_uri
-                        self.update_video_info(self.video_url)
-                        self.update_status("Vídeo gerado com sucesso (Gemini)!")
-                        return
-                    else:
-                        self.update_status("Processando vídeo na Gemini API... (aguarde)")
-            elif provider == "WAN":
-                # Integração com Wan (DashScope) - criação de tarefa e polling
+            if provider in LRO_PROVIDERS:
+                # Gemini (Veo 3) e WAN (DashScope): apenas submete a operação; o polling
+                # fica com o rastreador compartilhado e esta thread termina logo após
                 api_key = self.api_key_entry.get().strip()
                 if not api_key:
-                    self.log(f"⚠️ [{thread_name}] WAN API Key não informada", "WARNING")
-                    self.update_status("Informe sua WAN (DashScope) API Key para continuar")
+                    label = "Gemini API Key" if provider == "Gemini" else "WAN (DashScope) API Key"
+                    self.log(f"⚠️ [{thread_name}] {label} não informada", "WARNING")
+                    self.update_status(f"Informe sua {label} para continuar")
                     return
                 prompt_text = data.get("script", {}).get("input", "").strip()
                 if not prompt_text:
                     self.update_status("Prompt vazio. Nada para enviar.")
                     return
-
-                headers = dict(config.WAN_HEADERS_BASE)
-                headers["Authorization"] = f"Bearer {api_key}"
-
-                # Monta payload mínimo de T2V (sem imagem de referência local)
-                create_payload = {
-                    "model": config.WAN_DEFAULT_T2V_MODEL,
-                    "input": {
-                        "prompt": prompt_text
-                    }
-                }
-                # Dica: para acelerar/diagnosticar, você pode ativar parâmetros leves
-                # create_payload["parameters"] = {"size": "832*480", "duration": 5}
-
-                # Logs detalhados do modelo e parâmetros
-                self.log(f"🧩 [{thread_name}] WAN modelo: {create_payload.get('model')}")
-                self.log(f"📝 [{thread_name}] Prompt (chars): {len(prompt_text)}")
-                if 'parameters' in create_payload:
-                    self.log(f"⚙️ [{thread_name}] Parameters: {create_payload['parameters']}")
-                else:
-                    self.log(f"⚙️ [{thread_name}] Parameters: (não definidos; usando defaults do modelo)")
-
-                self.log(f"📤 [{thread_name}] Criando tarefa no WAN (video-synthesis)...")
-                self.log(f"🔗 URL: {config.WAN_VIDEO_CREATE_URL}")
-                self.log(f"📦 Payload size: {len(json.dumps(create_payload))} bytes")
-                start_time = time.time()
-                create_resp = requests.post(
-                    config.WAN_VIDEO_CREATE_URL,
-                    headers=headers,
-                    data=json.dumps(create_payload),
-                    timeout=config.REQUEST_TIMEOUT
-                )
-                elapsed = time.time() - start_time
-                self.log(f"⏱️ [{thread_name}] Criação da tarefa concluída em {elapsed:.2f}s")
-                if create_resp.status_code not in (200, 201, 202):
-                    self.log(f"❌ [{thread_name}] Erro ao criar tarefa WAN: {create_resp.status_code} - {create_resp.text[:300]}", "ERROR")
-                    self.update_status("Falha ao iniciar geração de vídeo na WAN (DashScope)")
+                breaker = self.circuit_breakers.get(self.get_submit_endpoint(provider, None))
+                if not breaker.allow_request():
+                    self.log(f"🔌 [{thread_name}] Circuito aberto para {provider}", "WARNING")
+                    self.update_status(f"{provider} indisponível no momento. Tente novamente em {breaker.retry_in():.0f}s")
                     return
-
-                try:
-                    create_json = create_resp.json()
-                except Exception:
-                    create_json = {}
-                # Debug da resposta de criação
                 try:
-                    preview = create_resp.text[:300]
-                except Exception:
-                    preview = "<sem preview>"
-                self.log(f"🧪 [{thread_name}] Debug criação (preview): {preview}")
-                self.log(f"🧪 [{thread_name}] Keys criação topo: {list(create_json.keys())}")
-                out_create = (create_json.get("output") or {})
-                if isinstance(out_create, dict):
-                    self.log(f"🧪 [{thread_name}] Keys criação output: {list(out_create.keys())}")
-                task_id = (
-                    (create_json.get("output") or {}).get("task_id")
-                    or create_json.get("task_id")
-                    or create_json.get("id")
-                )
-                if not task_id:
-                    self.log(f"❓ [{thread_name}] Não foi possível obter task_id: {create_resp.text[:400]}", "WARNING")
-                    self.update_status("Tarefa iniciada mas task_id não encontrado")
-                    return
-
-                self.log(f"🆔 [{thread_name}] task_id: {task_id}")
-                poll_url = config.WAN_TASK_QUERY_URL.format(task_id=task_id)
-                self.log(f"🔎 [{thread_name}] Poll URL: {poll_url}")
-                self.update_status("Aguardando geração do vídeo (WAN)...")
-
-                # Controle de tempo e backoff para o polling
-                gen_start = time.time()
-                poll_interval = 8  # segundos
-                warned_timeout = False
-
-                # Polling até completar
-                while True:
-                    time.sleep(poll_interval)
-                    self.log(f"🔄 [{thread_name}] Polling tarefa WAN...")
-                    poll_resp = requests.get(poll_url, headers=headers, timeout=config.REQUEST_TIMEOUT)
-                    if poll_resp.status_code not in (200, 201):
-                        self.log(f"⚠️ [{thread_name}] Falha no polling: {poll_resp.status_code} - {poll_resp.text[:200]}", "WARNING")
-                        continue
-                    try:
-                        state = poll_resp.json()
-                    except Exception as pe:
-                        self.log(f"⚠️ [{thread_name}] Polling JSON inválido: {pe}", "WARNING")
-                        continue
-
-                    # Debug do polling
-                    try:
-                        poll_preview = poll_resp.text[:400]
-                    except Exception:
-                        poll_preview = "<sem preview>"
-                    self.log(f"🧪 [{thread_name}] Debug polling (preview): {poll_preview}")
-                    self.log(f"🧪 [{thread_name}] Keys polling topo: {list(state.keys())}")
-                    out = state.get("output") or {}
-                    if isinstance(out, dict):
-                        self.log(f"🧪 [{thread_name}] Keys polling output: {list(out.keys())}")
-                    code = state.get("code") or out.get("code")
-                    message = state.get("message") or out.get("message")
-                    if code or message:
-                        self.log(f"🧪 [{thread_name}] code={code} message={message}")
-
-                    # Logs de status/progresso para confirmar geração
-                    out = state.get("output") or {}
-                    raw_status = (
-                        out.get("status")
-                        or state.get("status")
-                        or out.get("task_status")
-                        or state.get("task_status")
-                        or out.get("phase")
-                        or state.get("phase")
-                    )
-                    progress = (
-                        out.get("progress")
-                        or out.get("percent")
-                        or out.get("progress_percent")
-                        or out.get("progress_in_percent")
-                        or out.get("task_progress")
-                        or out.get("stage")
-                    )
-                    self.log(f"📊 [{thread_name}] Status WAN: {raw_status}")
-                    if progress:
-                        self.log(f"⏳ [{thread_name}] Progresso WAN: {progress}")
-                    else:
-                        self.log(f"⏳ [{thread_name}] Progresso WAN: (não informado)")
-
-                    # Se nenhum status, exibir resumo do estado para diagnóstico
-                    if raw_status is None:
-                        try:
-                            compact = json.dumps(state)[:500]
-                        except Exception:
-                            compact = str(state)[:500]
-                        self.log(f"🧪 [{thread_name}] Status ausente, estado compacto: {compact}")
-
-                    # Timeout/backoff: alerta após THREAD_TIMEOUT e corte duro após WAN_MAX_WAIT_SECONDS (default 30 min)
-                    elapsed_total = time.time() - gen_start
-                    if (not warned_timeout) and elapsed_total > getattr(config, "THREAD_TIMEOUT", 600):
-                        self.log(f"⏰ [{thread_name}] 10+ minutos de processamento. Mantendo tarefa, mas ampliando intervalo de polling para 15s para reduzir carga.")
-                        warned_timeout = True
-                        poll_interval = 15
-                    if elapsed_total > getattr(config, "WAN_MAX_WAIT_SECONDS", 1800):
-                        self.log(f"🛑 [{thread_name}] Tempo máximo de espera atingido ({int(elapsed_total)}s). Interrompendo polling desta tarefa.", "ERROR")
-                        self.update_status("Tempo esgotado na geração (WAN). Tente novamente mais tarde ou ajuste parâmetros (ex.: size=832*480, duration=5s).")
-                        return
-
-                    # Tenta extrair status e url do vídeo de forma resiliente
-                    status = (
-                        (state.get("output") or {}).get("status")
-                        or state.get("status")
-                        or (state.get("output") or {}).get("task_status")
-                        or state.get("task_status")
-                        or (state.get("output") or {}).get("phase")
-                        or state.get("phase")
+                    handle = self._start_lro_operation(provider, api_key, prompt_text, None, thread_name)
+                except ProviderError:
+                    handle = None
+                if not handle:
+                    self.update_status(
+                        "Falha ao iniciar geração de vídeo na Gemini API" if provider == "Gemini"
+                        else "Falha ao iniciar geração de vídeo na WAN (DashScope)"
                     )
-                    if status and str(status).lower() in ("succeeded", "success", "completed", "done", "finished"):
-                        # Buscar URL do vídeo
-                        video_url = None
-                        try:
-                            out = state.get("output") or {}
-                            video_url = (
-                                out.get("video_url") or out.get("url") or out.get("result_url")
-                                or out.get("video") or out.get("result")
-                            )
-                            if not isinstance(video_url, str):
-                                video_url = None
-                                def find_url(obj):
-                                    if isinstance(obj, str) and obj.startswith("http"):
-                                        return obj
-                                    if isinstance(obj, dict):
-                                        for v in obj.values():
-                                            u = find_url(v)
-                                            if u:
-                                                return u
-                                    if isinstance(obj, list):
-                                        for v in obj:
-                                            u = find_url(v)
-                                            if u:
-                                                return u
-                                    return None
-                                video_url = find_url(out)
-                        except Exception:
-                            video_url = None
-
-                        if not video_url:
-                            self.log(f"❓ [{thread_name}] Tarefa concluída, mas não encontrei URL do vídeo: {json.dumps(state)[:400]}", "WARNING")
-                            self.update_status("Geração concluída no WAN, mas URL do vídeo não encontrada")
-                            return
-
-                        self.log(f"🎯 [{thread_name}] URL do vídeo (WAN): {video_url}")
-                        self.video_url = video_url
-                        self.update_video_info(video_url)
-                        self.update_status("Vídeo gerado com sucesso (WAN)!")
-                        return
-                    elif status and str(status).lower() in ("failed", "error", "canceled"):
-                        self.log(f"❌ [{thread_name}] Tarefa falhou no WAN: {json.dumps(state)[:300]}", "ERROR")
-                        self.update_status("A geração falhou no WAN (DashScope)")
-                        return
-                    else:
-                        self.update_status("Processando vídeo no WAN (DashScope)... (aguarde)")
+                    return
+                self.update_status(f"Aguardando geração do vídeo ({provider})...")
+                self.lro_tracker.track(PendingOperation(
+                    prompt_id="individual",
+                    provider=provider,
+                    handle=handle,
+                    poll_url=gemini_poll_url(handle) if provider == "Gemini" else wan_poll_url(handle),
+                    headers=gemini_headers(api_key) if provider == "Gemini" else wan_headers(api_key),
+                    on_done=lambda _pid, result, prov=provider: self.on_individual_operation_done(prov, result),
+                    profile=operation_profile(provider)
+                ))
+                deferred = True
+                return
             else:
                 headers = dict(config.DEFAULT_HEADERS)
                 # Selecionar endpoint conforme formato 16:9 ou 9:16
@@ -1095,24 +1215,7 @@ class VideoGeneratorApp:
                     ref_path = self.batch_ref_image_path.get() if hasattr(self, 'batch_ref_image_path') else ""
                     if ref_path:
                         try:
-                            with open(ref_path, 'rb') as f:
-                                b64_data = base64.b64encode(f.read()).decode('utf-8')
-                            ext = os.path.splitext(ref_path)[1].lower()
-                            if ext == '.png':
-                                mime = 'image/png'
-                            elif ext in ('.jpg', '.jpeg'):
-                                mime = 'image/jpeg'
-                            elif ext == '.webp':
-                                mime = 'image/webp'
-                            elif ext == '.bmp':
-                                mime = 'image/bmp'
-                            else:
-                                mime = 'application/octet-stream'
-                            webhook_data["images"] = [{
-                                "name": os.path.basename(ref_path),
-                                "type": mime,
-                                "data": b64_data
-                            }]
+                            webhook_data["images"] = [self.build_image_attachment(ref_path, '9:16')]
                             self.log(f"🖼️ [{thread_name}] Incluindo imagem de referência no payload (individual 9:16)")
                         except Exception as e:
                             self.log(f"⚠️ [{thread_name}] Falha ao ler imagem de referência (individual 9:16): {e}", "WARNING")
@@ -1128,32 +1231,22 @@ class VideoGeneratorApp:
                     ref_path = self.batch_ref_image_path.get() if hasattr(self, 'batch_ref_image_path') else ""
                     if ref_path:
                         try:
-                            with open(ref_path, 'rb') as f:
-                                b64_data = base64.b64encode(f.read()).decode('utf-8')
-                            ext = os.path.splitext(ref_path)[1].lower()
-                            if ext == '.png':
-                                mime = 'image/png'
-                            elif ext in ('.jpg', '.jpeg'):
-                                mime = 'image/jpeg'
-                            elif ext == '.webp':
-                                mime = 'image/webp'
-                            elif ext == '.bmp':
-                                mime = 'image/bmp'
-                            else:
-                                mime = 'application/octet-stream'
-                            webhook_data["images"] = [{
-                                "name": os.path.basename(ref_path),
-                                "type": mime,
-                                "data": b64_data
-                            }]
+                            webhook_data["images"] = [self.build_image_attachment(ref_path, '16:9')]
                             self.log(f"🖼️ [{thread_name}] Incluindo imagem de referência no payload (individual 16:9)")
                         except Exception as e:
                             self.log(f"⚠️ [{thread_name}] Falha ao ler imagem de referência (individual 16:9): {e}", "WARNING")
             
+            # Mesma chave em todas as tentativas: o webhook deduplica reenvios desta geração
+            idem_key = f"individual-{uuid.uuid4().hex[:12]}"
+            headers['Idempotency-Key'] = idem_key
+            webhook_data['idempotency_key'] = idem_key
+            # Serializado uma vez e reenviado igual nos retries
+            body = encode_body(webhook_data)
+            
             # Log detalhado da requisição
             self.log(f"📤 [{thread_name}] Preparando POST para webhook...")
             self.log(f"🔗 URL: {endpoint}")
-            self.log(f"📦 Payload size: {len(json.dumps(webhook_data))} bytes")
+            self.log(f"📦 Payload size: {len(body)} bytes")
             self.log(f"🌐 Language: {webhook_data.get('languages', ['unknown'])}")
             if provider != "Gemini":
                 self.log(f"📐 [{thread_name}] Formato: {'9:16 (REELS)' if use_reels else '16:9'}")
@@ -1163,71 +1256,84 @@ class VideoGeneratorApp:
             start_time = time.time()
             
             max_attempts = getattr(config, 'CONNECTION_RETRIES', 3)
-            delay = getattr(config, 'RETRY_DELAY', 2.0)
+            delay = 0.0
             response = None
+            breaker = self.circuit_breakers.get(endpoint)
+            self.retry_policy.on_request()
             for attempt in range(1, max_attempts + 1):
+                if attempt > 1:
+                    if not self.retry_policy.allow_retry():
+                        self.log(f"🪫 [{thread_name}] Orçamento global de retries esgotado; sem nova tentativa", "WARNING")
+                        break
+                    self.log(f"⏳ [{thread_name}] Aguardando {delay:.1f}s para retry...")
+                    time.sleep(delay)
+                if not breaker.allow_request():
+                    self.log(f"🔌 [{thread_name}] Circuito aberto para o webhook", "WARNING")
+                    self.update_status(f"Webhook indisponível no momento. Tente novamente em {breaker.retry_in():.0f}s")
+                    return
                 try:
                     self.log(f"🔄 [{thread_name}] Tentativa {attempt}/{max_attempts} de POST para webhook (Veta)")
-                    response = requests.post(
-                        endpoint,
-                        headers=headers,
-                        data=json.dumps(webhook_data),
-                        timeout=config.REQUEST_TIMEOUT
-                    )
+                    response = self.post_json(endpoint, headers, body)
                     if response.status_code >= 500:
-                        self.log(f"⚠️ [{thread_name}] Webhook retornou {response.status_code}. Nova tentativa em {delay}s...", "WARNING")
-                        if attempt < max_attempts:
-                            time.sleep(delay)
-                            continue
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    if RetryPolicy.is_retryable_status(response.status_code) and attempt < max_attempts:
+                        delay = self.retry_policy.backoff(delay, parse_retry_after(response.headers.get('Retry-After')))
+                        self.log(f"⚠️ [{thread_name}] Webhook retornou {response.status_code}. Nova tentativa em {delay:.1f}s...", "WARNING")
+                        # Resposta descartada: sem retry (orçamento esgotado) cai em "Falha ao contatar webhook"
+                        response.close()
+                        response = None
+                        continue
                     break
                 except Exception as e:
+                    if isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+                        breaker.record_failure(timeout=True)
                     self.log(f"⚠️ [{thread_name}] Erro ao enviar requisição: {e}", "ERROR")
                     if attempt < max_attempts:
-                        self.log(f"⏳ [{thread_name}] Aguardando {delay}s para retry...")
-                        time.sleep(delay)
+                        delay = self.retry_policy.backoff(delay)
                     else:
                         self.update_status("Falha ao contatar webhook após múltiplas tentativas")
                         self.after_request_complete()
                         return
+            if response is None:
+                self.update_status("Falha ao contatar webhook após múltiplas tentativas")
+                return
             
             request_time = time.time() - start_time
             self.log(f"⏱️ [{thread_name}] Requisição completada em {request_time:.2f}s")
             
-            # Verificar a resposta
-            self.log(f"📨 [{thread_name}] Status: {response.status_code}, Size: {len(response.content)} bytes")
+            # Verificar a resposta (corpo em streaming: só o primeiro bloco é lido aqui)
+            self.log(f"📨 [{thread_name}] Status: {response.status_code}, Content-Length: {response.headers.get('Content-Length', 'chunked')}")
             
             if response.status_code == 200 or response.status_code == 201:
                 self.log(f"✅ [{thread_name}] Requisição bem-sucedida!")
                 self.update_status("Requisição enviada com sucesso para o webhook!")
                 
-                # Verificar se a resposta contém dados binários
                 try:
-                    # Tentar decodificar como texto
-                    response_text = response.text
-                    self.log(f"📄 [{thread_name}] Analisando resposta de texto...")
+                    # Identificar o corpo pelo primeiro bloco (magic bytes + Content-Type)
+                    response_body = ResponseBody(response)
+                    self.log(f"📄 [{thread_name}] Analisando resposta ({response_body.kind})...")
                     
-                    # Verificar se contém caracteres não imprimíveis (dados binários)
-                    if any(ord(char) < 32 and char not in '\n\r\t' for char in response_text[:100]):
+                    if response_body.is_binary:
                         self.log(f"🎬 [{thread_name}] Resposta contém dados binários - possível arquivo de vídeo")
+                        self.log(f"📋 [{thread_name}] Content-Type: {response_body.content_type.lower()} (assinatura: {video_mime(response_body.head)})")
                         
-                        # Verificar headers para tipo de conteúdo
-                        content_type = response.headers.get('content-type', '').lower()
-                        self.log(f"📋 [{thread_name}] Content-Type: {content_type}")
-                        
-                        if 'video' in content_type or 'application/octet-stream' in content_type:
-                            # É um arquivo de vídeo - salvar diretamente
+                        if response_body.kind == "video" or 'application/octet-stream' in response_body.content_type.lower():
+                            # É um arquivo de vídeo - gravar em disco em blocos
                             self.log(f"💾 [{thread_name}] Salvando vídeo binário...")
-                            self.save_video_from_response(response)
+                            self.save_video_from_response(response_body)
                         else:
                             self.log(f"❓ [{thread_name}] Formato binário não reconhecido", "WARNING")
                             self.update_status("Resposta em formato binário não reconhecido")
                     else:
-                        # Resposta é texto - processar normalmente
-                        self.log(f"📝 [{thread_name}] Processando resposta de texto: {len(response_text)} chars")
+                        # Resposta é texto (JSON ou link): pequena, lida inteira
+                        raw = response_body.read_bytes(getattr(config, 'RESPONSE_MAX_TEXT_BYTES', 2 * 1024 * 1024))
+                        self.log(f"📝 [{thread_name}] Processando resposta de texto: {len(raw)} bytes")
                         
                         # Processar resposta do webhook
                         try:
-                            response_data = response.json()
+                            response_data = json_codec.loads(raw)
                             video_url = response_data.get('video_url') or response_data.get('url') or response_data.get('link')
                             
                             if video_url:
@@ -1239,9 +1345,10 @@ class VideoGeneratorApp:
                                 self.log(f"⏳ [{thread_name}] URL não encontrada, vídeo em processamento")
                                 self.update_status("Vídeo enviado para processamento. Aguarde o retorno.")
                                 
-                        except json.JSONDecodeError:
+                        except json_codec.JSONDecodeError:
                             self.log(f"🔍 [{thread_name}] Não é JSON, verificando se é link direto...")
                             # Se não for JSON, pode ser um link direto
+                            response_text = raw.decode('utf-8', errors='replace')
                             if response_text.startswith('http'):
                                 self.log(f"🔗 [{thread_name}] Link direto encontrado")
                                 self.video_url = response_text.strip()
@@ -1254,9 +1361,11 @@ class VideoGeneratorApp:
                 except Exception as e:
                     self.log(f"❌ [{thread_name}] Erro ao processar resposta: {str(e)}", "ERROR")
                     self.update_status("Erro ao processar resposta do servidor")
+                finally:
+                    response.close()
                         
             else:
-                error_msg = f"Erro na requisição: {response.status_code} - {response.text[:200]}..."
+                error_msg = f"Erro na requisição: {response.status_code} - {read_preview(response)}..."
                 self.log(f"❌ [{thread_name}] {error_msg}", "ERROR")
                 self.update_status(error_msg)
                 
@@ -1274,7 +1383,63 @@ class VideoGeneratorApp:
             self.update_status(error_msg)
         finally:
             # Reabilitar botão e parar progress
-            self.log(f"🔄 [{thread_name}] Finalizando requisição...")
+            if not deferred:
+                self.log(f"🔄 [{thread_name}] Finalizando requisição...")
+                self.after_request_complete()
+    
+    def _start_lro_operation(self, provider, api_key, prompt_text, aspect, thread_name):
+        """Cria a operação no Gemini (predictLongRunning) ou a tarefa no WAN (video-synthesis).
+        Retorna o nome da operação/task_id; em caso de falha (já logada) propaga ProviderError."""
+        if provider == "Gemini":
+            payload = build_gemini_payload(prompt_text, aspect)
+            self.log(f"📤 [{thread_name}] Iniciando operação Veo 3 (predictLongRunning)...")
+            self.log(f"🔗 URL: {config.GEMINI_VEO_START_URL}")
+        else:
+            payload = build_wan_payload(prompt_text, aspect)
+            self.log(f"🧩 [{thread_name}] WAN modelo: {payload.get('model')}")
+            self.log(f"📝 [{thread_name}] Prompt (chars): {len(prompt_text)}")
+            if 'parameters' in payload:
+                self.log(f"⚙️ [{thread_name}] Parameters: {payload['parameters']}")
+            else:
+                self.log(f"⚙️ [{thread_name}] Parameters: (não definidos; usando defaults do modelo)")
+            self.log(f"📤 [{thread_name}] Criando tarefa no WAN (video-synthesis)...")
+            self.log(f"🔗 URL: {config.WAN_VIDEO_CREATE_URL}")
+        # Serializado uma vez: o mesmo corpo mede o log e vai para a requisição
+        payload = json_codec.dumps(payload)
+        self.log(f"📦 Payload size: {len(payload)} bytes")
+        start_time = time.time()
+        breaker = self.circuit_breakers.get(self.get_submit_endpoint(provider, aspect))
+        try:
+            if provider == "Gemini":
+                handle = gemini_start_operation(self.http_pool, api_key, payload)
+            else:
+                handle = wan_create_task(self.http_pool, api_key, payload)
+        except ProviderError as e:
+            # Sem status = timeout/erro de conexão; 4xx indica endpoint no ar (erro do pedido)
+            if e.status_code is None or e.status_code >= 500:
+                breaker.record_failure(timeout=e.status_code is None)
+            else:
+                breaker.record_success()
+            self.log(f"❌ [{thread_name}] Erro ao iniciar operação {provider}: {e}", "ERROR")
+            raise
+        breaker.record_success()
+        self.log(f"⏱️ [{thread_name}] Criação concluída em {time.time() - start_time:.2f}s")
+        self.log(f"🆔 [{thread_name}] {'Operação' if provider == 'Gemini' else 'task_id'}: {handle}")
+        return handle
+    
+    def on_individual_operation_done(self, provider, result):
+        """Conclusão (rastreador LRO) de uma geração individual Gemini/WAN"""
+        try:
+            if result.get('success'):
+                video_url = result['video_url']
+                self.log(f"🎯 URL do vídeo ({provider}): {video_url}")
+                self.video_url = video_url
+                self.update_video_info(video_url)
+                self.update_status(f"Vídeo gerado com sucesso ({provider})!")
+            else:
+                self.log(f"❌ Geração individual falhou no {provider}: {result.get('error')}", "ERROR")
+                self.update_status(f"A geração falhou no {provider}")
+        finally:
             self.after_request_complete()
     
     def after_request_complete(self):
@@ -1385,7 +1550,7 @@ class VideoGeneratorApp:
             except Exception:
                 pass
 
-            response = requests.get(url, stream=True, headers=headers if headers else None)
+            response = self.http_pool.get(url, stream=True, headers=headers if headers else None)
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
@@ -1418,8 +1583,8 @@ class VideoGeneratorApp:
                  messagebox.showerror("Erro", f"Erro ao baixar vídeo: {str(e)}")
              ])
     
-    def save_video_from_response(self, response):
-        """Salva vídeo diretamente da resposta binária"""
+    def save_video_from_response(self, body):
+        """Salva o vídeo da resposta binária (ResponseBody) gravando em blocos"""
         try:
             # Escolher local para salvar
             file_path = filedialog.asksaveasfilename(
@@ -1432,8 +1597,7 @@ class VideoGeneratorApp:
                 self.update_status("Salvando vídeo...")
                 
                 # Salvar arquivo
-                with open(file_path, 'wb') as file:
-                    file.write(response.content)
+                body.save_to(file_path)
                 
                 # Definir como vídeo local
                 self.video_url = f"file:///{file_path.replace(chr(92), '/')}"
@@ -1455,6 +1619,8 @@ class VideoGeneratorApp:
         new_count = self.threads_var.get()
         self.thread_pool.update_max_threads(new_count)
         self.batch_config.max_threads = new_count
+        # Pools HTTP acompanham o limite efetivo de threads
+        self.http_pool.resize(self.thread_pool.max_threads)
         # Se estivermos processando, tentar despachar mais imediatamente
         if getattr(self, 'batch_processing', False):
             try:
@@ -1485,10 +1651,250 @@ class VideoGeneratorApp:
             if hasattr(self, 'batch_delay_var'):
                 self.batch_delay_var.set(delay)
             self.batch_config.request_delay = delay
+            if getattr(self, 'batch_processing', False):
+                self.apply_request_delay_limit()
             self.log(f"⏳ Delay entre gerações ajustado para {delay:.2f}s")
         except Exception as e:
             self.log(f"Erro ao atualizar delay: {e}", "ERROR")
     
+    def configure_endpoint_pools(self):
+        """Aplica o intervalo mínimo de cada pool de endpoint (config.ENDPOINT_POOLS) no limitador de taxa"""
+        for endpoint, pool in getattr(config, 'ENDPOINT_POOLS', {}).items():
+            interval = float(pool.get('min_interval') or 0.0)
+            if endpoint and interval > 0:
+                self.rate_limiter.configure(endpoint, 1.0 / interval, 1)
+    
+    def get_endpoint_limit(self, endpoint):
+        """Prompts simultâneos permitidos no pool do endpoint (None = sem pool próprio)"""
+        pool = getattr(config, 'ENDPOINT_POOLS', {}).get(endpoint)
+        return pool.get('max_concurrent') if pool else None
+    
+    def get_prompt_aspect(self, prompt_item):
+        """Formato do prompt: o próprio (JSON) ou o padrão do lote"""
+        return getattr(prompt_item, 'aspect', None) or getattr(self, 'batch_aspect_choice', '16:9')
+    
+    def get_prompt_endpoint(self, prompt_item, provider=None):
+        """Endpoint de submissão do prompt: o próprio (Veta, via JSON) ou o do provedor/formato"""
+        provider = provider or prompt_item.provider or getattr(self, 'batch_provider', 'Veta')
+        if provider == "Veta" and getattr(prompt_item, 'endpoint', None):
+            return prompt_item.endpoint
+        return self.get_submit_endpoint(provider, self.get_prompt_aspect(prompt_item))
+    
+    def get_provider_urls(self, provider):
+        """URLs de submissão e consulta usadas por um provedor"""
+        return {
+            "Veta": [config.WEBHOOK_URL, config.REELS_WEBHOOK_URL],
+            "Gemini": [config.GEMINI_API_BASE],
+            "WAN": [config.WAN_VIDEO_CREATE_URL, config.WAN_TASK_QUERY_URL],
+        }.get(provider, [])
+    
+    @staticmethod
+    def format_warmup(st):
+        """Resumo dos tempos de aquecimento de um host (ms)"""
+        if st['error'] and not st['opened']:
+            return f"falhou ({st['error'][:60]})"
+        parts = [f"DNS {st['dns'] * 1000:.0f}ms"]
+        if st['tcp'] is not None:
+            parts.append(f"TCP {st['tcp'] * 1000:.0f}ms")
+        if st['tls'] is not None:
+            parts.append(f"TLS {st['tls'] * 1000:.0f}ms")
+        return f"{', '.join(parts)} ({st['opened']} conexões)"
+    
+    def prewarm_connections(self, providers, extra_urls=(), on_done=None, connections=None):
+        """Resolve DNS e abre as conexões dos hosts dos provedores em segundo plano
+        (connections por host, limitado ao tamanho do pool; padrão: o pool inteiro).
+        on_done roda na thread da UI ao terminar (ou logo, com o aquecimento desativado)."""
+        hosts = {}
+        for provider in providers:
+            for url in self.get_provider_urls(provider):
+                if url:
+                    hosts.setdefault(SessionPool.host_key(url), url)
+        for url in extra_urls:
+            if url:
+                hosts.setdefault(SessionPool.host_key(url), url)
+        if not getattr(config, 'PREWARM_ENABLED', True) or not hosts:
+            if on_done:
+                on_done()
+            return
+        timeout = getattr(config, 'PREWARM_TIMEOUT', 5.0)
+        connections = min(connections or self.http_pool.max_connections, self.http_pool.max_connections)
+        
+        def warm():
+            start = time.time()
+            workers = [threading.Thread(target=self.http_pool.prewarm, args=(url, connections, timeout),
+                                        daemon=True, name=f"Prewarm-{urlparse(url).hostname}")
+                       for url in hosts.values()]
+            for worker in workers:
+                worker.start()
+            # Host lento no DNS não segura o lote além do limite
+            deadline = start + timeout * 2
+            for worker in workers:
+                worker.join(max(0.0, deadline - time.time()))
+            stats = self.http_pool.get_warmup_stats()
+            for host in hosts:
+                if host in stats:
+                    level = "WARNING" if stats[host]['error'] else "INFO"
+                    self.log(f"🔥 {urlparse(host).netloc}: {self.format_warmup(stats[host])}", level)
+            self.log(f"🔥 Aquecimento concluído em {time.time() - start:.2f}s ({len(hosts)} hosts)")
+            if on_done:
+                self.root.after(0, on_done)
+        
+        threading.Thread(target=warm, daemon=True, name="Prewarm").start()
+    
+    def configure_rate_limits(self):
+        """Registra os limites de taxa de config.RATE_LIMITS para os hosts de cada provedor"""
+        for provider, limit in getattr(config, 'RATE_LIMITS', {}).items():
+            for url in self.get_provider_urls(provider):
+                if url:
+                    self.rate_limiter.configure(SessionPool.host_key(url), limit.get("rate", 1.0), limit.get("burst", 1))
+        self.configure_endpoint_pools()
+    
+    def get_submit_endpoint(self, provider, aspect):
+        """URL de submissão de um provedor/formato"""
+        if provider == "Gemini":
+            return config.GEMINI_VEO_START_URL
+        if provider == "WAN":
+            return config.WAN_VIDEO_CREATE_URL
+        return config.REELS_WEBHOOK_URL if aspect == '9:16' else config.WEBHOOK_URL
+    
+    def get_batch_providers(self):
+        """Provedores do lote atual (mais de um no modo multi-provedor)"""
+        return getattr(self, 'batch_providers', None) or [getattr(self, 'batch_provider', 'Veta')]
+    
+    def get_configured_credentials(self, provider):
+        """Todas as credenciais conhecidas de um provedor: tela (se selecionado), PROVIDER_CREDENTIALS,
+        API_KEY_POOL e o arquivo API_KEYS_FILE. Veta exige api_key e token."""
+        candidates = []
+        if provider == getattr(self, 'batch_provider', None):
+            candidates.append({'api_key': getattr(self, 'batch_api_key', '') or self.api_key_entry.get().strip(),
+                               'token': getattr(self, 'batch_token', '') or self.token_entry.get().strip()})
+        candidates.append(getattr(config, 'PROVIDER_CREDENTIALS', {}).get(provider, {}))
+        candidates.extend(getattr(config, 'API_KEY_POOL', {}).get(provider, []))
+        keys_file = getattr(config, 'API_KEYS_FILE', None)
+        if keys_file and os.path.isfile(keys_file):
+            try:
+                candidates.extend(json_codec.load_file(keys_file).get(provider, []))
+            except Exception as e:
+                self.log(f"⚠️ Falha ao ler {keys_file}: {e}", "WARNING")
+        return [c for c in candidates
+                if c.get('api_key') and (provider != "Veta" or c.get('token'))]
+    
+    def get_provider_credentials(self, provider, prompt_id=None):
+        """Credenciais para chamadas fora do rodízio (ex.: download): a chave da operação do prompt,
+        senão a primeira do pool, senão as configuradas"""
+        lease = self.operation_leases.get(prompt_id) if prompt_id else None
+        if lease is not None:
+            return lease.credentials()
+        pooled = self.key_pool.credentials(provider)
+        if pooled:
+            return pooled
+        configured = self.get_configured_credentials(provider)
+        return configured[0] if configured else {'api_key': '', 'token': ''}
+    
+    def is_provider_available(self, provider, prompt_item=None):
+        """Circuito do endpoint permite envio e há chave de API com vaga (concorrência/taxa), fora de quarentena e com cota"""
+        if prompt_item is not None:
+            endpoint = self.get_prompt_endpoint(prompt_item, provider)
+        else:
+            endpoint = self.get_submit_endpoint(provider, getattr(self, 'batch_aspect_choice', '16:9'))
+        breaker = self.circuit_breakers.get(endpoint)
+        if not breaker.can_dispatch():
+            return False
+        return self.key_pool.has_capacity(provider, allow=lambda key_id: self.quota.has_budget(key_id, provider))
+    
+    def lease_key(self, provider, prefer=None, exclude=None):
+        """Empresta uma chave com vaga e cota, já consumindo a cota; None = o prompt aguarda na fila.
+        exclude: key_id que não pode ser usado (ex.: chave da requisição principal no hedge)"""
+        lease = self.key_pool.acquire(provider, prefer=prefer,
+                                      allow=lambda key_id: key_id != exclude and self.quota.has_budget(key_id, provider))
+        if lease is not None and not self.quota.reserve(lease.key_id, provider):
+            self.key_pool.release(lease)
+            return None
+        return lease
+    
+    def get_quota_resume_at(self):
+        """Horário projetado (time.time()) em que a cota volta a admitir prompts do lote;
+        None quando algum provedor do lote ainda tem orçamento"""
+        waits = []
+        for provider in self.get_batch_providers():
+            wait = self.quota.resume_in(self.key_pool.key_ids(provider), provider)
+            if wait is None or wait <= 0:
+                return None
+            waits.append(wait)
+        return time.time() + min(waits) if waits else None
+    
+    def hold_for_quota(self, lease, provider, retry_after, thread_name, prompt_id, start_time):
+        """429 do provedor: a chave fica suspensa (Retry-After) e o prompt aguarda na fila sem gastar tentativa"""
+        if retry_after:
+            self.quota.block(lease.key_id, provider, retry_after)
+        self.log(f"⏸️ [{thread_name}] Cota/limite da chave {lease.key_id} atingido (HTTP 429); prompt {prompt_id} aguarda na fila", "WARNING")
+        return {'success': False, 'held': True, 'error': 'Cota esgotada (HTTP 429)',
+                'processing_time': time.time() - start_time}
+    
+    def choose_provider(self, prompt_item):
+        """Provedor que receberia o prompt agora, sem alterar o PromptItem nem as estatísticas do roteador;
+        failover quando o atual está degradado. None quando nenhum provedor pode receber o prompt agora."""
+        if prompt_item.provider_pinned and prompt_item.provider:
+            # Provedor fixado na importação: sem credenciais o worker falha o prompt; senão aguarda vaga
+            provider = prompt_item.provider
+            if self.key_pool.size(provider) and not self.is_provider_available(provider, prompt_item):
+                return None
+            return provider
+        providers = self.get_batch_providers()
+        if len(providers) == 1:
+            return providers[0] if self.is_provider_available(providers[0], prompt_item) else None
+        return self.provider_router.choose(providers, available=lambda p: self.is_provider_available(p, prompt_item),
+                                           current=prompt_item.provider, record=False)
+    
+    def assign_provider(self, prompt_item, provider):
+        """Registra no PromptItem (e no roteador) o provedor de um prompt que vai ser enviado"""
+        previous = prompt_item.provider
+        if prompt_item.provider_pinned or len(self.get_batch_providers()) == 1:
+            prompt_item.provider = provider
+            return
+        self.provider_router.record_route(provider, previous)
+        if previous and provider != previous:
+            self.log(f"🔀 Failover: prompt {prompt_item.id} sai de {previous} para {provider}", "WARNING")
+            # Nova geração em outro provedor: a chave anterior pertence à tentativa do provedor antigo
+            prompt_item.idempotency_key = None
+        prompt_item.provider = provider
+    
+    def route_prompt(self, prompt_item):
+        """Escolhe e registra no PromptItem o provedor do prompt (None quando nenhum pode recebê-lo agora)"""
+        provider = self.choose_provider(prompt_item)
+        if provider is not None:
+            self.assign_provider(prompt_item, provider)
+        return provider
+    
+    def get_batch_submit_endpoint(self):
+        """URL de submissão usada pelo lote atual (provedor e formato capturados no início)"""
+        return self.get_submit_endpoint(getattr(self, 'batch_provider', 'Veta'), getattr(self, 'batch_aspect_choice', '16:9'))
+    
+    def on_circuit_state_change(self, endpoint, old_state, new_state):
+        """Loga transições do circuit breaker de um endpoint"""
+        if new_state == CircuitState.OPEN:
+            self.log(f"🔌 Circuito ABERTO para {endpoint}: envios suspensos por {getattr(config, 'CIRCUIT_OPEN_SECONDS', 60)}s", "WARNING")
+        elif new_state == CircuitState.HALF_OPEN:
+            self.log(f"🧪 Circuito meio-aberto para {endpoint}: liberando uma requisição de teste")
+        elif old_state != CircuitState.CLOSED:
+            self.log(f"✅ Circuito fechado para {endpoint}: endpoint recuperado")
+    
+    def apply_request_delay_limit(self):
+        """Converte o delay entre gerações em um token bucket (1 requisição a cada N s) no endpoint de submissão"""
+        delay = float(getattr(self.batch_config, 'request_delay', 0.0) or 0.0)
+        endpoint = self.get_batch_submit_endpoint()
+        if self.delay_limit_endpoint and self.delay_limit_endpoint != endpoint:
+            self.rate_limiter.remove(self.delay_limit_endpoint)
+            self.delay_limit_endpoint = None
+        # Endpoint com pool próprio mantém pelo menos o intervalo do pool
+        pool_interval = float((getattr(config, 'ENDPOINT_POOLS', {}).get(endpoint) or {}).get('min_interval') or 0.0)
+        if delay > 0 or pool_interval > 0:
+            self.rate_limiter.configure(endpoint, 1.0 / max(delay, pool_interval), 1)
+            self.delay_limit_endpoint = endpoint if pool_interval <= 0 else None
+        elif self.delay_limit_endpoint:
+            self.rate_limiter.remove(self.delay_limit_endpoint)
+            self.delay_limit_endpoint = None
+    
     def select_batch_ref_image(self):
         path = filedialog.askopenfilename(title="Selecionar imagem de referência",
                                           filetypes=[("Imagens", "*.png;*.jpg;*.jpeg;*.webp;*.bmp"), ("Todos", "*.*")])
@@ -1637,24 +2043,13 @@ class VideoGeneratorApp:
         """Ajusta threads e delay automaticamente quando o formato é alterado"""
         try:
             value = self.aspect_var.get() if hasattr(self, 'aspect_var') else '16:9'
-            if value == '9:16':
-                # Defaults para vertical (Reels)
-                if hasattr(self, 'threads_var'):
-                    self.threads_var.set(1)
-                    self.update_thread_count()
-                if hasattr(self, 'batch_delay_var'):
-                    self.batch_delay_var.set(120.0)
-                    self.update_batch_delay()
-                self.log("⚙️  Formato 9:16 selecionado: threads=1 e delay=120s aplicados automaticamente")
+            # O endpoint reels tem pool próprio (config.ENDPOINT_POOLS): threads e delay do lote não mudam
+            pool = getattr(config, 'ENDPOINT_POOLS', {}).get(self.get_submit_endpoint('Veta', value))
+            if pool:
+                self.log(f"⚙️  Formato {value} selecionado: endpoint com pool próprio "
+                         f"({pool.get('max_concurrent')} simultâneo(s), {pool.get('min_interval', 0):.0f}s entre envios)")
             else:
-                # Restaurar defaults para horizontal
-                if hasattr(self, 'threads_var'):
-                    self.threads_var.set(config.DEFAULT_MAX_THREADS)
-                    self.update_thread_count()
-                if hasattr(self, 'batch_delay_var'):
-                    self.batch_delay_var.set(0.0)
-                    self.update_batch_delay()
-                self.log(f"⚙️  Formato {value} selecionado: threads={config.DEFAULT_MAX_THREADS} e delay=0s aplicados")
+                self.log(f"⚙️  Formato {value} selecionado")
         except Exception as e:
             self.log(f"⚠️ Erro ao aplicar defaults de formato: {e}", level="ERROR")
     
@@ -1669,9 +2064,8 @@ class VideoGeneratorApp:
                     self.update_thread_count()
                 self.log("🧩 Modo sequencial ativado (threads=1)")
             else:
-                # Restaurar threads padrão se não estiver em 9:16, que já força 1
-                aspect = self.aspect_var.get() if hasattr(self, 'aspect_var') else '16:9'
-                if aspect != '9:16' and hasattr(self, 'threads_var'):
+                # Restaurar threads padrão
+                if hasattr(self, 'threads_var'):
                     default_threads = getattr(config, 'DEFAULT_MAX_THREADS', 2)
                     self.threads_var.set(default_threads)
                     self.update_thread_count()
@@ -1703,43 +2097,79 @@ class VideoGeneratorApp:
         # Iniciar após pequeno atraso
         self.root.after(300, run)
     
+    def select_dispatchable(self, candidates, capacity):
+        """Escolhe até `capacity` prompts respeitando o pool de cada endpoint: um endpoint lento e cheio
+        (ex.: reels 9:16) é pulado sem bloquear os prompts dos demais endpoints.
+        Retorna pares (prompt, provedor); o provedor só é registrado no prompt ao ser enviado"""
+        in_flight = {}
+        for p in self.prompt_manager.get_prompts_by_status(PromptStatus.PROCESSING):
+            endpoint = self.get_prompt_endpoint(p)
+            in_flight[endpoint] = in_flight.get(endpoint, 0) + 1
+        probing = set()
+        selected = []
+        for prompt in candidates:
+            if len(selected) >= capacity:
+                break
+            provider = self.choose_provider(prompt)
+            if provider is None:
+                continue
+            endpoint = self.get_prompt_endpoint(prompt, provider)
+            limit = self.get_endpoint_limit(endpoint)
+            if limit is not None and in_flight.get(endpoint, 0) >= limit:
+                continue
+            # Pool com intervalo mínimo: não ocupar uma thread esperando o próximo envio liberado
+            if limit is not None and self.rate_limiter.wait_time(endpoint) > 0:
+                continue
+            # Meio-aberto: apenas a requisição de teste por endpoint
+            if self.circuit_breakers.get(endpoint).state != CircuitState.CLOSED:
+                if endpoint in probing:
+                    continue
+                probing.add(endpoint)
+            in_flight[endpoint] = in_flight.get(endpoint, 0) + 1
+            selected.append((prompt, provider))
+        return selected
+    
     def dispatch_pending_prompts(self):
         """Despacha prompts pendentes respeitando o limite de threads do pool"""
         if not getattr(self, 'batch_processing', False):
             return
-        pending = self.prompt_manager.get_pending_prompts()
+        # Prompts em espera de retry só voltam a ser despachados após o horário agendado
+        pending = self.prompt_manager.get_due_prompts()
         if not pending:
             return
+        # Payloads dos próximos prompts montados enquanto os slots estão ocupados
+        self.schedule_prefetch(pending)
         active = self.thread_pool.get_active_count()
         capacity = max(0, self.thread_pool.max_threads - active)
+        # Apenas Gemini/WAN: limitar pelas operações em geração nos provedores, não pelas threads
+        providers = self.get_batch_providers()
+        if all(p in LRO_PROVIDERS for p in providers):
+            # PROCESSING inclui prompts sendo submetidos e operações já em geração
+            in_flight = len(self.prompt_manager.get_prompts_by_status(PromptStatus.PROCESSING))
+            max_inflight = sum(self.key_pool.max_concurrency(p) for p in providers)
+            capacity = min(capacity, max(0, max_inflight - in_flight))
         # Forçar capacidade 1 quando modo sequencial estiver ativo
         if getattr(self, 'sequential_mode', False):
             capacity = min(1, capacity)
         if capacity <= 0:
             return
-        # Guardar janela de espera para delay pós-conclusão
-        try:
-            delay_guard = getattr(self.batch_config, 'request_delay', 0.0)
-        except Exception:
-            delay_guard = 0.0
-        if delay_guard and delay_guard > 0:
-            next_at = getattr(self, 'next_allowed_dispatch_at', 0)
-            now = time.time()
-            if now < next_at:
-                # Aguardando janela de delay para despachar novamente
-                return
         # STRICT SEQUENTIAL GUARD
         if getattr(self, 'sequential_mode', False):
             all_prompts = self.prompt_manager.get_all_prompts()
+            # Filhos do fan-out não são cenas próprias: concluem junto com o pai
+            due_ids = {p.id for p in pending}
             next_prompt = None
             next_index = None
             for i, p in enumerate(all_prompts):
-                if p.status == PromptStatus.PENDING:
+                if p.status == PromptStatus.PENDING and (p.id in due_ids or not p.fanout_parent):
                     next_prompt = p
                     next_index = i
                     break
             if next_prompt is None:
                 return
+            if next_prompt.next_attempt_at and next_prompt.next_attempt_at > time.time():
+                # Próxima cena aguardando retry agendado
+                return
             prior_prompts = all_prompts[:next_index]
             if any(pr.status == PromptStatus.FAILED for pr in prior_prompts):
                 self.log("🛑 Modo sequencial: um prompt anterior falhou. Pausando até editar o prompt ou tentar novamente.", "ERROR")
@@ -1751,48 +2181,73 @@ class VideoGeneratorApp:
             if any(pr.status != PromptStatus.COMPLETED for pr in prior_prompts):
                 self.log("⏳ Modo sequencial: aguardando conclusão do prompt anterior antes de despachar o próximo.")
                 return
-            to_submit = [next_prompt]
+            to_submit = self.select_dispatchable([next_prompt], 1)
         else:
-            to_submit = pending[:capacity]
+            # Envio em bloco: cada slot leva até BULK_MAX_ITEMS prompts
+            to_submit = self.select_dispatchable(pending, capacity * self.get_bulk_size())
         if not to_submit:
             return
-        self.log(f"🚚 Despachando {len(to_submit)} prompts pendentes (capacidade: {capacity}, ativas: {active})")
-        
-        # Respeitar delay opcional entre submissões usando agendamento (não bloqueia UI)
-        delay_seconds = getattr(self.batch_config, 'request_delay', 0.0)
-        if delay_seconds and delay_seconds > 0:
-            delay_ms = int(max(0.0, delay_seconds) * 1000)
-            for idx, prompt in enumerate(to_submit):
-                # Marcar como PROCESSING imediatamente para evitar agendamentos duplicados em próximos ciclos
-                try:
-                    self.prompt_manager.update_prompt_status(prompt.id, PromptStatus.PROCESSING)
-                    self.schedule_tree_update()
-                except Exception:
-                    pass
-                def _submit(p=prompt):
-                    # Apenas submeter (status já marcado)
-                    self.thread_pool.submit_prompt(
-                        p,
-                        self.process_single_prompt_batch,
-                        self.on_prompt_completed
-                    )
-                try:
-                    self.root.after(delay_ms * idx, _submit)
-                except Exception:
-                    _submit()
-        else:
-            for prompt in to_submit:
-                # Marcar como PROCESSING antes de submeter para evitar duplicidade
-                try:
-                    self.prompt_manager.update_prompt_status(prompt.id, PromptStatus.PROCESSING)
-                    self.schedule_tree_update()
-                except Exception:
-                    pass
+        groups = self.group_for_bulk(to_submit, capacity)
+        self.log(f"🚚 Despachando {sum(len(g) for g in groups)} prompts pendentes em {len(groups)} envios (capacidade: {capacity}, ativas: {active})")
+        
+        # O espaçamento entre requisições fica a cargo do limitador de taxa (token bucket por endpoint)
+        for group in groups:
+            # Marcar como PROCESSING antes de submeter para evitar duplicidade; o despachante também
+            # roda nas threads que concluem (deferred/callback), então só submete quem assumir o prompt
+            claimed = []
+            for prompt, provider in group:
+                if self.prompt_manager.claim_prompt(prompt.id):
+                    # Roteamento (provedor, failover, chave de idempotência) só para quem é de fato enviado
+                    self.assign_provider(prompt, provider)
+                    claimed.append(prompt)
+            if not claimed:
+                continue
+            self.schedule_tree_update()
+            if len(claimed) == 1:
                 self.thread_pool.submit_prompt(
-                    prompt,
+                    claimed[0],
                     self.process_single_prompt_batch,
                     self.on_prompt_completed
                 )
+            else:
+                # Um slot por bloco: o resultado do primeiro prompt volta pelo pool, os demais são concluídos no worker
+                self.thread_pool.submit_prompt(
+                    claimed[0],
+                    lambda _prompt, bulk=claimed: self.run_bulk_group(bulk),
+                    self.on_prompt_completed
+                )
+    
+    def get_bulk_size(self):
+        """Prompts por requisição no envio em bloco (1 = envio individual)"""
+        if not getattr(self.batch_config, 'bulk_enabled', False) or getattr(self.batch_config, 'callback_enabled', False):
+            return 1
+        if getattr(self, 'sequential_mode', False):
+            return 1
+        return max(1, int(getattr(config, 'BULK_MAX_ITEMS', 10)))
+    
+    def group_for_bulk(self, selected, max_groups):
+        """Agrupa pares (prompt, provedor) Veta do mesmo endpoint em blocos (ordem de despacho preservada);
+        Gemini/WAN e endpoints que recusaram o envelope seguem um por envio. No máximo `max_groups` envios"""
+        bulk_size = self.get_bulk_size()
+        groups = []
+        open_groups = {}
+        for prompt, provider in selected:
+            endpoint = None
+            if bulk_size > 1 and provider not in LRO_PROVIDERS:
+                endpoint = self.get_prompt_endpoint(prompt, provider)
+                if endpoint in self.bulk_rejected:
+                    endpoint = None
+            group = open_groups.get(endpoint) if endpoint else None
+            if group is not None and len(group) < bulk_size:
+                group.append((prompt, provider))
+                continue
+            if len(groups) >= max_groups:
+                continue
+            group = [(prompt, provider)]
+            groups.append(group)
+            if endpoint:
+                open_groups[endpoint] = group
+        return groups
     
     def load_prompts_from_file(self):
         """Carrega prompts de um arquivo de texto"""
@@ -1854,10 +2309,13 @@ class VideoGeneratorApp:
             return
         
         language = self.batch_language_var.get()
+        # Fan-out: idiomas extras marcados são gerados na mesma requisição do prompt (um item filho por idioma)
+        languages = [language] + [lang for lang, var in getattr(self, 'fanout_language_vars', {}).items()
+                                  if var.get() and lang != language]
         # Tenta interpretar como JSON (suporta um ou vários objetos); se não adicionar nada, faz fallback para linhas
-        added_count = self.prompt_manager.add_prompts_from_json_text(text, language)
+        added_count = self.prompt_manager.add_prompts_from_json_text(text, language, languages)
         if added_count == 0:
-            added_count = self.prompt_manager.add_prompts_from_text(text, language)
+            added_count = self.prompt_manager.add_prompts_from_text(text, language, languages=languages)
         
         if added_count > 0:
             self.update_prompts_tree()
@@ -1893,13 +2351,22 @@ class VideoGeneratorApp:
             has_prompt_image = bool(getattr(prompt, 'image_path', None))
             has_ref_image = bool(hasattr(self, 'batch_ref_image_path') and self.batch_ref_image_path.get())
             image_marker = "Prompt" if has_prompt_image else ("Ref" if has_ref_image else "—")
+            status_text = prompt.status.value
+            if prompt.status == PromptStatus.PENDING and prompt.next_attempt_at and prompt.next_attempt_at > time.time():
+                status_text = f"{status_text} (retry {prompt.attempts})"
+            if prompt.provider and (prompt.provider_pinned or len(self.get_batch_providers()) > 1):
+                status_text = f"{status_text} · {prompt.provider}"
+            if prompt.aspect:
+                status_text = f"{status_text} · {prompt.aspect}"
+            if prompt.fanout_parent:
+                status_text = f"{status_text} · junto de {prompt.fanout_parent}"
             self.prompts_tree.insert("", "end", iid=str(prompt.id), values=(
                 idx,
                 prompt.id,
                 display_prompt,
                 prompt.language,
                 image_marker,
-                prompt.status.value,
+                status_text,
                 display_url
             ))
     
@@ -2318,19 +2785,11 @@ class VideoGeneratorApp:
                 self.log("❌ API Key WAN não fornecida", "ERROR")
                 messagebox.showerror("Erro", "Informe sua WAN (DashScope) API Key para continuar")
                 return
-            # Lote indisponível para WAN nesta versão
-            self.log("⚠️ Lote não disponível para WAN. Use o modo individual.", "WARNING")
-            messagebox.showwarning("Aviso", "O processamento em lote está disponível apenas para Veta por enquanto. Selecione Veta para usar o lote, ou use o modo individual com WAN.")
-            return
         elif provider == "Gemini":
             if not api_key:
                 self.log("❌ API Key Gemini não fornecida", "ERROR")
                 messagebox.showerror("Erro", "Informe sua Gemini API Key para continuar")
                 return
-            # Lote indisponível para Gemini nesta versão
-            self.log("⚠️ Lote não disponível para Gemini. Use o modo individual.", "WARNING")
-            messagebox.showwarning("Aviso", "O processamento em lote está disponível apenas para Veta por enquanto. Selecione Veta para usar o lote, ou use o modo individual com Gemini.")
-            return
         
         # Verificar se há prompts pendentes
         pending_prompts = self.prompt_manager.get_pending_prompts()
@@ -2342,18 +2801,63 @@ class VideoGeneratorApp:
             return
         
         # Capturar credenciais e formato selecionado para uso nas threads
+        self.batch_provider = provider
         self.batch_api_key = api_key
         self.batch_token = token
         self.batch_aspect_choice = self.aspect_var.get() if hasattr(self, 'aspect_var') else "16:9"
         self.log(f"📐 Formato selecionado: {self.batch_aspect_choice}")
-        
-        # Capturar delay configurado (segundos)
+        # Imagens reduzidas/recomprimidas em segundo plano enquanto as conexões aquecem
+        self.preprocess_batch_images(pending_prompts)
+        
+        # Pool de chaves: tela + config + arquivo de chaves, por provedor
+        for name in ("Veta", "Gemini", "WAN"):
+            count = self.key_pool.load(name, self.get_configured_credentials(name))
+            if count > 1:
+                self.log(f"🔑 {name}: {count} chaves de API no rodízio")
+        
+        # Provedores do lote: o selecionado e, no modo multi-provedor, os demais com credenciais
+        self.batch_config.multi_provider = bool(self.multi_provider_var.get()) if hasattr(self, 'multi_provider_var') else self.batch_config.multi_provider
+        self.batch_providers = [provider]
+        if self.batch_config.multi_provider:
+            for name, weight in getattr(config, 'ROUTING_WEIGHTS', {}).items():
+                if name != provider and weight > 0 and self.key_pool.size(name):
+                    self.batch_providers.append(name)
+            self.log(f"🔀 Roteamento multi-provedor: {', '.join(self.batch_providers)}")
+        
+        # Capturar delay configurado (segundos) e aplicá-lo como limite de taxa do endpoint de submissão
         try:
             self.batch_config.request_delay = float(self.batch_delay_var.get()) if hasattr(self, 'batch_delay_var') else self.batch_config.request_delay
+            self.apply_request_delay_limit()
             self.log(f"⏳ Delay configurado: {self.batch_config.request_delay:.2f}s")
         except Exception:
             pass
         
+        # Capturar modo hedge
+        if hasattr(self, 'hedge_var'):
+            self.batch_config.hedge_enabled = bool(self.hedge_var.get())
+            if self.batch_config.hedge_enabled:
+                self.log(f"🏇 Hedge ativo: p{self.hedge_policy.percentile * 100:.0f} da latência, até {self.hedge_policy.max_ratio * 100:.0f}% das submissões")
+        
+        # Capturar modo callback (receptor local sobe no primeiro lote que usar)
+        if hasattr(self, 'callback_var'):
+            self.batch_config.callback_enabled = bool(self.callback_var.get())
+        if self.batch_config.callback_enabled and "Veta" in self.get_batch_providers():
+            try:
+                callback_url = self.callback_receiver.start()
+                self.log(f"📬 Modo callback ativo: resultados Veta chegam em {callback_url.rsplit('/', 1)[0]}/… (prazo {getattr(config, 'CALLBACK_TIMEOUT', 1800)}s)")
+            except OSError as e:
+                self.batch_config.callback_enabled = False
+                self.log(f"⚠️ Receptor de callbacks não iniciou ({e}); lote segue com respostas síncronas", "WARNING")
+        
+        # Capturar envio em bloco (o modo callback tem prioridade: cada prompt aguarda o próprio retorno)
+        if hasattr(self, 'bulk_var'):
+            self.batch_config.bulk_enabled = bool(self.bulk_var.get())
+        if self.batch_config.bulk_enabled and "Veta" in self.get_batch_providers():
+            if self.batch_config.callback_enabled:
+                self.log("📦 Envio em bloco ignorado neste lote: o modo callback está ativo", "WARNING")
+            else:
+                self.log(f"📦 Envio em bloco ativo: até {self.get_bulk_size()} prompts Veta por requisição")
+        
         # Capturar retries configurados
         try:
             self.batch_config.max_retries = int(self.batch_retries_var.get()) if hasattr(self, 'batch_retries_var') else getattr(self.batch_config, 'max_retries', config.CONNECTION_RETRIES)
@@ -2361,9 +2865,6 @@ class VideoGeneratorApp:
         except Exception:
             pass
         
-        # Permitir primeiro despacho imediatamente ao iniciar
-        self.next_allowed_dispatch_at = 0
-        
         # Iniciar processamento
         self.log(f"⚡ Configurando processamento para {len(pending_prompts)} prompts...")
         self.batch_processing = True
@@ -2379,6 +2880,23 @@ class VideoGeneratorApp:
         self.pause_batch_button.config(state="normal")
         self.stop_batch_button.config(state="normal")
         
+        # Aquecer DNS e conexões dos hosts do lote; o despacho começa quando estiverem prontas
+        self.log("🔥 Aquecendo conexões dos provedores do lote...")
+        self.prewarm_connections(self.batch_providers, [p.endpoint for p in pending_prompts if p.endpoint],
+                                 on_done=self.begin_dispatch, connections=self.batch_config.max_threads)
+        
+        self.log(f"✅ Processamento iniciado com sucesso! {len(pending_prompts)} prompts em fila")
+        if hasattr(self, 'batch_status_label'):
+            self.batch_status_label.config(text=f"Processamento iniciado: {len(pending_prompts)} prompts")
+        try:
+            self.root.after(0, lambda: self.root.title(f"Iniciado — {len(pending_prompts)} prompts"))
+        except Exception:
+            pass
+    
+    def begin_dispatch(self):
+        """Inicia o despachante do lote (após o aquecimento das conexões)"""
+        if not self.batch_processing:
+            return
         # Não submeter em loop no main thread; iniciar despachante que fará a submissão incremental
         self.log("🎯 Iniciando despacho incremental de prompts...")
         if not getattr(self, 'dispatcher_running', False):
@@ -2388,19 +2906,200 @@ class VideoGeneratorApp:
             self.dispatch_pending_prompts()
         except Exception as e:
             self.log(f"Erro ao despachar imediatamente: {e}", "ERROR")
-        
-        self.log(f"✅ Processamento iniciado com sucesso! {len(pending_prompts)} prompts em fila")
-        if hasattr(self, 'batch_status_label'):
-            self.batch_status_label.config(text=f"Processamento iniciado: {len(pending_prompts)} prompts")
+    
+    def get_hedge_endpoint(self, endpoint):
+        """Endpoint alternativo para o hedge (o mesmo quando não configurado)"""
+        if endpoint == config.REELS_WEBHOOK_URL:
+            return getattr(config, 'HEDGE_REELS_WEBHOOK_URL', None) or endpoint
+        return getattr(config, 'HEDGE_WEBHOOK_URL', None) or endpoint
+    
+    def build_image_attachment(self, path, aspect):
+        """Entrada de imagem do payload Veta: pré-processada para o formato, base64 do cache de imagens
+        e enviada em blocos (json_stream)"""
+        name = os.path.basename(path)
+        if getattr(config, 'PREPROCESS_IMAGES', False):
+            prepared = self.image_preprocessor.prepare(path, aspect)
+            if prepared.changed:
+                name = os.path.splitext(name)[0] + os.path.splitext(prepared.path)[1]
+                path = prepared.path
+        image = self.image_cache.get(path)
+        return {"name": name, "type": image.mime, "data": image.data}
+    
+    def get_prompt_image_path(self, prompt_item):
+        """Imagem do prompt (prioridade) ou referência do lote ("" quando não há)"""
+        prompt_img = getattr(prompt_item, 'image_path', None)
+        if prompt_img and os.path.isfile(prompt_img):
+            return prompt_img
+        return self.batch_ref_image_path.get() if hasattr(self, 'batch_ref_image_path') else ""
+    
+    def build_batch_payload(self, prompt_item, thread_name=None):
+        """Parte do payload Veta que depende só do prompt (texto, idiomas e imagem pré-processada)"""
+        thread_name = thread_name or threading.current_thread().name
+        aspect = '9:16' if self.get_prompt_aspect(prompt_item) == '9:16' else '16:9'
+        payload = {"prompt": prompt_item.prompt_text, "languages": self.get_prompt_languages(prompt_item)}
+        chosen_path = self.get_prompt_image_path(prompt_item)
+        if chosen_path:
+            try:
+                payload["images"] = [self.build_image_attachment(chosen_path, aspect)]
+                source = "do prompt" if chosen_path == prompt_item.image_path else "de referência"
+                self.log(f"🖼️ [{thread_name}] Incluindo imagem {source} no payload ({aspect})")
+            except Exception as e:
+                self.log(f"⚠️ [{thread_name}] Falha ao ler imagem ({aspect}): {e}", "WARNING")
+        return payload
+    
+    def get_payload_fingerprint(self, prompt_item):
+        """Conteúdo que o payload pré-montado reflete; mudou = prefetch descartado"""
+        chosen_path = self.get_prompt_image_path(prompt_item)
         try:
-            self.root.after(0, lambda: self.root.title(f"Iniciado — {len(pending_prompts)} prompts"))
-        except Exception:
-            pass
+            mtime = os.stat(chosen_path).st_mtime_ns if chosen_path else None
+        except OSError:
+            mtime = None
+        return (prompt_item.prompt_text, tuple(self.get_prompt_languages(prompt_item)), self.get_prompt_aspect(prompt_item),
+                chosen_path, mtime)
+    
+    def get_prompt_languages(self, prompt_item):
+        """Idiomas da requisição do prompt: o dele e os dos filhos do fan-out ainda pendentes"""
+        languages = [prompt_item.language]
+        for child in self.prompt_manager.get_fanout_children(prompt_item.id):
+            if child.language not in languages:
+                languages.append(child.language)
+        return languages
+    
+    def schedule_prefetch(self, pending):
+        """Mantém prontos os payloads dos próximos prompts pendentes (apenas Veta monta payload local)"""
+        if all(p in LRO_PROVIDERS for p in self.get_batch_providers()):
+            return
+        in_flight = [p.id for p in self.prompt_manager.get_prompts_by_status(PromptStatus.PROCESSING)]
+        self.payload_prefetcher.schedule(pending, keep=in_flight)
+    
+    def preprocess_batch_images(self, prompts):
+        """Agenda o pré-processamento das imagens do lote antes do despacho (uma vez por imagem/formato)"""
+        if not getattr(config, 'PREPROCESS_IMAGES', False):
+            return
+        ref_path = self.batch_ref_image_path.get() if hasattr(self, 'batch_ref_image_path') else ""
+        for prompt in prompts:
+            path = prompt.image_path if (prompt.image_path and os.path.isfile(prompt.image_path)) else ref_path
+            if path and os.path.isfile(path):
+                self.image_preprocessor.submit(path, self.get_prompt_aspect(prompt))
+    
+    def get_request_compression(self, endpoint):
+        """Codificação configurada para o corpo enviado ao endpoint (None = sem compressão)"""
+        if endpoint in self.compression_rejected:
+            return None
+        for prefix, encoding in getattr(config, 'REQUEST_COMPRESSION', {}).items():
+            if prefix and endpoint.startswith(prefix):
+                return encoding
+        return None
+    
+    def post_json(self, endpoint, headers, payload):
+        """POST do payload JSON em streaming, comprimido quando o endpoint aceita Content-Encoding.
+        Aceita o corpo já serializado (encode_body) para reenvios sem serializar de novo.
+        Um 415 com corpo comprimido desativa a compressão do endpoint e reenvia sem ela.
+        A resposta vem em streaming (ResponseBody): o chamador lê ou fecha o corpo."""
+        body = encode_body(payload)
+        encoding = self.get_request_compression(endpoint)
+        if encoding and len(body) >= getattr(config, 'REQUEST_COMPRESSION_MIN_BYTES', 16 * 1024):
+            compressed_headers = dict(headers)
+            compressed_headers['Content-Encoding'] = encoding
+            compressed = CompressedBody(body, encoding, getattr(config, 'REQUEST_COMPRESSION_LEVEL', 6), self.compression_stats)
+            response = self.http_pool.post(endpoint, headers=compressed_headers, data=compressed,
+                                           timeout=config.REQUEST_TIMEOUT, stream=True)
+            if response.status_code != 415:
+                return response
+            response.close()
+            self.compression_rejected.add(endpoint)
+            self.log(f"🗜️ {urlparse(endpoint).netloc} recusou Content-Encoding {encoding} (415); enviando sem compressão", "WARNING")
+        return self.http_pool.post(endpoint, headers=headers, data=body, timeout=config.REQUEST_TIMEOUT, stream=True)
+    
+    def post_batch_submission(self, endpoint, headers, webhook_data, prompt_id, thread_name, provider, lease):
+        """POST de submissão do lote; com hedge ativo, requisições lentas ganham uma cópia com outra chave"""
+        def primary():
+            start = time.monotonic()
+            response = self.post_json(endpoint, headers, webhook_data)
+            if response.status_code in (200, 201, 202):
+                self.hedge_policy.record(endpoint, time.monotonic() - start)
+            return response
+        
+        if not getattr(self.batch_config, 'hedge_enabled', False):
+            return primary()
+        
+        # O hedge usa uma chave própria (vaga e cota); sem outra chave elegível seria só uma duplicata
+        def allow_hedge_key(key_id):
+            return key_id != lease.key_id and self.quota.has_budget(key_id, provider)
+        if not self.key_pool.has_capacity(provider, allow=allow_hedge_key):
+            return primary()
+        
+        hedge_endpoint = self.get_hedge_endpoint(endpoint)
+        
+        def hedge():
+            hedge_lease = self.lease_key(provider, exclude=lease.key_id)
+            if hedge_lease is None:
+                self.log(f"🔑 [{thread_name}] Sem outra chave {provider} livre; hedge do prompt {prompt_id} cancelado")
+                return None
+            hedge_breaker = self.circuit_breakers.get(hedge_endpoint) if hedge_endpoint != endpoint else None
+            hedge_sent = False
+            status_code = None
+            retry_after = None
+            try:
+                if hedge_breaker is not None and not hedge_breaker.allow_request():
+                    return None
+                # Chave de idempotência própria: com a mesma o servidor deduplicaria o hedge na geração lenta
+                hedge_headers = dict(headers)
+                hedge_data = dict(webhook_data)
+                credentials = hedge_lease.credentials()
+                hedge_data['api_key'] = credentials['api_key']
+                hedge_data['auth_token'] = credentials['token']
+                if 'token' in hedge_data:
+                    hedge_data['token'] = credentials['token']
+                if headers.get('Idempotency-Key'):
+                    hedge_headers['Idempotency-Key'] = hedge_data['idempotency_key'] = f"{headers['Idempotency-Key']}-hedge"
+                start = time.monotonic()
+                try:
+                    hedge_sent = True
+                    response = self.post_json(hedge_endpoint, hedge_headers, hedge_data)
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    if hedge_breaker is not None:
+                        hedge_breaker.record_failure(timeout=True)
+                    raise
+                status_code = response.status_code
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if status_code in (200, 201, 202):
+                    self.hedge_policy.record(hedge_endpoint, time.monotonic() - start)
+                if hedge_breaker is not None:
+                    if status_code >= 500:
+                        hedge_breaker.record_failure()
+                    else:
+                        hedge_breaker.record_success()
+                self.log(f"🏁 [{thread_name}] Hedge do prompt {prompt_id} (chave {hedge_lease.key_id}) respondeu HTTP {status_code}")
+                return response
+            finally:
+                if not hedge_sent:
+                    self.quota.refund(hedge_lease.key_id, provider)
+                self.release_key(hedge_lease, status_code, retry_after, thread_name)
+        
+        def on_hedge(delay):
+            self.log(f"🏇 [{thread_name}] Prompt {prompt_id} passou de {delay:.1f}s (p{self.hedge_policy.percentile * 100:.0f}); disparando hedge em {hedge_endpoint}", "WARNING")
+        
+        return self.hedge_policy.run(
+            primary, hedge, self.hedge_policy.samples(endpoint),
+            is_success=lambda r: r is not None and r.status_code in (200, 201),
+            on_hedge=on_hedge,
+            discard=lambda r: r.close() if r is not None else None
+        )
     
     def process_single_prompt_batch(self, prompt_item):
         """Processa um prompt individual no lote"""
         thread_name = threading.current_thread().name
         prompt_id = prompt_item.id
+        # Chave de API emprestada (Veta) e o último status/Retry-After para decidir a quarentena
+        lease = None
+        lease_status = None
+        lease_retry_after = None
+        # Modo callback: correlação registrada no receptor e se a submissão foi aceita (prompt aguardando)
+        callback_id = None
+        callback_armed = False
+        # Cota reservada só conta quando a requisição sai; caminhos sem envio a devolvem
+        sent = False
         
         self.log(f"🎬 [{thread_name}] Iniciando processamento do prompt {prompt_id}")
         
@@ -2409,6 +3108,33 @@ class VideoGeneratorApp:
             self.log(f"🔄 [{thread_name}] Marcando prompt {prompt_id} como processando...")
             self.prompt_manager.update_prompt_status(prompt_item.id, PromptStatus.PROCESSING)
             
+            # Provedor escolhido no despacho (roteamento por prompt)
+            provider = prompt_item.provider or self.route_prompt(prompt_item)
+            if provider is None:
+                self.log(f"🔌 [{thread_name}] Nenhum provedor disponível; prompt {prompt_id} volta para a fila", "WARNING")
+                return {'success': False, 'circuit_open': True, 'error': 'Nenhum provedor disponível', 'processing_time': 0}
+            if not self.key_pool.size(provider):
+                return {'success': False, 'error': f'Sem credenciais para o provedor {provider}', 'processing_time': 0}
+            
+            # Gemini/WAN: apenas submeter; a conclusão chega pelo rastreador de operações
+            if provider in LRO_PROVIDERS:
+                # Um vídeo por operação: idiomas do fan-out passam a ter envio próprio
+                for child in self.prompt_manager.get_fanout_children(prompt_id):
+                    self.prompt_manager.detach_fanout(child.id)
+                    self.log(f"🌐 [{thread_name}] {provider} não gera vários idiomas por operação; prompt {child.id} ({child.language}) segue com envio próprio")
+                return self.submit_lro_prompt_batch(prompt_item, provider)
+            # Chave de idempotência estável desta geração (a mesma em todos os retries)
+            idem_key = self.idempotency.key_for(prompt_item)
+            reusable = self.idempotency.reusable_result(idem_key)
+            if reusable:
+                self.log(f"♻️ [{thread_name}] Geração {idem_key} já concluída; reutilizando vídeo sem nova requisição")
+                return {'success': True, 'video_url': reusable['video_url'], 'processing_time': 0}
+            lease = self.lease_key(provider)
+            if lease is None:
+                self.log(f"🔑 [{thread_name}] Nenhuma chave {provider} com vaga e cota; prompt {prompt_id} aguarda na fila")
+                return {'success': False, 'held': True, 'error': 'Sem chave de API livre', 'processing_time': 0}
+            credentials = lease.credentials()
+            
             # Preparar dados
             self.log(f"📦 [{thread_name}] Preparando dados para prompt {prompt_id}...")
             data = {
@@ -2425,84 +3151,24 @@ class VideoGeneratorApp:
             
             headers = dict(config.DEFAULT_HEADERS)
             
-            # Selecionar endpoint conforme formato 16:9 ou 9:16 (vertical)
-            use_reels = getattr(self, 'batch_aspect_choice', '16:9') == '9:16'
-            endpoint = config.REELS_WEBHOOK_URL if use_reels else config.WEBHOOK_URL
+            # Selecionar endpoint conforme formato do prompt (16:9 ou 9:16) ou o endpoint próprio do prompt
+            use_reels = self.get_prompt_aspect(prompt_item) == '9:16'
+            endpoint = self.get_prompt_endpoint(prompt_item, provider)
             
-            # Preparar dados para webhook
-            if use_reels:
-                webhook_data = {
-                    "prompt": prompt_item.prompt_text,
-                    "api_key": getattr(self, 'batch_api_key', self.api_key_entry.get().strip()),
-                    "languages": [prompt_item.language],
-                    "auth_token": getattr(self, 'batch_token', self.token_entry.get().strip())
-                }
-                # Selecionar imagem do prompt (prioridade) ou referência do lote
-                prompt_img = getattr(prompt_item, 'image_path', None)
-                chosen_path = prompt_img if (prompt_img and os.path.isfile(prompt_img)) else (self.batch_ref_image_path.get() if hasattr(self, 'batch_ref_image_path') else "")
-                if chosen_path:
-                    try:
-                        with open(chosen_path, 'rb') as f:
-                            b64_data = base64.b64encode(f.read()).decode('utf-8')
-                        ext = os.path.splitext(chosen_path)[1].lower()
-                        if ext == '.png':
-                            mime = 'image/png'
-                        elif ext in ('.jpg', '.jpeg'):
-                            mime = 'image/jpeg'
-                        elif ext == '.webp':
-                            mime = 'image/webp'
-                        elif ext == '.bmp':
-                            mime = 'image/bmp'
-                        else:
-                            mime = 'application/octet-stream'
-                        webhook_data["images"] = [{
-                            "name": os.path.basename(chosen_path),
-                            "type": mime,
-                            "data": b64_data
-                        }]
-                        if prompt_img and os.path.isfile(prompt_img):
-                            self.log(f"🖼️ [{thread_name}] Incluindo imagem do prompt no payload (9:16)")
-                        else:
-                            self.log(f"🖼️ [{thread_name}] Incluindo imagem de referência no payload (9:16)")
-                    except Exception as e:
-                        self.log(f"⚠️ [{thread_name}] Falha ao ler imagem: {e}", "WARNING")
+            # Preparar dados para webhook: parte do prompt pré-montada (prefetch) ou montada agora;
+            # as credenciais da chave emprestada entram só aqui
+            prepared = self.payload_prefetcher.take(prompt_item)
+            if prepared is not None:
+                self.log(f"⚡ [{thread_name}] Payload do prompt {prompt_id} já preparado (prefetch)")
             else:
-                webhook_data = {
-                    "prompt": prompt_item.prompt_text,
-                    "api_key": getattr(self, 'batch_api_key', self.api_key_entry.get().strip()),
-                    "token": getattr(self, 'batch_token', self.token_entry.get().strip()),
-                    "languages": [prompt_item.language],
-                    "auth_token": getattr(self, 'batch_token', self.token_entry.get().strip())
-                }
-                # Selecionar imagem do prompt (prioridade) ou referência do lote também para 16:9
-                prompt_img = getattr(prompt_item, 'image_path', None)
-                chosen_path = prompt_img if (prompt_img and os.path.isfile(prompt_img)) else (self.batch_ref_image_path.get() if hasattr(self, 'batch_ref_image_path') else "")
-                if chosen_path:
-                    try:
-                        with open(chosen_path, 'rb') as f:
-                            b64_data = base64.b64encode(f.read()).decode('utf-8')
-                        ext = os.path.splitext(chosen_path)[1].lower()
-                        if ext == '.png':
-                            mime = 'image/png'
-                        elif ext in ('.jpg', '.jpeg'):
-                            mime = 'image/jpeg'
-                        elif ext == '.webp':
-                            mime = 'image/webp'
-                        elif ext == '.bmp':
-                            mime = 'image/bmp'
-                        else:
-                            mime = 'application/octet-stream'
-                        webhook_data["images"] = [{
-                            "name": os.path.basename(chosen_path),
-                            "type": mime,
-                            "data": b64_data
-                        }]
-                        if prompt_img and os.path.isfile(prompt_img):
-                            self.log(f"🖼️ [{thread_name}] Incluindo imagem do prompt no payload (16:9)")
-                        else:
-                            self.log(f"🖼️ [{thread_name}] Incluindo imagem de referência no payload (16:9)")
-                    except Exception as e:
-                        self.log(f"⚠️ [{thread_name}] Falha ao ler imagem (16:9): {e}", "WARNING")
+                prepared = self.build_batch_payload(prompt_item, thread_name)
+            webhook_data = {"prompt": prepared["prompt"], "api_key": credentials['api_key']}
+            if not use_reels:
+                webhook_data["token"] = credentials['token']
+            webhook_data["languages"] = prepared["languages"]
+            webhook_data["auth_token"] = credentials['token']
+            if prepared.get("images"):
+                webhook_data["images"] = prepared["images"]
             
             # Fazer requisição com retry (inclui retry para erros de parsing/formato)
             self.log(f"🚀 [{thread_name}] Enviando requisição para prompt {prompt_id}...")
@@ -2510,46 +3176,61 @@ class VideoGeneratorApp:
             
             max_retries = getattr(self.batch_config, 'max_retries', config.CONNECTION_RETRIES)
             last_error = None
-            for attempt in range(max_retries + 1):
+            breaker = self.circuit_breakers.get(endpoint)
+            headers['Idempotency-Key'] = idem_key
+            webhook_data['idempotency_key'] = idem_key
+            if getattr(self.batch_config, 'callback_enabled', False) and self.callback_receiver.running:
+                # Correlação = chave de idempotência: um reenvio deduplicado pelo n8n ainda encontra o registro
+                callback_id = idem_key
+                webhook_data['callback_url'] = self.callback_receiver.register(
+                    callback_id, prompt_id, self.on_prompt_completed, getattr(config, 'CALLBACK_TIMEOUT', 1800)
+                )
+                webhook_data['correlation_id'] = callback_id
+            retry_after = None
+            # Cada execução faz uma única tentativa; falhas retentáveis voltam à fila com atraso
+            first_attempt = prompt_item.attempts
+            if first_attempt > 0:
+                self.log(f"🔄 [{thread_name}] Tentativa {first_attempt + 1}/{max_retries + 1} para prompt {prompt_id}")
+            for attempt in range(first_attempt, max_retries + 1):
                 try:
-                    if attempt > 0:
-                        self.log(f"🔄 [{thread_name}] Tentativa {attempt + 1}/{max_retries + 1} para prompt {prompt_id}")
-                        # Aguardar delay configurado antes de nova tentativa
-                        try:
-                            delay_between_attempts = float(getattr(self.batch_config, 'request_delay', 0.0))
-                        except Exception:
-                            delay_between_attempts = 0.0
-                        if delay_between_attempts and delay_between_attempts > 0:
-                            self.log(f"⏳ [{thread_name}] Aguardando {delay_between_attempts:.2f}s antes da próxima tentativa")
-                            time.sleep(delay_between_attempts)
-                        else:
-                            # Fallback: manter backoff baseado em RETRY_DELAY
-                            fallback = max(0.0, float(getattr(config, 'RETRY_DELAY', 1.0)) * attempt)
-                            if fallback > 0:
-                                self.log(f"⏳ [{thread_name}] Aguardando {fallback:.2f}s (fallback) antes da próxima tentativa")
-                                time.sleep(fallback)
+                    if attempt > first_attempt:
+                        return self.defer_prompt_retry(prompt_item, last_error, retry_after, start_time)
+                    if attempt == 0:
+                        self.retry_policy.on_request()
                     
-                    response = requests.post(
-                        endpoint,
-                        headers=headers,
-                        data=json.dumps(webhook_data),
-                        timeout=config.REQUEST_TIMEOUT
-                    )
+                    if not breaker.allow_request():
+                        self.log(f"🔌 [{thread_name}] Circuito aberto para o webhook; prompt {prompt_id} volta para a fila", "WARNING")
+                        return {
+                            'success': False,
+                            'circuit_open': True,
+                            'error': 'Circuito aberto',
+                            'processing_time': time.time() - start_time
+                        }
+                    if self.idempotency.mark_submitted(idem_key, prompt_id, endpoint):
+                        self.log(f"🔁 [{thread_name}] Reenviando com a mesma chave de idempotência {idem_key} (tentativa anterior sem resposta)")
+                    response = self.post_batch_submission(endpoint, headers, webhook_data, prompt_id, thread_name, provider, lease)
+                    sent = True
+                    lease_status = response.status_code
+                    lease_retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
                     
                     processing_time = time.time() - start_time
                     status_code = response.status_code
-                    if status_code in [200, 201]:
+                    if status_code in [200, 201] or (callback_id and status_code == 202):
                         # Processar resposta já nesta tentativa; se falhar, tentar novamente
                         self.log(f"✅ [{thread_name}] Resposta HTTP OK para prompt {prompt_id} (tentativa {attempt + 1})")
-                        self.log(f"📊 [{thread_name}] Status: {response.status_code}, Content-Length: {len(response.content)}")
+                        self.log(f"📊 [{thread_name}] Status: {response.status_code}, Content-Length: {response.headers.get('Content-Length', 'chunked')}")
                         self.log(f"📋 [{thread_name}] Headers: {dict(response.headers)}")
                         try:
-                            response_text = response.text
-                            self.log(f"📄 [{thread_name}] Resposta (primeiros 200 chars): {response_text[:200]}...")
+                            # Corpo em streaming: tipo identificado pelo primeiro bloco (magic bytes + Content-Type)
+                            response_body = ResponseBody(response)
                             # Verificar se é dados binários (vídeo)
-                            if any(ord(char) < 32 and char not in '\n\r\t' for char in response_text[:100]):
-                                self.log(f"🎬 [{thread_name}] Dados binários detectados para prompt {prompt_id}")
-                                video_path = self.save_batch_video(response, prompt_item.id)
+                            if response_body.is_binary:
+                                self.log(f"🎬 [{thread_name}] Dados binários detectados para prompt {prompt_id} ({video_mime(response_body.head)})")
+                                video_path = self.save_batch_video(response_body, prompt_item.id)
                                 self.log(f"💾 [{thread_name}] Vídeo salvo: {video_path}")
                                 return {
                                     'success': True,
@@ -2557,17 +3238,45 @@ class VideoGeneratorApp:
                                     'processing_time': processing_time
                                 }
                             else:
+                                self.log(f"📄 [{thread_name}] Resposta (primeiros 200 chars): {response_body.preview(200)}...")
                                 self.log(f"📝 [{thread_name}] Processando resposta de texto para prompt {prompt_id}")
+                                raw = response_body.read_bytes(getattr(config, 'RESPONSE_MAX_TEXT_BYTES', 2 * 1024 * 1024))
+                                if callback_id:
+                                    try:
+                                        parse_callback_result(raw)
+                                        accepted = False
+                                    except ValueError:
+                                        # Sem vídeo na resposta: é o aceite do fluxo, o resultado vem pelo callback
+                                        accepted = True
+                                    if accepted:
+                                        # A chave segue ocupada pela geração até o callback (como nas operações Gemini/WAN);
+                                        # registrada antes de armar, pois o callback pode concluir o prompt logo em seguida
+                                        self.operation_leases[prompt_id] = lease
+                                        early_result = self.callback_receiver.arm(callback_id)
+                                        if early_result is not None:
+                                            self.operation_leases.pop(prompt_id, None)
+                                            self.log(f"📬 [{thread_name}] Callback do prompt {prompt_id} chegou antes do aceite")
+                                            return early_result
+                                        callback_armed = True
+                                        lease = None
+                                        self.log(f"📨 [{thread_name}] Prompt {prompt_id} aceito pelo webhook (HTTP {status_code}); aguardando callback com slot liberado")
+                                        return {'success': True, 'deferred': True, 'processing_time': processing_time}
                                 try:
-                                    response_data = response.json()
-                                    video_url = response_data.get('video_url') or response_data.get('url') or response_data.get('link')
+                                    response_data = json_codec.loads(raw)
+                                    # Fan-out multi-idioma: um vídeo por idioma em "videos"
+                                    language_videos = parse_language_videos(response_data)
+                                    video_url = (response_data.get('video_url') or response_data.get('url') or response_data.get('link')
+                                                 or next(iter(language_videos.values()), None))
                                     if video_url:
                                         self.log(f"🎯 [{thread_name}] URL encontrada para prompt {prompt_id}: {video_url[:50]}...")
-                                        return {
+                                        result = {
                                             'success': True,
                                             'video_url': video_url,
                                             'processing_time': processing_time
                                         }
+                                        if language_videos:
+                                            result['language_videos'] = language_videos
+                                        return result
                                     else:
                                         last_error = 'URL do vídeo não encontrada na resposta'
                                         self.log(f"❓ [{thread_name}] {last_error}", "WARNING")
@@ -2579,8 +3288,9 @@ class VideoGeneratorApp:
                                             'error': last_error,
                                             'processing_time': processing_time
                                         }
-                                except json.JSONDecodeError:
+                                except json_codec.JSONDecodeError:
                                     self.log(f"🔍 [{thread_name}] Tentando interpretar como link direto para prompt {prompt_id}")
+                                    response_text = raw.decode('utf-8', errors='replace')
                                     if response_text.startswith('http'):
                                         self.log(f"🔗 [{thread_name}] Link direto encontrado para prompt {prompt_id}")
                                         return {
@@ -2600,6 +3310,7 @@ class VideoGeneratorApp:
                                             'processing_time': processing_time
                                         }
                         except Exception as e:
+                            response.close()
                             last_error = f'Erro ao processar resposta: {str(e)}'
                             self.log(f"⚠️ [{thread_name}] {last_error}", "WARNING")
                             if attempt < max_retries:
@@ -2612,20 +3323,30 @@ class VideoGeneratorApp:
                             }
                     else:
                         # HTTP não-sucesso: decidir se é caso de retry
-                        retryable = (status_code == 429) or (500 <= status_code < 600)
-                        if retryable and attempt < max_retries:
+                        last_error = f'Erro HTTP {response.status_code}: {read_preview(response)}'
+                        if status_code == 429:
+                            return self.hold_for_quota(lease, provider, lease_retry_after, thread_name, prompt_id, start_time)
+                        # 401/403 com outras chaves no pool: a chave vai para quarentena e o retry usa outra
+                        other_key = status_code in (401, 403) and self.key_pool.size(provider) > 1
+                        if (RetryPolicy.is_retryable_status(status_code) or other_key) and attempt < max_retries:
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
                             self.log(f"⚠️ [{thread_name}] HTTP {status_code} na tentativa {attempt + 1}, reintentando...", "WARNING")
                             continue
-                        last_error = f'Erro HTTP {response.status_code}: {response.text[:200]}'
                         break
                     
                 except requests.exceptions.Timeout:
+                    sent = True
+                    breaker.record_failure(timeout=True)
+                    last_error = f'Timeout após {config.REQUEST_TIMEOUT}s'
                     if attempt < max_retries:
                         self.log(f"⏰ [{thread_name}] Timeout na tentativa {attempt + 1}, tentando novamente...", "WARNING")
                         continue
                     else:
                         raise
-                except requests.exceptions.ConnectionError:
+                except requests.exceptions.ConnectionError as e:
+                    sent = True
+                    breaker.record_failure(timeout=True)
+                    last_error = f'Erro de conexão: {e}'
                     if attempt < max_retries:
                         self.log(f"🌐 [{thread_name}] Erro de conexão na tentativa {attempt + 1}, tentando novamente...", "WARNING")
                         continue
@@ -2642,6 +3363,9 @@ class VideoGeneratorApp:
                 'processing_time': final_time
             }
             
+        except RateLimitCancelled:
+            self.log(f"🛑 [{thread_name}] Prompt {prompt_id} cancelado enquanto aguardava o limite de taxa")
+            return {'success': False, 'cancelled': True, 'error': 'Cancelado', 'processing_time': 0}
         except Exception as e:
             error_msg = f'Erro na requisição: {str(e)}'
             self.log(f"❌ [{thread_name}] {error_msg}", "ERROR")
@@ -2650,9 +3374,322 @@ class VideoGeneratorApp:
                 'error': error_msg,
                 'processing_time': time.time() - start_time if 'start_time' in locals() else 0
             }
+        finally:
+            if callback_id and not callback_armed:
+                self.callback_receiver.discard(callback_id)
+            if lease is not None and not sent:
+                self.quota.refund(lease.key_id, provider)
+            self.release_key(lease, lease_status, lease_retry_after, thread_name)
+    
+    def run_bulk_group(self, group):
+        """Tarefa do pool para um bloco: conclui os demais prompts aqui e devolve o resultado do primeiro"""
+        results = self.process_bulk_batch(group)
+        for prompt in group[1:]:
+            try:
+                self.on_prompt_completed(prompt.id, results[prompt.id])
+            except Exception as e:
+                self.log(f"❌ Erro ao concluir prompt {prompt.id} do bloco: {e}", "ERROR")
+        return results[group[0].id]
+    
+    def process_bulk_batch(self, group):
+        """Envia prompts Veta do mesmo endpoint em um único envelope (envio em bloco) e retorna
+        o resultado de cada prompt (prompt_id -> resultado no formato de process_single_prompt_batch).
+        Falhas parciais seguem por item: retentáveis voltam à fila com backoff, as demais falham"""
+        thread_name = threading.current_thread().name
+        ids = [p.id for p in group]
+        results = {}
+        batch = []
+        lease = None
+        lease_status = None
+        lease_retry_after = None
+        # Unidades de cota reservadas para o envelope; devolvidas se o bloco não chegar a ser enviado
+        reserved = 0
+        sent = False
+        start_time = time.time()
+        max_retries = getattr(self.batch_config, 'max_retries', config.CONNECTION_RETRIES)
+        
+        def all_pending(result):
+            for prompt in group:
+                results.setdefault(prompt.id, dict(result))
+            return results
+        
+        def settle(prompt, item_result, retry_after=None):
+            # Resultado do item -> resultado do prompt (retry com backoff enquanto houver tentativas)
+            processing_time = time.time() - start_time
+            if item_result['success']:
+                result = {'success': True, 'video_url': item_result['video_url'], 'processing_time': processing_time}
+                if item_result.get('language_videos'):
+                    result['language_videos'] = item_result['language_videos']
+                return result
+            if item_result.get('retryable') and prompt.attempts < max_retries:
+                return self.defer_prompt_retry(prompt, item_result['error'], retry_after, start_time)
+            return {'success': False, 'error': item_result['error'], 'processing_time': processing_time}
+        
+        def fail_batch(error, retryable, retry_after=None):
+            for prompt in batch:
+                results[prompt.id] = settle(prompt, {'success': False, 'retryable': retryable, 'error': error}, retry_after)
+            return all_pending({'success': False, 'error': error, 'processing_time': time.time() - start_time})
+        
+        self.log(f"📦 [{thread_name}] Iniciando bloco com {len(group)} prompts: {', '.join(ids)}")
+        try:
+            provider = group[0].provider or self.route_prompt(group[0])
+            if provider is None:
+                return all_pending({'success': False, 'circuit_open': True, 'error': 'Nenhum provedor disponível', 'processing_time': 0})
+            # Gerações já concluídas são reaproveitadas antes de emprestar chave e consumir cota
+            pending = []
+            for prompt in group:
+                idem_key = self.idempotency.key_for(prompt)
+                reusable = self.idempotency.reusable_result(idem_key)
+                if reusable:
+                    self.log(f"♻️ [{thread_name}] Geração {idem_key} já concluída; reutilizando vídeo sem incluir no bloco")
+                    results[prompt.id] = {'success': True, 'video_url': reusable['video_url'], 'processing_time': 0}
+                else:
+                    pending.append((prompt, idem_key))
+            if not pending:
+                return results
+            lease = self.lease_key(provider)
+            if lease is None:
+                self.log(f"🔑 [{thread_name}] Nenhuma chave {provider} com vaga e cota; bloco aguarda na fila")
+                return all_pending({'success': False, 'held': True, 'error': 'Sem chave de API livre', 'processing_time': 0})
+            reserved = 1
+            credentials = lease.credentials()
+            endpoint = self.get_prompt_endpoint(group[0], provider)
+            use_reels = self.get_prompt_aspect(group[0]) == '9:16'
+            
+            # Itens do envelope: cada item consome a própria cota
+            items = []
+            for prompt, idem_key in pending:
+                if len(batch) >= reserved:
+                    if not self.quota.reserve(lease.key_id, provider):
+                        results[prompt.id] = {'success': False, 'held': True, 'error': 'Cota esgotada', 'processing_time': 0}
+                        continue
+                    reserved += 1
+                prepared = self.payload_prefetcher.take(prompt)
+                if prepared is None:
+                    prepared = self.build_batch_payload(prompt, thread_name)
+                item = {"prompt": prepared["prompt"], "languages": prepared["languages"], "idempotency_key": idem_key}
+                if prepared.get("images"):
+                    item["images"] = prepared["images"]
+                items.append((prompt.id, item))
+                batch.append(prompt)
+            if not batch:
+                return all_pending({'success': False, 'held': True, 'error': 'Bloco vazio', 'processing_time': 0})
+            
+            common = {"api_key": credentials['api_key'], "auth_token": credentials['token']}
+            if not use_reels:
+                common["token"] = credentials['token']
+            envelope, saved_bytes = build_bulk_envelope(items, common)
+            
+            breaker = self.circuit_breakers.get(endpoint)
+            if not breaker.allow_request():
+                self.log(f"🔌 [{thread_name}] Circuito aberto para o webhook; bloco volta para a fila", "WARNING")
+                return all_pending({'success': False, 'circuit_open': True, 'error': 'Circuito aberto', 'processing_time': 0})
+            for prompt in batch:
+                if prompt.attempts == 0:
+                    self.retry_policy.on_request()
+                self.idempotency.mark_submitted(prompt.idempotency_key, prompt.id, endpoint)
+            self.bulk_stats.record(len(batch), saved_bytes)
+            self.log(f"🚀 [{thread_name}] Enviando bloco com {len(batch)} prompts "
+                     f"({len(envelope.get('images', []))} imagens, {saved_bytes / 1048576:.1f} MB não repetidos)...")
+            try:
+                response = self.post_json(endpoint, dict(config.DEFAULT_HEADERS), envelope)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                sent = True
+                breaker.record_failure(timeout=True)
+                error = (f'Timeout após {config.REQUEST_TIMEOUT}s' if isinstance(e, requests.exceptions.Timeout)
+                         else f'Erro de conexão: {e}')
+                self.log(f"⏰ [{thread_name}] {error} no bloco", "WARNING")
+                return fail_batch(error, True)
+            sent = True
+            lease_status = response.status_code
+            lease_retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            status_code = response.status_code
+            
+            if status_code not in (200, 201, 207):
+                error = f'Erro HTTP {status_code}: {read_preview(response)}'
+                if status_code == 429:
+                    self.hold_for_quota(lease, provider, lease_retry_after, thread_name, ', '.join(p.id for p in batch), start_time)
+                    return all_pending({'success': False, 'held': True, 'error': 'Cota esgotada (HTTP 429)',
+                                        'processing_time': time.time() - start_time})
+                if status_code in (404, 413, 501):
+                    # Fluxo sem o contrato em bloco (ou envelope grande demais): endpoint volta ao envio individual
+                    self.bulk_rejected.add(endpoint)
+                    self.log(f"📦 [{thread_name}] {urlparse(endpoint).netloc} recusou o envio em bloco (HTTP {status_code}); prompts voltam à fila para envio individual", "WARNING")
+                    return all_pending({'success': False, 'held': True, 'error': error, 'processing_time': 0})
+                other_key = status_code in (401, 403) and self.key_pool.size(provider) > 1
+                self.log(f"⚠️ [{thread_name}] {error} no bloco", "WARNING")
+                return fail_batch(error, RetryPolicy.is_retryable_status(status_code) or other_key, lease_retry_after)
+            
+            # Um resultado por item: sucesso, falha do item ou ausente (retentável)
+            response_body = ResponseBody(response)
+            try:
+                if response_body.is_binary:
+                    response_body.close()
+                    raise ValueError("resposta binária não é suportada no envio em bloco")
+                raw = response_body.read_bytes(getattr(config, 'RESPONSE_MAX_TEXT_BYTES', 2 * 1024 * 1024))
+                item_results = parse_bulk_response(raw, [p.id for p in batch])
+            except ValueError as e:
+                error = f'Erro ao processar resposta do bloco: {e}'
+                self.log(f"⚠️ [{thread_name}] {error}", "WARNING")
+                return fail_batch(error, True)
+            self.bulk_stats.record_results(item_results)
+            failed = [pid for pid, r in item_results.items() if not r['success']]
+            self.log(f"✅ [{thread_name}] Bloco respondido: {len(batch) - len(failed)}/{len(batch)} prompts com vídeo"
+                     + (f"; falhas em {', '.join(failed)}" if failed else ""))
+            for prompt in batch:
+                results[prompt.id] = settle(prompt, item_results[prompt.id])
+            return all_pending({'success': False, 'error': 'Sem resultado no bloco', 'processing_time': 0})
+        
+        except RateLimitCancelled:
+            self.log(f"🛑 [{thread_name}] Bloco cancelado enquanto aguardava o limite de taxa")
+            return all_pending({'success': False, 'cancelled': True, 'error': 'Cancelado', 'processing_time': 0})
+        except Exception as e:
+            error = f'Erro na requisição do bloco: {str(e)}'
+            self.log(f"❌ [{thread_name}] {error}", "ERROR")
+            return all_pending({'success': False, 'error': error, 'processing_time': time.time() - start_time})
+        finally:
+            if lease is not None and not sent:
+                self.quota.refund(lease.key_id, provider, reserved)
+            self.release_key(lease, lease_status, lease_retry_after, thread_name)
+    
+    def release_key(self, lease, status_code, retry_after, thread_name):
+        """Devolve a chave ao pool, logando quando ela entra em quarentena (401/403/429)"""
+        quarantine = self.key_pool.release(lease, status_code, retry_after)
+        if quarantine:
+            self.log(f"🔑 [{thread_name}] Chave {lease.key_id} em quarentena por {quarantine:.0f}s (HTTP {status_code})", "WARNING")
+    
+    def defer_prompt_retry(self, prompt_item, last_error, retry_after, start_time):
+        """Encerra a tentativa atual liberando o slot: o prompt volta à fila com horário mínimo
+        (backoff da política de retry) ou falha se o orçamento global de retries acabou."""
+        thread_name = threading.current_thread().name
+        if not self.retry_policy.allow_retry():
+            self.log(f"🪫 [{thread_name}] Orçamento global de retries esgotado; sem nova tentativa para prompt {prompt_item.id}", "WARNING")
+            return {
+                'success': False,
+                'error': last_error or 'Falha desconhecida após tentativas',
+                'processing_time': time.time() - start_time
+            }
+        delay = self.retry_policy.backoff(prompt_item.retry_backoff, retry_after)
+        self.log(f"⏳ [{thread_name}] Prompt {prompt_item.id} volta à fila; nova tentativa em {delay:.1f}s (slot liberado)")
+        return {
+            'success': False,
+            'retry': True,
+            'retry_delay': delay,
+            'error': last_error or 'Falha transitória',
+            'processing_time': time.time() - start_time
+        }
+    
+    def submit_lro_prompt_batch(self, prompt_item, provider):
+        """Cria a operação Gemini/WAN de um prompt do lote e a registra no rastreador.
+        Retorna resultado 'deferred' (slot liberado) ou falha após esgotar as tentativas."""
+        thread_name = threading.current_thread().name
+        aspect = self.get_prompt_aspect(prompt_item)
+        if getattr(prompt_item, 'image_path', None):
+            self.log(f"ℹ️ [{thread_name}] {provider} no lote gera apenas a partir de texto; imagem do prompt {prompt_item.id} ignorada", "WARNING")
+        if getattr(prompt_item, 'endpoint', None):
+            self.log(f"ℹ️ [{thread_name}] Endpoint próprio do prompt {prompt_item.id} vale apenas para Veta; usando a API {provider}", "WARNING")
+        start_time = time.time()
+        max_retries = getattr(self.batch_config, 'max_retries', config.CONNECTION_RETRIES)
+        handle = None
+        last_error = None
+        lease_status = None
+        endpoint = self.get_submit_endpoint(provider, aspect)
+        breaker = self.circuit_breakers.get(endpoint)
+        retry_after = None
+        idem_key = self.idempotency.key_for(prompt_item)
+        reusable = self.idempotency.reusable_result(idem_key)
+        if reusable:
+            self.log(f"♻️ [{thread_name}] Geração {idem_key} já concluída; reutilizando vídeo sem nova operação")
+            return {'success': True, 'video_url': reusable['video_url'], 'processing_time': 0}
+        existing = self.idempotency.get(idem_key)
+        if (existing and existing.get('status') == IdempotencyStore.SUBMITTED
+                and existing.get('handle') and existing.get('provider') == provider):
+            # Operação já criada para esta geração (ex.: lote parado e retomado): acompanhar em vez de recriar
+            handle = existing['handle']
+            self.log(f"♻️ [{thread_name}] Retomando operação {provider} existente {handle} para {prompt_item.id}")
+        # A operação ocupa a chave até concluir; retomada reaproveita a chave ainda emprestada ou prefere a que a criou
+        # (acompanhar uma operação existente não consome cota)
+        lease = self.operation_leases.pop(prompt_item.id, None) if handle else None
+        if lease is None and handle:
+            lease = self.key_pool.acquire(provider, prefer=existing.get('key_id'))
+        elif lease is None:
+            lease = self.lease_key(provider, prefer=(existing or {}).get('key_id'))
+        if lease is None:
+            self.log(f"🔑 [{thread_name}] Nenhuma chave {provider} com vaga e cota; prompt {prompt_item.id} aguarda na fila")
+            return {'success': False, 'held': True, 'error': 'Sem chave de API livre', 'processing_time': 0}
+        api_key = lease.api_key
+        first_attempt = prompt_item.attempts
+        if first_attempt > 0 and not handle:
+            self.log(f"🔄 [{thread_name}] Tentativa {first_attempt + 1}/{max_retries + 1} de criar operação {provider} para {prompt_item.id}")
+        for attempt in range(first_attempt, max_retries + 1):
+            if handle:
+                break
+            if attempt > first_attempt:
+                self.release_key(lease, lease_status, retry_after, thread_name)
+                return self.defer_prompt_retry(prompt_item, last_error, retry_after, start_time)
+            if attempt == 0:
+                self.retry_policy.on_request()
+            if not breaker.allow_request():
+                self.quota.refund(lease.key_id, provider)
+                self.key_pool.release(lease)
+                self.log(f"🔌 [{thread_name}] Circuito aberto para {provider}; prompt {prompt_item.id} volta para a fila", "WARNING")
+                return {'success': False, 'circuit_open': True, 'error': 'Circuito aberto',
+                        'processing_time': time.time() - start_time}
+            try:
+                self.idempotency.mark_submitted(idem_key, prompt_item.id, endpoint)
+                handle = self._start_lro_operation(provider, api_key, prompt_item.prompt_text, aspect, thread_name)
+                self.idempotency.record_handle(idem_key, provider, handle, key_id=lease.key_id)
+                break
+            except RateLimitCancelled:
+                self.quota.refund(lease.key_id, provider)
+                self.key_pool.release(lease)
+                self.log(f"🛑 [{thread_name}] Prompt {prompt_item.id} cancelado enquanto aguardava o limite de taxa")
+                return {'success': False, 'cancelled': True, 'error': 'Cancelado', 'processing_time': 0}
+            except ProviderError as e:
+                last_error = str(e)
+                retry_after = e.retry_after
+                lease_status = e.status_code
+                if e.status_code == 429:
+                    self.release_key(lease, lease_status, retry_after, thread_name)
+                    return self.hold_for_quota(lease, provider, retry_after, thread_name, prompt_item.id, start_time)
+                other_key = e.status_code in (401, 403) and self.key_pool.size(provider) > 1
+                if not (e.retryable or other_key):
+                    break
+        if not handle:
+            self.release_key(lease, lease_status, retry_after, thread_name)
+            return {
+                'success': False,
+                'error': f'Falha ao criar operação no {provider}: {last_error or "sem resposta"}',
+                'processing_time': time.time() - start_time
+            }
+        self.lro_tracker.track(PendingOperation(
+            prompt_id=prompt_item.id,
+            provider=provider,
+            handle=handle,
+            poll_url=gemini_poll_url(handle) if provider == "Gemini" else wan_poll_url(handle),
+            headers=gemini_headers(api_key) if provider == "Gemini" else wan_headers(api_key),
+            on_done=self.on_prompt_completed,
+            profile=operation_profile(provider, aspect)
+        ))
+        previous = self.operation_leases.get(prompt_item.id)
+        if previous is not None and previous is not lease:
+            self.key_pool.release(previous)
+        self.operation_leases[prompt_item.id] = lease
+        self.log(f"📡 [{thread_name}] Prompt {prompt_item.id} em geração no {provider} ({self.lro_tracker.pending_count(provider)} operações pendentes)")
+        return {'success': True, 'deferred': True, 'processing_time': time.time() - start_time}
+    
+    def save_batch_video(self, body, prompt_id):
+        """Salva vídeo do lote (ResponseBody, gravado em blocos) com prefixo da ordem na lista (1_, 2_, 3_, ...)"""
+        file_path = self.batch_video_path(prompt_id)
+        body.save_to(file_path)
+        return file_path
     
-    def save_batch_video(self, response, prompt_id):
-        """Salva vídeo do lote automaticamente com prefixo da ordem na lista (1_, 2_, 3_, ...)"""
+    def batch_video_path(self, prompt_id):
+        """Caminho do vídeo do lote em batch_videos, com prefixo da ordem do prompt na lista"""
         # Criar pasta de downloads se não existir
         download_folder = "batch_videos"
         if not os.path.exists(download_folder):
@@ -2667,13 +3704,7 @@ class VideoGeneratorApp:
         # Nome do arquivo com prefixo
         base_name = f"video_{prompt_id}_{int(time.time())}.mp4"
         filename = f"{order_index}_{base_name}" if order_index else base_name
-        file_path = os.path.join(download_folder, filename)
-        
-        # Salvar arquivo
-        with open(file_path, 'wb') as file:
-            file.write(response.content)
-        
-        return file_path
+        return os.path.join(download_folder, filename)
 
     def save_batch_video_from_url(self, video_url: str, prompt_id: str) -> str:
         """Baixa um vídeo remoto (URL) e salva no diretório batch_videos com o mesmo padrão de nomenclatura.
@@ -2690,14 +3721,42 @@ class VideoGeneratorApp:
             filename = f"{order_index}_{base_name}" if order_index else base_name
             file_path = os.path.join(download_folder, filename)
 
-            # Download com stream
-            resp = requests.get(video_url, stream=True, timeout=max(30, int(getattr(config, 'REQUEST_TIMEOUT', 60))))
-            resp.raise_for_status()
-            with open(file_path, 'wb') as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            return file_path
+            # Arquivos da Gemini Files API exigem a API key
+            headers = {}
+            if "googleapis.com" in video_url or "ai.googleusercontent.com" in video_url:
+                api_key = self.get_provider_credentials("Gemini", prompt_id)['api_key']
+                if api_key:
+                    headers["x-goog-api-key"] = api_key
+            
+            # Download com stream (falhas transitórias seguem a política de retry compartilhada)
+            timeout = max(30, int(getattr(config, 'REQUEST_TIMEOUT', 60)))
+            max_attempts = getattr(config, 'CONNECTION_RETRIES', 3)
+            delay = 0.0
+            self.retry_policy.on_request()
+            for attempt in range(1, max_attempts + 1):
+                retry_after = None
+                try:
+                    resp = self.http_pool.get(video_url, stream=True, headers=headers or None, timeout=timeout)
+                    if not (RetryPolicy.is_retryable_status(resp.status_code) and attempt < max_attempts):
+                        resp.raise_for_status()
+                        with open(file_path, 'wb') as f:
+                            for chunk in resp.iter_content(chunk_size=8192):
+                                if chunk:
+                                    f.write(chunk)
+                        return file_path
+                    retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                    self.log(f"⚠️ Download retornou HTTP {resp.status_code} (tentativa {attempt}/{max_attempts})", "WARNING")
+                    resp.close()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    if attempt >= max_attempts:
+                        raise
+                    self.log(f"⚠️ Falha de rede no download (tentativa {attempt}/{max_attempts}): {e}", "WARNING")
+                if not self.retry_policy.allow_retry():
+                    raise RuntimeError("orçamento global de retries esgotado")
+                delay = self.retry_policy.backoff(delay, retry_after)
+                time.sleep(delay)
+            return ""
         except Exception as e:
             try:
                 self.log(f"⚠️ Falha ao baixar vídeo de URL para salvar localmente: {e}", "WARNING")
@@ -2800,7 +3859,44 @@ class VideoGeneratorApp:
         
         self.log(f"📞 [{thread_name}] Callback recebido para prompt {prompt_id}")
         
+        if result.get('deferred'):
+            # Operação criada no provedor: o prompt segue PROCESSING até o rastreador concluir.
+            # O slot de submissão foi liberado, então tentar despachar o próximo.
+            try:
+                self.dispatch_pending_prompts()
+            except Exception as e:
+                self.log(f"Erro ao despachar após submissão: {e}", "ERROR")
+            return
+        
+        if result.get('cancelled'):
+            # Lote parado durante a espera: o prompt já voltou a PENDING em stop_batch_processing
+            return
+        
+        if result.get('circuit_open') or result.get('held'):
+            # Endpoint com circuito aberto ou sem chave livre: devolver à fila sem contar como falha
+            self.prompt_manager.update_prompt_status(prompt_id, PromptStatus.PENDING)
+            self.schedule_tree_update()
+            return
+        
+        prompt_item = self.prompt_manager.find_prompt(prompt_id)
+        routed_provider = prompt_item.provider if prompt_item is not None else None
+        if result.get('retry'):
+            self.provider_router.record(routed_provider, False)
+            # Fila de retry com atraso: o slot já foi liberado; o despachante retoma quando vencer
+            self.prompt_manager.schedule_retry(prompt_id, result.get('retry_delay', 0.0), result.get('error'))
+            self.schedule_tree_update()
+            try:
+                self.dispatch_pending_prompts()
+            except Exception as e:
+                self.log(f"Erro ao despachar após reagendar retry: {e}", "ERROR")
+            return
+        
+        self.provider_router.record(routed_provider, result['success'], result.get('processing_time'))
         if result['success']:
+            # Resposta multi-idioma: o vídeo deste prompt é o do idioma dele
+            language_videos = result.get('language_videos') or {}
+            if prompt_item is not None and language_videos.get(prompt_item.language):
+                result['video_url'] = language_videos[prompt_item.language]
             self.log(f"✅ [{thread_name}] Prompt {prompt_id} concluído com sucesso!")
             self.prompt_manager.update_prompt_status(
                 prompt_id, 
@@ -2813,23 +3909,14 @@ class VideoGeneratorApp:
                 result.get('processing_time', 0)
             )
             # Auto-save: se retornou apenas URL remota, salvar localmente com o mesmo padrão do modo binário
-            try:
-                video_url = result.get('video_url', '') or ''
-                if video_url.startswith('http'):
-                    self.log(f"⬇️ [{thread_name}] Salvando automaticamente vídeo remoto do prompt {prompt_id}...")
-                    local_path = self.save_batch_video_from_url(video_url, prompt_id)
-                    local_url = f"file:///{local_path.replace(os.sep, '/')}"
-                    # Atualiza o prompt para apontar para o arquivo local
-                    self.prompt_manager.update_prompt_status(
-                        prompt_id,
-                        PromptStatus.COMPLETED,
-                        video_url=local_url
-                    )
-                    # Atualiza o resultado para que o restante do fluxo (encadeamento) use o arquivo local
-                    result['video_url'] = local_url
-                    self.log(f"💾 [{thread_name}] Vídeo salvo automaticamente em: {local_path}")
-            except Exception as e:
-                self.log(f"⚠️ [{thread_name}] Falha ao auto-salvar vídeo remoto: {e}", "WARNING")
+            # (atualiza o resultado para que o restante do fluxo, como o encadeamento, use o arquivo local)
+            result['video_url'] = self.auto_save_batch_video(prompt_id, result.get('video_url', '') or '', thread_name)
+            # Registrar o resultado da chave: um reenvio desta geração reaproveita o vídeo
+            if prompt_item is not None:
+                self.idempotency.mark_succeeded(prompt_item.idempotency_key, result.get('video_url', ''))
+            # Operação Gemini/WAN concluída (e vídeo baixado): a chave volta ao rodízio
+            self.key_pool.release(self.operation_leases.pop(prompt_id, None))
+            self.settle_fanout_children(prompt_id, language_videos, thread_name, result)
             # Encadeamento: se modo sequencial ativo, extrair último frame e usar como referência
             try:
                 if getattr(self, 'sequential_mode', False):
@@ -2845,7 +3932,6 @@ class VideoGeneratorApp:
                                 if hasattr(self, 'batch_ref_image_path'):
                                     self.batch_ref_image_path.set(img_path)
                                     self.log(f"🔗 [{thread_name}] Referência atualizada (último frame local): {img_path}")
-                                self.next_allowed_dispatch_at = time.time() + max(0.0, float(getattr(self.batch_config, 'request_delay', 0.0)))
                                 # Módulo influencer: gera imagem combinada
                                 try:
                                     self._maybe_generate_influencer_composite(img_path, prompt_id)
@@ -2857,11 +3943,10 @@ class VideoGeneratorApp:
                         # Vídeo remoto: baixar temporariamente e extrair último frame
                         try:
                             import tempfile
-                            import requests
                             self.log(f"⬇️ [{thread_name}] Baixando vídeo remoto para encadeamento...")
                             tmp_dir = tempfile.gettempdir()
                             tmp_path = os.path.join(tmp_dir, f"tmp_batch_{prompt_id}_{int(time.time())}.mp4")
-                            with requests.get(video_url, stream=True, timeout=max(10, int(getattr(config, 'REQUEST_TIMEOUT', 30)))) as r:
+                            with self.http_pool.get(video_url, stream=True, timeout=max(10, int(getattr(config, 'REQUEST_TIMEOUT', 30)))) as r:
                                 r.raise_for_status()
                                 with open(tmp_path, 'wb') as f:
                                     for chunk in r.iter_content(chunk_size=8192):
@@ -2877,7 +3962,6 @@ class VideoGeneratorApp:
                                 if hasattr(self, 'batch_ref_image_path'):
                                     self.batch_ref_image_path.set(img_path)
                                     self.log(f"🔗 [{thread_name}] Referência atualizada (último frame remoto): {img_path}")
-                                self.next_allowed_dispatch_at = time.time() + max(0.0, float(getattr(self.batch_config, 'request_delay', 0.0)))
                                 # Módulo influencer: gera imagem combinada
                                 try:
                                     self._maybe_generate_influencer_composite(img_path, prompt_id)
@@ -2903,6 +3987,10 @@ class VideoGeneratorApp:
                 PromptStatus.FAILED,
                 result.get('processing_time', 0)
             )
+            if prompt_item is not None:
+                self.idempotency.mark_failed(prompt_item.idempotency_key, result.get('error', ''))
+            self.key_pool.release(self.operation_leases.pop(prompt_id, None))
+            self.settle_fanout_children(prompt_id, {}, thread_name, result)
             # Pausar imediatamente em modo sequencial para evitar avanço de cenas
             if getattr(self, 'sequential_mode', False):
                 self.log(f"🛑 [{thread_name}] Modo sequencial: falha detectada. Pausando o lote para que você edite o prompt ou tente novamente.", "ERROR")
@@ -2930,20 +4018,58 @@ class VideoGeneratorApp:
             self.root.after(0, self.on_batch_completed)
         else:
             self.log(f"⏳ [{thread_name}] Processamento continua...")
-            # Aplicar delay pós-conclusão antes de despachar próximo(s)
-            delay = getattr(self.batch_config, 'request_delay', 0.0)
-            if delay and delay > 0:
-                self.next_allowed_dispatch_at = time.time() + delay
-                try:
-                    self.root.after(int(delay * 1000), self.dispatch_pending_prompts)
-                except Exception as e:
-                    self.log(f"Falha ao agendar pós-conclusão, despachante cuidará do timing: {e}", "WARNING")
-            else:
-                # Tentar despachar imediatamente mais prompts para ocupar slots liberados
-                try:
-                    self.dispatch_pending_prompts()
-                except Exception as e:
-                    self.log(f"Erro ao despachar após conclusão: {e}", "ERROR")
+            # Despachar imediatamente para ocupar slots liberados (o limitador de taxa espaça as requisições)
+            try:
+                self.dispatch_pending_prompts()
+            except Exception as e:
+                self.log(f"Erro ao despachar após conclusão: {e}", "ERROR")
+    
+    def auto_save_batch_video(self, prompt_id, video_url, thread_name):
+        """Salva localmente um vídeo do lote que veio só como URL remota; retorna a URL final do prompt"""
+        if not video_url.startswith('http'):
+            return video_url
+        try:
+            self.log(f"⬇️ [{thread_name}] Salvando automaticamente vídeo remoto do prompt {prompt_id}...")
+            local_path = self.save_batch_video_from_url(video_url, prompt_id)
+            local_url = f"file:///{local_path.replace(os.sep, '/')}"
+            # Atualiza o prompt para apontar para o arquivo local
+            self.prompt_manager.update_prompt_status(
+                prompt_id,
+                PromptStatus.COMPLETED,
+                video_url=local_url
+            )
+            self.log(f"💾 [{thread_name}] Vídeo salvo automaticamente em: {local_path}")
+            return local_url
+        except Exception as e:
+            self.log(f"⚠️ [{thread_name}] Falha ao auto-salvar vídeo remoto: {e}", "WARNING")
+            return video_url
+    
+    def settle_fanout_children(self, prompt_id, language_videos, thread_name, result):
+        """Fan-out multi-idioma: os vídeos por idioma concluem os itens filhos; idioma sem vídeo na
+        resposta passa a ter envio próprio. Se o pai falhou de vez, os filhos falham junto"""
+        children = self.prompt_manager.get_fanout_children(prompt_id)
+        if not children:
+            return
+        completed = []
+        for child in children:
+            if not result['success']:
+                error = f"Geração multi-idioma do prompt {prompt_id} falhou: {result.get('error', 'Erro desconhecido')}"
+                self.prompt_manager.update_prompt_status(child.id, PromptStatus.FAILED, error_message=error)
+                self.progress_tracker.update_progress(child.id, PromptStatus.FAILED, result.get('processing_time', 0))
+                continue
+            video_url = language_videos.get(child.language)
+            if not video_url:
+                self.prompt_manager.detach_fanout(child.id)
+                self.log(f"🌐 [{thread_name}] Webhook não devolveu o vídeo em '{child.language}' junto do prompt {prompt_id}; prompt {child.id} segue com envio próprio", "WARNING")
+                continue
+            if not self.prompt_manager.claim_prompt(child.id):
+                continue
+            self.prompt_manager.update_prompt_status(child.id, PromptStatus.COMPLETED, video_url=video_url)
+            self.progress_tracker.update_progress(child.id, PromptStatus.COMPLETED, result.get('processing_time', 0))
+            self.auto_save_batch_video(child.id, video_url, thread_name)
+            completed.append(child.language)
+        if completed:
+            self.log(f"🌐 [{thread_name}] Prompt {prompt_id}: vídeos em {', '.join(completed)} gerados na mesma requisição")
     
     def on_batch_completed(self):
         """Chamado quando o lote é concluído"""
@@ -2969,6 +4095,23 @@ class VideoGeneratorApp:
         if hasattr(self, 'batch_status_label'):
             self.batch_status_label.config(text=summary_text)
         self.log("✅ " + summary_text)
+        for endpoint, st in self.circuit_breakers.get_stats().items():
+            if st['trips'] or st['rejected']:
+                self.log(f"🔌 Circuit breaker {endpoint}: aberto {st['trips']}x, {st['rejected']} envios bloqueados, estado {st['state']}")
+        if len(self.get_batch_providers()) > 1:
+            for name, st in self.provider_router.get_stats()['providers'].items():
+                if st['routed']:
+                    self.log(f"🔀 {name}: {st['routed']} prompts roteados, erros {st['error_rate'] * 100:.0f}%, latência média {st['avg_latency']:.0f}s")
+        for st in self.key_pool.get_stats().values():
+            if st['requests'] and (self.key_pool.size(st['provider']) > 1 or st['errors']):
+                self.log(f"🔑 {st['provider']} {st['label']}: {st['requests']} requisições, utilização {st['utilization'] * 100:.0f}%, {st['errors']} erros 401/403/429")
+        hedge_stats = self.hedge_policy.get_stats()
+        if hedge_stats['hedges']:
+            self.log(f"🏇 Hedge: {hedge_stats['hedges']} disparados, {hedge_stats['hedge_wins']} venceram a requisição original")
+        self.idempotency.flush()
+        idem_stats = self.idempotency.get_stats()
+        if idem_stats['reused'] or idem_stats['resubmitted']:
+            self.log(f"♻️ Idempotência: {idem_stats['reused']} vídeos reaproveitados, {idem_stats['resubmitted']} reenvios com a mesma chave")
         try:
             self.root.after(0, lambda: self.root.title(f"Concluído — {completed}/{total} (Sucesso {rate:.1f}%)"))
         except Exception:
@@ -2993,11 +4136,28 @@ class VideoGeneratorApp:
     
     def stop_batch_processing(self):
         """Para processamento em lote"""
-        self.thread_pool.stop_all_threads()
         self.batch_processing = False
+        # Liberar threads bloqueadas aguardando token do limitador de taxa
+        self.rate_limiter.cancel_waits()
+        self.thread_pool.stop_all_threads()
+        self.payload_prefetcher.clear()
+        self.idempotency.flush()
         
         # Marcar prompts em processamento como pendentes
         processing_prompts = self.prompt_manager.get_prompts_by_status(PromptStatus.PROCESSING)
+        # Parar de acompanhar operações Gemini/WAN desses prompts (voltam a ser pendentes)
+        # (a chave de cada operação volta ao rodízio; a retomada reaproveita a operação pelo handle)
+        cancelled = self.lro_tracker.cancel_prompts([p.id for p in processing_prompts])
+        for prompt_id in cancelled:
+            self.key_pool.release(self.operation_leases.pop(prompt_id, None))
+        if cancelled:
+            self.log(f"🧹 {len(cancelled)} operações em geração deixaram de ser acompanhadas")
+        # Callbacks pendentes: retornos tardios desses prompts passam a ser recusados e as chaves voltam ao rodízio
+        waiting = self.callback_receiver.cancel_prompts([p.id for p in processing_prompts])
+        for prompt_id in waiting:
+            self.key_pool.release(self.operation_leases.pop(prompt_id, None))
+        if waiting:
+            self.log(f"🧹 {len(waiting)} prompts aguardando callback deixaram de ser acompanhados")
         for prompt in processing_prompts:
             self.prompt_manager.update_prompt_status(prompt.id, PromptStatus.PENDING)
         
@@ -3066,7 +4226,7 @@ class VideoGeneratorApp:
                             shutil.copy2(local_path, dest_path)
                         else:
                             # Download remoto
-                            resp = requests.get(url, stream=True, timeout=120)
+                            resp = self.http_pool.get(url, stream=True, timeout=120)
                             resp.raise_for_status()
                             with open(dest_path, 'wb') as f:
                                 for chunk in resp.iter_content(chunk_size=8192):
@@ -3154,7 +4314,7 @@ class VideoGeneratorApp:
                             local_path = local_path.replace('/', os.sep)
                             shutil.copy2(local_path, dest_path)
                         else:
-                            resp = requests.get(url, stream=True, timeout=120)
+                            resp = self.http_pool.get(url, stream=True, timeout=120)
                             resp.raise_for_status()
                             with open(dest_path, 'wb') as f:
                                 for chunk in resp.iter_content(chunk_size=8192):
@@ -3394,6 +4554,13 @@ class VideoGeneratorApp:
                         active_threads = self.thread_pool.get_active_count()
                         pending_count = len(self.prompt_manager.get_pending_prompts())
                         status_text = f"Processando... ({active_threads} threads, {pending_count} na fila)"
+                        lro_pending = sum(self.lro_tracker.pending_count(p) for p in self.get_batch_providers() if p in LRO_PROVIDERS)
+                        lro_pending += self.callback_receiver.pending_count()
+                        if lro_pending:
+                            status_text += f" - {lro_pending} em geração"
+                        resume_at = self.get_quota_resume_at() if pending_count else None
+                        if resume_at:
+                            status_text += f" - cota esgotada, retoma às {time.strftime('%H:%M:%S', time.localtime(resume_at))}"
                         
                         # Adicionar tempo estimado se disponível
                         if summary.get('estimated_remaining'):
@@ -3459,8 +4626,12 @@ def main():
         if app.batch_processing:
             if messagebox.askokcancel("Fechar", "Processamento em andamento. Deseja realmente fechar?"):
                 app.thread_pool.stop_all_threads()
+                app.idempotency.close()
+                app.http_pool.close()
                 root.destroy()
         else:
+            app.idempotency.close()
+            app.http_pool.close()
             root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -0,0 +1,145 @@
+"""
+Requisições com Hedge (latência de cauda)
+Quando uma requisição passa do percentil configurado da latência observada,
+uma cópia é disparada em outro endpoint/chave; vence o primeiro sucesso
+"""
+
+import math
+import threading
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Callable, List
+
+
+class HedgePolicy:
+    """Decide quando disparar um hedge, limita a taxa de hedges e mede quem venceu"""
+
+    def __init__(self, percentile: float = 0.95, min_samples: int = 5,
+                 min_delay: float = 30.0, max_ratio: float = 0.1, window: int = 200):
+        self.percentile = min(1.0, max(0.0, float(percentile)))
+        self.min_samples = max(1, int(min_samples))
+        self.min_delay = max(0.0, float(min_delay))
+        self.max_ratio = max(0.0, float(max_ratio))
+        self.window = max(1, int(window))
+        # Latências de submissão por endpoint (janela móvel): base do percentil do hedge
+        self._latencies: Dict[str, deque] = {}
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._primary_wins = 0
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float) -> None:
+        """Registra a latência de uma submissão bem-sucedida ao endpoint"""
+        with self._lock:
+            window = self._latencies.get(endpoint)
+            if window is None:
+                window = self._latencies[endpoint] = deque(maxlen=self.window)
+            window.append(latency)
+
+    def samples(self, endpoint: str) -> List[float]:
+        """Cópia das latências de submissão observadas no endpoint"""
+        with self._lock:
+            return list(self._latencies.get(endpoint, ()))
+
+    def hedge_delay(self, samples: List[float]) -> Optional[float]:
+        """Espera antes do hedge (percentil das latências); None sem amostras suficientes"""
+        samples = sorted(s for s in samples if s and s > 0)
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(self.percentile * len(samples)) - 1))
+        return max(self.min_delay, samples[index])
+
+    def _try_hedge(self) -> bool:
+        with self._lock:
+            allowed = max(1, int(self._requests * self.max_ratio))
+            if self.max_ratio <= 0 or self._hedges >= allowed:
+                self._suppressed += 1
+                return False
+            self._hedges += 1
+            return True
+
+    @staticmethod
+    def _start(fn: Callable[[], Any], name: str) -> Future:
+        # Threads daemon: uma requisição perdedora presa não segura o encerramento do app
+        future: Future = Future()
+
+        def runner():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=runner, daemon=True, name=name).start()
+        return future
+
+    def run(self, primary: Callable[[], Any], hedge: Callable[[], Any],
+            samples: List[float], is_success: Callable[[Any], bool],
+            on_hedge: Optional[Callable[[float], None]] = None,
+            discard: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Executa a requisição principal e, se ela passar do percentil, um hedge
+
+        Args:
+            primary: Requisição principal (retorna resposta ou levanta exceção)
+            hedge: Requisição duplicada para outro endpoint/chave
+            samples: Latências de submissão do endpoint (samples(endpoint))
+            is_success: Diz se um resultado encerra a corrida
+            on_hedge: Chamado com a espera usada quando o hedge é disparado
+            discard: Recebe o resultado do perdedor quando ele terminar (ex.: fechar resposta)
+
+        Returns:
+            Resultado do vencedor; se ambos falharem, o da requisição principal
+        """
+        with self._lock:
+            self._requests += 1
+        delay = self.hedge_delay(samples)
+        if delay is None:
+            return primary()
+
+        name = threading.current_thread().name
+        primary_future = self._start(primary, f"{name}-primary")
+        done, _ = wait([primary_future], timeout=delay)
+        if done or not self._try_hedge():
+            return primary_future.result()
+
+        if on_hedge:
+            on_hedge(delay)
+        hedge_future = self._start(hedge, f"{name}-hedge")
+        pending = {primary_future, hedge_future}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if winner is None and future.exception() is None and is_success(future.result()):
+                    winner = future
+        if winner is None:
+            winner = primary_future
+
+        loser = hedge_future if winner is primary_future else primary_future
+        with self._lock:
+            if winner is hedge_future:
+                self._hedge_wins += 1
+            else:
+                self._primary_wins += 1
+        # Requisição em andamento não pode ser interrompida: o resultado do perdedor é descartado
+        if not loser.cancel() and discard:
+            loser.add_done_callback(
+                lambda f: discard(f.result()) if f.exception() is None else None
+            )
+        return winner.result()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "primary_wins": self._primary_wins,
+                "suppressed": self._suppressed,
+                "hedge_rate": (self._hedges / self._requests) if self._requests else 0.0,
+                "win_rate": (self._hedge_wins / self._hedges) if self._hedges else 0.0,
+            }
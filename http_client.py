@@ -0,0 +1,259 @@
+"""
+Camada de Conexões HTTP Compartilhada
+Mantém uma sessão keep-alive (requests.Session) por host de provedor,
+reaproveitando conexões TCP/TLS entre prompts, polls e downloads
+"""
+
+import os
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter
+
+
+class SessionPool:
+    """Gerencia uma requests.Session com pool de conexões por host"""
+
+    def __init__(self, max_connections: int = 2, rate_limiter: Optional[RateLimiter] = None):
+        self.max_connections = max(1, int(max_connections))
+        # Limite de taxa aplicado antes de cada requisição (endpoints sem limite passam direto)
+        self.rate_limiter = rate_limiter
+        self._sessions: Dict[str, requests.Session] = {}
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        # Conexões abertas por adaptadores já substituídos (mantém contadores acumulados após resize)
+        self._retired_connections: Dict[str, int] = {}
+        self._request_counts: Dict[str, int] = {}
+        # Conexões abertas pelo aquecimento (não contam como handshake de requisição) e tempos medidos
+        self._prewarmed: Dict[str, int] = {}
+        self._warmup: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Retorna a chave do pool (esquema + host) para uma URL"""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+    def _new_adapter(self) -> HTTPAdapter:
+        # Sem retries no nível do urllib3: as políticas de retry ficam no app
+        return HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections, max_retries=0)
+
+    def get_session(self, url: str) -> requests.Session:
+        """Retorna (criando se necessário) a sessão keep-alive do host da URL"""
+        key = self.host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = self._new_adapter()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[key] = session
+                self._adapters[key] = adapter
+                self._retired_connections.setdefault(key, 0)
+                self._request_counts.setdefault(key, 0)
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Executa uma requisição usando a sessão do host correspondente"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        session = self.get_session(url)
+        key = self.host_key(url)
+        with self._lock:
+            self._request_counts[key] = self._request_counts.get(key, 0) + 1
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def resize(self, max_connections: int) -> None:
+        """
+        Ajusta o tamanho dos pools de todos os hosts
+
+        Args:
+            max_connections: Novo número máximo de conexões mantidas por host
+        """
+        new_size = max(1, int(max_connections))
+        with self._lock:
+            if new_size == self.max_connections:
+                return
+            self.max_connections = new_size
+            for key, session in self._sessions.items():
+                old_adapter = self._adapters.get(key)
+                if old_adapter is not None:
+                    self._retired_connections[key] = (
+                        self._retired_connections.get(key, 0) + self._count_connections(old_adapter)
+                    )
+                # Requisições em andamento terminam no adaptador antigo; novas usam o novo tamanho
+                adapter = self._new_adapter()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._adapters[key] = adapter
+
+    def prewarm(self, url: str, connections: Optional[int] = None, timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Aquece o pool do host: resolve o DNS, mede TCP/TLS em uma conexão de sonda e deixa
+        conexões ociosas no pool com requisições HEAD pela sessão (só API pública). Os HEAD vão
+        à raiz do host, nunca ao caminho do webhook/API: não disparam fluxos nem gastam limite de taxa
+
+        Args:
+            url: Qualquer URL do host (só esquema, host e porta são usados)
+            connections: Conexões desejadas no pool (limitado ao tamanho do pool)
+            timeout: Tempo máximo de cada conexão (segundos)
+
+        Returns:
+            Tempos do host: {'dns', 'tcp', 'tls' (segundos; None sem medida), 'opened', 'error'}
+        """
+        key = self.host_key(url)
+        parsed = urlparse(url)
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        result: Dict[str, Any] = {"dns": None, "tcp": None, "tls": None, "opened": 0, "error": None}
+        try:
+            start = time.perf_counter()
+            socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)
+            result["dns"] = time.perf_counter() - start
+
+            session = self.get_session(url)
+            with self._lock:
+                adapter = self._adapters[key]
+                target = min(int(connections or self.max_connections), self.max_connections)
+            # Mesmas regras de proxy/verificação TLS que session.request aplicaria
+            settings = session.merge_environment_settings(url, {}, None, None, None)
+            if not settings.get("proxies"):
+                result.update(self._probe(parsed.hostname, port, parsed.scheme == "https", settings.get("verify"), timeout))
+
+            # Requisições simultâneas: cada uma ocupa uma conexão, que volta ociosa ao pool
+            root = f"{parsed.scheme}://{parsed.netloc}/"
+            before = self._count_connections(adapter)
+            with ThreadPoolExecutor(max_workers=target) as executor:
+                outcomes = list(executor.map(lambda _: self._head(session, root, timeout), range(target)))
+            errors = [e for e in outcomes if e]
+            # Tentativas que falharam também contam no pool do urllib3
+            result["opened"] = min(max(0, self._count_connections(adapter) - before), target - len(errors))
+            if errors and not result["error"]:
+                result["error"] = errors[0]
+        except Exception as e:
+            result["error"] = str(e)
+        with self._lock:
+            self._prewarmed[key] = self._prewarmed.get(key, 0) + result["opened"]
+            self._warmup[key] = result
+        return result
+
+    @staticmethod
+    def _head(session: requests.Session, url: str, timeout: float) -> Optional[str]:
+        """HEAD pela sessão (qualquer status serve: a conexão fica aberta); retorna o erro ou None"""
+        try:
+            session.head(url, timeout=timeout, allow_redirects=False).close()
+            return None
+        except requests.RequestException as e:
+            return str(e)
+
+    @staticmethod
+    def _probe(host: str, port: int, use_tls: bool, verify: Any, timeout: float) -> Dict[str, Any]:
+        """Conexão de sonda (fechada em seguida) medindo TCP (connect) e TLS (handshake) separadamente"""
+        timing: Dict[str, Any] = {}
+        try:
+            start = time.perf_counter()
+            sock = socket.create_connection((host, port), timeout=timeout)
+            timing["tcp"] = time.perf_counter() - start
+            try:
+                if use_tls:
+                    bundle = verify if isinstance(verify, str) else requests.certs.where()
+                    context = ssl.create_default_context(cafile=None if os.path.isdir(bundle) else bundle,
+                                                         capath=bundle if os.path.isdir(bundle) else None)
+                    if verify is False:
+                        context.check_hostname = False
+                        context.verify_mode = ssl.CERT_NONE
+                    start = time.perf_counter()
+                    sock = context.wrap_socket(sock, server_hostname=host)
+                    timing["tls"] = time.perf_counter() - start
+            finally:
+                sock.close()
+        except (OSError, ssl.SSLError) as e:
+            timing["error"] = str(e)
+        return timing
+
+    def get_warmup_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Tempos do último aquecimento por host (ver prewarm)"""
+        with self._lock:
+            return {key: dict(result) for key, result in self._warmup.items()}
+
+    @staticmethod
+    def _count_connections(adapter: HTTPAdapter) -> int:
+        """Soma as conexões novas abertas pelos pools do urllib3 de um adaptador"""
+        total = 0
+        try:
+            pools = adapter.poolmanager.pools
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is not None:
+                    total += int(getattr(pool, "num_connections", 0) or 0)
+        except Exception:
+            pass
+        return total
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna contadores por host
+
+        Returns:
+            Dicionário host -> {'requests', 'hits', 'misses', 'hit_rate', 'pool_size'}
+            onde misses são conexões novas (handshake TCP/TLS) e hits são reusos
+        """
+        with self._lock:
+            stats: Dict[str, Dict[str, Any]] = {}
+            for key, adapter in self._adapters.items():
+                requests_made = self._request_counts.get(key, 0)
+                misses = self._retired_connections.get(key, 0) + self._count_connections(adapter)
+                misses = min(max(0, misses - self._prewarmed.get(key, 0)), requests_made)
+                hits = requests_made - misses
+                stats[key] = {
+                    "requests": requests_made,
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": (hits / requests_made * 100) if requests_made else 0.0,
+                    "pool_size": self.max_connections,
+                }
+            return stats
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Retorna contadores agregados de todos os hosts"""
+        stats = self.get_stats()
+        total_requests = sum(s["requests"] for s in stats.values())
+        total_hits = sum(s["hits"] for s in stats.values())
+        return {
+            "hosts": len(stats),
+            "requests": total_requests,
+            "hits": total_hits,
+            "misses": total_requests - total_hits,
+            "hit_rate": (total_hits / total_requests * 100) if total_requests else 0.0,
+        }
+
+    def hosts(self) -> List[str]:
+        """Lista os hosts com sessão aberta"""
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def close(self) -> None:
+        """Fecha todas as sessões e conexões abertas"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
@@ -0,0 +1,158 @@
+"""
+Chaves de Idempotência para Submissões
+Cada geração de um prompt recebe uma chave estável (reutilizada nos retries) e o
+resultado de cada chave fica registrado em disco, permitindo reaproveitar vídeos
+já gerados e retomar operações já criadas em vez de pagar por uma nova geração
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+import json_codec
+
+
+class IdempotencyStore:
+    """Registro local chave -> submissão/resultado, persistido em JSON.
+    As alterações marcam o registro como sujo e são gravadas juntas (no máximo uma escrita
+    a cada flush_interval segundos, e em flush()/close() ao parar o lote ou fechar o app)"""
+
+    SUBMITTED = "submitted"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 7 * 24 * 3600,
+                 flush_interval: float = 2.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._reused = 0
+        self._resubmitted = 0
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        # Serializa as escritas em disco (feitas fora de _lock para não travar as submissões)
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            records = json_codec.load_file(self.path)
+            cutoff = time.time() - self.ttl_seconds
+            self._records = {k: v for k, v in records.items() if v.get("updated_at", 0) >= cutoff}
+        except Exception:
+            self._records = {}
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.ttl_seconds
+        expired = [k for k, v in self._records.items() if v.get("updated_at", 0) < cutoff]
+        for key in expired:
+            del self._records[key]
+
+    def flush(self) -> None:
+        """Grava o registro se houver alterações pendentes, descartando registros vencidos (TTL)"""
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty or not self.path:
+                    self._dirty = False
+                    return
+                self._prune(time.time())
+                snapshot = {k: dict(v) for k, v in self._records.items()}
+                self._dirty = False
+            try:
+                json_codec.dump_file(snapshot, self.path)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+
+    def close(self) -> None:
+        """Grava as alterações pendentes (chamado ao fechar o app)"""
+        self.flush()
+
+    def _schedule_flush(self) -> None:
+        # Chamado com _lock: a primeira alteração agenda a escrita; as seguintes entram nela
+        if not self.path or self._timer is not None:
+            return
+        self._timer = threading.Timer(self.flush_interval, self.flush)
+        self._timer.daemon = True
+        self._timer.name = "IdempotencyFlush"
+        self._timer.start()
+
+    def _update(self, key: str, **fields) -> None:
+        with self._lock:
+            record = self._records.setdefault(key, {"created_at": time.time()})
+            record.update(fields)
+            record["updated_at"] = time.time()
+            self._dirty = True
+            self._schedule_flush()
+
+    @staticmethod
+    def key_for(prompt_item) -> str:
+        """Retorna (criando na primeira submissão) a chave da geração atual do prompt"""
+        if not getattr(prompt_item, 'idempotency_key', None):
+            prompt_item.idempotency_key = f"{prompt_item.id}-{uuid.uuid4().hex[:12]}"
+        return prompt_item.idempotency_key
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not key:
+            return None
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record else None
+
+    def reusable_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Registro de uma geração já concluída com sucesso para a chave (evita gerar de novo)"""
+        record = self.get(key)
+        if record and record.get("status") == self.SUCCEEDED and record.get("video_url"):
+            with self._lock:
+                self._reused += 1
+            return record
+        return None
+
+    def mark_submitted(self, key: str, prompt_id: str, endpoint: str) -> bool:
+        """
+        Registra o envio de uma tentativa
+
+        Returns:
+            True se a chave já tinha sido enviada antes sem resultado conhecido (reenvio)
+        """
+        previous = self.get(key)
+        resubmission = bool(previous and previous.get("status") == self.SUBMITTED)
+        if resubmission:
+            with self._lock:
+                self._resubmitted += 1
+        attempts = (previous or {}).get("attempts", 0) + 1
+        self._update(key, status=self.SUBMITTED, prompt_id=prompt_id, endpoint=endpoint, attempts=attempts)
+        return resubmission
+
+    def record_handle(self, key: str, provider: str, handle: str, key_id: Optional[str] = None) -> None:
+        """Guarda a operação/tarefa criada no provedor para a chave (Gemini/WAN) e a chave de API usada"""
+        self._update(key, provider=provider, handle=handle, key_id=key_id)
+
+    def mark_succeeded(self, key: Optional[str], video_url: str) -> None:
+        if key:
+            self._update(key, status=self.SUCCEEDED, video_url=video_url)
+
+    def mark_failed(self, key: Optional[str], error: str) -> None:
+        if key:
+            self._update(key, status=self.FAILED, error=error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [r.get("status") for r in self._records.values()]
+            return {
+                "keys": len(statuses),
+                "submitted": statuses.count(self.SUBMITTED),
+                "succeeded": statuses.count(self.SUCCEEDED),
+                "failed": statuses.count(self.FAILED),
+                "reused": self._reused,
+                "resubmitted": self._resubmitted,
+            }
@@ -0,0 +1,149 @@
+"""
+Cache de Imagens Codificadas
+Mantém em memória o base64 das imagens de referência (LRU com teto em bytes),
+chaveado por caminho, mtime e tamanho: um lote inteiro com a mesma imagem
+lê e codifica o arquivo uma única vez
+"""
+
+import base64
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Union
+
+from json_stream import Base64Data, Base64File
+
+# Assinaturas (magic bytes) dos formatos aceitos como imagem de referência
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+_EXTENSIONS = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+    '.gif': 'image/gif',
+}
+
+
+def detect_mime(header: bytes, path: str = "") -> str:
+    """MIME pelo conteúdo do arquivo; extensão como reserva"""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, mime in _SIGNATURES:
+        if header.startswith(signature):
+            return mime
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'application/octet-stream')
+
+
+class CachedImage:
+    """Imagem pronta para o payload: MIME e base64 (em memória ou lido do disco no envio)"""
+
+    def __init__(self, mime: str, data: Union[Base64Data, Base64File]):
+        self.mime = mime
+        self.data = data
+
+
+class ImageCache:
+    """LRU de imagens codificadas em base64, limitado pelo total de bytes"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[Tuple[str, int, int], CachedImage]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._oversized = 0
+        self._lock = threading.Lock()
+        # Um carregamento por chave: threads do lote com a mesma imagem esperam a primeira codificar
+        self._loading: Dict[Tuple[str, int, int], threading.Lock] = {}
+
+    @staticmethod
+    def _key(path: str) -> Tuple[str, int, int]:
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def get(self, path: str) -> CachedImage:
+        """
+        Retorna a imagem codificada, lendo o arquivo apenas quando ele não está no cache
+        (ou mudou desde a última leitura)
+
+        Raises:
+            OSError: Arquivo inexistente ou ilegível
+        """
+        key = self._key(path)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+                self._misses += 1
+            try:
+                return self._load(path, key)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+
+    def _lookup(self, key: Tuple[str, int, int]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return entry
+
+    def _load(self, path: str, key: Tuple[str, int, int]) -> CachedImage:
+        size = key[2]
+        encoded_size = 4 * ((size + 2) // 3)
+        if encoded_size > self.max_bytes:
+            # Maior que o cache inteiro: enviada em streaming direto do disco
+            with open(path, 'rb') as f:
+                mime = detect_mime(f.read(16), path)
+            with self._lock:
+                self._oversized += 1
+            return CachedImage(mime, Base64File(path))
+        with open(path, 'rb') as f:
+            raw = f.read(size)
+        entry = CachedImage(detect_mime(raw[:16], path), Base64Data(base64.b64encode(raw)))
+        del raw
+        with self._lock:
+            # Versões antigas do mesmo arquivo (mtime/tamanho diferentes) saem do cache
+            for old in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._bytes -= self._entries.pop(old).data.encoded_length()
+            self._entries[key] = entry
+            self._bytes += encoded_size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.data.encoded_length()
+                self._evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "oversized": self._oversized,
+                "hit_rate": (self._hits / lookups * 100) if lookups else 0.0,
+            }
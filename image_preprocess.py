@@ -0,0 +1,152 @@
+"""
+Pré-processamento de Imagens de Referência
+Antes do upload, reduz a imagem ao tamanho máximo do formato do vídeo (16:9/9:16),
+remove metadados e recomprime em JPEG/WebP, em um pool de threads e com os
+resultados em cache (arquivo processado em disco + mapa em memória)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Tuple, Callable
+
+from PIL import Image, ImageOps
+
+_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp"}
+
+
+class PreparedImage:
+    """Resultado do pré-processamento: arquivo a enviar e tamanhos antes/depois"""
+
+    def __init__(self, source: str, path: str, original_bytes: int, processed_bytes: int,
+                 dimensions: Tuple[int, int], elapsed: float, error: Optional[str] = None):
+        self.source = source
+        self.path = path
+        self.original_bytes = original_bytes
+        self.processed_bytes = processed_bytes
+        self.dimensions = dimensions
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def changed(self) -> bool:
+        return self.path != self.source
+
+    def summary(self) -> str:
+        """Tamanhos antes/depois para os logs"""
+        name = os.path.basename(self.source)
+        if self.error:
+            return f"{name}: enviada sem processar ({self.error})"
+        if not self.changed:
+            return f"{name}: {self.original_bytes / 1024:.0f} KB mantida (já menor que a versão recomprimida)"
+        return (f"{name}: {self.original_bytes / 1024:.0f} KB → {self.processed_bytes / 1024:.0f} KB "
+                f"({self.dimensions[0]}x{self.dimensions[1]}, {self.elapsed:.2f}s)")
+
+
+class ImagePreprocessor:
+    """Redimensiona e recomprime imagens por formato de vídeo, uma vez por arquivo/versão"""
+
+    def __init__(self, max_sizes: Dict[str, Tuple[int, int]], output_dir: str,
+                 image_format: str = "JPEG", quality: int = 85, workers: int = 2,
+                 on_done: Optional[Callable[[PreparedImage], None]] = None):
+        """
+        Args:
+            max_sizes: formato ("16:9"/"9:16") -> (largura, altura) máximas
+            output_dir: Pasta dos arquivos processados
+            image_format: "JPEG" ou "WEBP"
+            quality: Qualidade da recompressão (1-100)
+            workers: Threads do pool de pré-processamento
+            on_done: Chamado uma vez por imagem processada (ex.: log dos tamanhos antes/depois)
+        """
+        self.on_done = on_done
+        self.max_sizes = dict(max_sizes)
+        self.output_dir = output_dir
+        self.image_format = image_format.upper() if image_format.upper() in _EXTENSIONS else "JPEG"
+        self.quality = min(100, max(1, int(quality)))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="Preprocess")
+        self._results: Dict[str, Future] = {}
+        self._original_bytes = 0
+        self._processed_bytes = 0
+        self._images = 0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def _key(self, path: str, aspect: str) -> str:
+        st = os.stat(path)
+        box = self.max_sizes.get(aspect) or self.max_sizes.get("16:9") or (1920, 1080)
+        raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{box}|{self.image_format}|{self.quality}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+    def submit(self, path: str, aspect: str) -> Future:
+        """Agenda o pré-processamento (ou devolve o já agendado para a mesma versão do arquivo)"""
+        key = self._key(path, aspect)
+        with self._lock:
+            future = self._results.get(key)
+            if future is None:
+                future = self._results[key] = self._executor.submit(self._process, path, aspect, key)
+            return future
+
+    def prepare(self, path: str, aspect: str) -> PreparedImage:
+        """Imagem pronta para envio (espera o pool se ainda estiver processando)"""
+        result = self.submit(path, aspect).result()
+        if result.changed and not os.path.isfile(result.path):
+            # Arquivo processado apagado da pasta: processar de novo
+            with self._lock:
+                self._results.pop(self._key(path, aspect), None)
+            result = self.submit(path, aspect).result()
+        return result
+
+    def _process(self, path: str, aspect: str, key: str) -> PreparedImage:
+        start = time.time()
+        original_bytes = os.path.getsize(path)
+        box = self.max_sizes.get(aspect) or self.max_sizes.get("16:9") or (1920, 1080)
+        try:
+            with Image.open(path) as img:
+                # Aplicar a rotação do EXIF antes de descartar os metadados
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail(box, Image.LANCZOS)
+                if self.image_format == "JPEG" and img.mode not in ("RGB", "L"):
+                    # JPEG sem transparência: compor sobre fundo branco
+                    rgba = img.convert("RGBA")
+                    img = Image.new("RGB", rgba.size, (255, 255, 255))
+                    img.paste(rgba, mask=rgba.split()[-1])
+                elif img.mode not in ("RGB", "RGBA", "L"):
+                    img = img.convert("RGBA")
+                os.makedirs(self.output_dir, exist_ok=True)
+                name = os.path.splitext(os.path.basename(path))[0]
+                out_path = os.path.join(self.output_dir, f"{name}-{key}{_EXTENSIONS[self.image_format]}")
+                tmp_path = f"{out_path}.tmp"
+                # Imagem nova, sem exif/icc/texto: só os pixels vão para o upload
+                img.save(tmp_path, format=self.image_format, quality=self.quality, optimize=True)
+                os.replace(tmp_path, out_path)
+                dimensions = img.size
+            processed_bytes = os.path.getsize(out_path)
+            if processed_bytes >= original_bytes:
+                # Recompressão não compensou: enviar o original
+                os.remove(out_path)
+                out_path, processed_bytes = path, original_bytes
+            result = PreparedImage(path, out_path, original_bytes, processed_bytes, dimensions, time.time() - start)
+        except Exception as e:
+            result = PreparedImage(path, path, original_bytes, original_bytes, (0, 0), time.time() - start, str(e))
+        with self._lock:
+            self._images += 1
+            self._original_bytes += result.original_bytes
+            self._processed_bytes += result.processed_bytes
+            if result.error:
+                # Falha também fica em cache: o arquivo alterado gera outra chave
+                self._errors += 1
+        if self.on_done:
+            self.on_done(result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "images": self._images,
+                "errors": self._errors,
+                "original_bytes": self._original_bytes,
+                "processed_bytes": self._processed_bytes,
+                "saved_ratio": (1 - self._processed_bytes / self._original_bytes) if self._original_bytes else 0.0,
+            }
@@ -0,0 +1,82 @@
+"""
+Codec JSON
+Ponto único de serialização e parsing JSON do app (entrada de prompts, payloads,
+respostas e arquivos de estado): usa orjson quando instalado e a biblioteca padrão
+como reserva. Os dois backends geram a mesma saída: compacta e em UTF-8
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Union
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError herda de json.JSONDecodeError: um único except cobre os dois backends
+JSONDecodeError = json.JSONDecodeError
+
+
+def _select_backend(name: str) -> str:
+    """'auto' usa orjson quando disponível; 'json' força a biblioteca padrão"""
+    name = (name or "auto").lower()
+    if name in ("auto", "orjson") and orjson is not None:
+        return "orjson"
+    return "json"
+
+
+BACKEND = _select_backend(getattr(config, 'JSON_BACKEND', "auto"))
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializa para bytes UTF-8 compactos (pronto para o corpo da requisição)"""
+    if BACKEND == "orjson":
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_text(obj: Any) -> str:
+    """Serializa para str (logs e mensagens de erro)"""
+    return dumps(obj).decode('utf-8')
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """
+    Raises:
+        JSONDecodeError: Conteúdo não é JSON válido
+    """
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def response_json(response) -> Any:
+    """JSON do corpo de uma resposta do requests, parseado direto dos bytes recebidos"""
+    return loads(response.content)
+
+
+def load_file(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: str) -> None:
+    """Grava o JSON em um arquivo temporário exclusivo ao lado do destino e o substitui
+    (sem arquivo pela metade, nem colisão entre gravações concorrentes do mesmo arquivo)"""
+    data = dumps(obj)
+    tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(path)),
+                                      prefix=f".{os.path.basename(path)}.", suffix=".tmp", delete=False)
+    try:
+        with tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
@@ -0,0 +1,217 @@
+"""
+Corpo JSON em Streaming
+Serializa o payload das submissões em blocos: imagens entram como Base64File e
+são lidas e codificadas em base64 aos pedaços durante o envio, sem montar a
+string base64 nem o JSON completo em memória. O tamanho é calculado antes do
+envio, então a requisição sai com Content-Length (sem chunked). O envelope é
+serializado pelo json_codec (orjson quando instalado)
+"""
+
+import base64
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import json_codec
+
+# Múltiplo de 3 bytes: cada bloco vira base64 sem padding intermediário
+READ_CHUNK_SIZE = 3 * 16 * 1024
+
+
+class Base64File:
+    """Conteúdo de um arquivo codificado em base64 sob demanda (valor de string no JSON)"""
+
+    def __init__(self, path: str, chunk_size: int = READ_CHUNK_SIZE):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+
+    def encoded_length(self) -> int:
+        """Tamanho em bytes do base64 (com padding)"""
+        return 4 * ((self.size + 2) // 3)
+
+    def iter_encoded(self) -> Iterator[bytes]:
+        """Base64 do arquivo em blocos; lê exatamente o tamanho medido na criação"""
+        remaining = self.size
+        with open(self.path, 'rb') as f:
+            while remaining > 0:
+                raw = f.read(min(self.chunk_size, remaining))
+                if not raw:
+                    raise IOError(f"{self.path} encolheu durante o envio")
+                remaining -= len(raw)
+                yield base64.b64encode(raw)
+
+    def read_text(self) -> str:
+        """Base64 completo como string (para quem precisa do valor em memória)"""
+        return b"".join(self.iter_encoded()).decode('ascii')
+
+
+class Base64Data:
+    """Base64 já codificado em memória (ex.: imagem do ImageCache); enviado em fatias sem cópia"""
+
+    def __init__(self, encoded: bytes, chunk_size: int = READ_CHUNK_SIZE):
+        self.encoded = encoded
+        self.chunk_size = max(1, chunk_size)
+
+    def encoded_length(self) -> int:
+        return len(self.encoded)
+
+    def iter_encoded(self) -> Iterator[bytes]:
+        view = memoryview(self.encoded)
+        for start in range(0, len(view), self.chunk_size):
+            yield view[start:start + self.chunk_size]
+
+    def read_text(self) -> str:
+        return self.encoded.decode('ascii')
+
+
+Segment = Union[bytes, Base64File, Base64Data]
+
+
+class StreamingJSONBody:
+    """
+    Corpo de requisição iterável: envelope JSON em bytes + imagens em base64 aos blocos.
+    Pode ser iterado de novo (retry/hedge) e informa len() para o Content-Length.
+    """
+
+    def __init__(self, payload: Any):
+        self.segments: List[Segment] = []
+        self._pending: List[bytes] = []
+        self._encode(payload)
+        self._flush()
+        self.length = sum(
+            len(seg) if isinstance(seg, bytes) else seg.encoded_length() for seg in self.segments
+        )
+
+    def _emit(self, data: bytes) -> None:
+        self._pending.append(data)
+
+    def _flush(self) -> None:
+        # Pedaços do envelope unidos uma vez por trecho entre imagens (sem concatenações repetidas)
+        if self._pending:
+            self.segments.append(b"".join(self._pending))
+            self._pending = []
+
+    @staticmethod
+    def _has_stream(value: Any) -> bool:
+        if isinstance(value, (Base64File, Base64Data)):
+            return True
+        if isinstance(value, dict):
+            return any(StreamingJSONBody._has_stream(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            return any(StreamingJSONBody._has_stream(item) for item in value)
+        return False
+
+    def _encode(self, value: Any) -> None:
+        # Mesmo formato compacto do json_codec.dumps: sem imagens, o corpo é idêntico ao do codec
+        if not self._has_stream(value):
+            # Subárvore sem imagens em streaming: uma única chamada ao codec
+            self._emit(json_codec.dumps(value))
+        elif isinstance(value, (Base64File, Base64Data)):
+            self._emit(b'"')
+            self._flush()
+            self.segments.append(value)
+            self._emit(b'"')
+        elif isinstance(value, dict):
+            self._emit(b'{')
+            for index, (key, item) in enumerate(value.items()):
+                if index:
+                    self._emit(b',')
+                self._emit(json_codec.dumps(str(key)) + b':')
+                self._encode(item)
+            self._emit(b'}')
+        else:
+            self._emit(b'[')
+            for index, item in enumerate(value):
+                if index:
+                    self._emit(b',')
+                self._encode(item)
+            self._emit(b']')
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for seg in self.segments:
+            if isinstance(seg, bytes):
+                yield seg
+            else:
+                yield from seg.iter_encoded()
+
+
+class CompressionStats:
+    """Bytes antes/depois da compressão dos corpos enviados"""
+
+    def __init__(self):
+        self.requests = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, raw_bytes: int, compressed_bytes: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.raw_bytes += raw_bytes
+            self.compressed_bytes += compressed_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "raw_bytes": self.raw_bytes,
+                "compressed_bytes": self.compressed_bytes,
+                "saved_ratio": (1 - self.compressed_bytes / self.raw_bytes) if self.raw_bytes else 0.0,
+            }
+
+
+class CompressedBody:
+    """
+    Corpo comprimido em streaming (Content-Encoding gzip ou deflate). O tamanho final só é
+    conhecido no fim, então a requisição sai com Transfer-Encoding: chunked
+    """
+
+    WBITS = {"gzip": 31, "deflate": 15}
+
+    def __init__(self, body: Union[StreamingJSONBody, str, bytes], encoding: str = "gzip",
+                 level: int = 6, stats: Optional[CompressionStats] = None):
+        if encoding not in self.WBITS:
+            raise ValueError(f"Codificação não suportada: {encoding}")
+        self.body = body
+        self.encoding = encoding
+        self.level = level
+        self.stats = stats
+
+    def _chunks(self) -> Iterable[bytes]:
+        if isinstance(self.body, str):
+            return [self.body.encode('utf-8')]
+        if isinstance(self.body, bytes):
+            return [self.body]
+        return self.body
+
+    def __iter__(self) -> Iterator[bytes]:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, self.WBITS[self.encoding])
+        raw = compressed = 0
+        for chunk in self._chunks():
+            raw += len(chunk)
+            out = compressor.compress(chunk)
+            if out:
+                compressed += len(out)
+                yield out
+        out = compressor.flush()
+        compressed += len(out)
+        yield out
+        if self.stats is not None:
+            self.stats.record(raw, compressed)
+
+
+def encode_body(payload: Any) -> Union[StreamingJSONBody, bytes]:
+    """
+    Corpo pronto para requests, serializado uma única vez: streaming quando há
+    Base64File/Base64Data, senão os bytes do próprio envelope
+    """
+    if isinstance(payload, (StreamingJSONBody, bytes)):
+        return payload
+    if not StreamingJSONBody._has_stream(payload):
+        return json_codec.dumps(payload)
+    return StreamingJSONBody(payload)
@@ -0,0 +1,244 @@
+"""
+Pool de Chaves de API por Provedor
+Distribui as requisições do lote entre várias credenciais (menos carregada,
+em rodízio), com limite de concorrência e de taxa por chave e quarentena
+temporária para chaves que recebem 401/403/429
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Any, Optional, List, Callable
+
+from rate_limiter import TokenBucket
+
+
+class KeyLease:
+    """Credencial emprestada a uma requisição; devolvida com KeyPool.release()"""
+
+    def __init__(self, key_id: str, provider: str, api_key: str, token: str = ""):
+        self.key_id = key_id
+        self.provider = provider
+        self.api_key = api_key
+        self.token = token
+
+    def credentials(self) -> Dict[str, str]:
+        return {'api_key': self.api_key, 'token': self.token}
+
+
+class _KeyState:
+    def __init__(self, key_id: str, provider: str, api_key: str, token: str,
+                 max_concurrent: int, bucket: Optional[TokenBucket]):
+        self.key_id = key_id
+        self.provider = provider
+        self.api_key = api_key
+        self.token = token
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.bucket = bucket
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.quarantined_until = 0.0
+        self.last_assigned = 0
+        self.busy_seconds = 0.0
+        self.loaded_at = time.monotonic()
+        self.last_change = self.loaded_at
+
+    def advance(self, now: float) -> None:
+        # Integral de requisições em andamento no tempo (base da utilização)
+        self.busy_seconds += self.in_flight * (now - self.last_change)
+        self.last_change = now
+
+
+class KeyPool:
+    """Chaves por provedor com escolha da menos carregada (desempate em rodízio)"""
+
+    QUARANTINE_STATUSES = (401, 403, 429)
+
+    def __init__(self, max_concurrent: Optional[Dict[str, int]] = None,
+                 rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 auth_quarantine_seconds: float = 600.0,
+                 throttle_quarantine_seconds: float = 60.0):
+        self.max_concurrent = dict(max_concurrent or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.auth_quarantine_seconds = float(auth_quarantine_seconds)
+        self.throttle_quarantine_seconds = float(throttle_quarantine_seconds)
+        self._keys: Dict[str, List[_KeyState]] = {}
+        self._assignments = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_id(provider: str, api_key: str) -> str:
+        """Identificador estável da chave (sem expor o segredo)"""
+        return f"{provider}:{hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:8]}"
+
+    @staticmethod
+    def mask(api_key: str) -> str:
+        return f"{api_key[:4]}…{api_key[-4:]}" if len(api_key) > 8 else "…"
+
+    def load(self, provider: str, credentials: List[Dict[str, str]]) -> int:
+        """
+        Define as chaves de um provedor (mantém o estado das que já existiam)
+
+        Args:
+            provider: Veta, Gemini ou WAN
+            credentials: Lista de {'api_key': ..., 'token': ...}
+
+        Returns:
+            Número de chaves carregadas
+        """
+        with self._lock:
+            existing = {state.key_id: state for state in self._keys.get(provider, [])}
+            states: List[_KeyState] = []
+            for cred in credentials:
+                api_key = (cred.get('api_key') or '').strip()
+                if not api_key:
+                    continue
+                key_id = self.key_id(provider, api_key)
+                if any(s.key_id == key_id for s in states):
+                    continue
+                state = existing.get(key_id)
+                if state is None:
+                    limit = self.rate_limits.get(provider)
+                    bucket = TokenBucket(limit.get('rate', 1.0), limit.get('burst', 1)) if limit else None
+                    state = _KeyState(key_id, provider, api_key, (cred.get('token') or '').strip(),
+                                      self.max_concurrent.get(provider, 1), bucket)
+                else:
+                    state.token = (cred.get('token') or state.token).strip()
+                states.append(state)
+            self._keys[provider] = states
+            return len(states)
+
+    def size(self, provider: str) -> int:
+        with self._lock:
+            return len(self._keys.get(provider, []))
+
+    def key_ids(self, provider: str) -> List[str]:
+        with self._lock:
+            return [state.key_id for state in self._keys.get(provider, [])]
+
+    def _eligible(self, provider: str, now_wall: float, now: float,
+                  allow: Optional[Callable[[str], bool]] = None) -> List[_KeyState]:
+        eligible = []
+        for state in self._keys.get(provider, []):
+            if state.quarantined_until > now_wall or state.in_flight >= state.max_concurrent:
+                continue
+            if state.bucket is not None and state.bucket.tokens(now) < 1.0:
+                continue
+            if allow is not None and not allow(state.key_id):
+                continue
+            eligible.append(state)
+        return eligible
+
+    def has_capacity(self, provider: str, allow: Optional[Callable[[str], bool]] = None) -> bool:
+        """Há alguma chave fora de quarentena, com vaga e com token de taxa agora?
+        `allow` filtra as chaves por critério externo (ex.: cota disponível)"""
+        with self._lock:
+            return bool(self._eligible(provider, time.time(), time.monotonic(), allow))
+
+    def max_concurrency(self, provider: str) -> int:
+        """Soma das vagas das chaves fora de quarentena"""
+        with self._lock:
+            now_wall = time.time()
+            return sum(s.max_concurrent for s in self._keys.get(provider, []) if s.quarantined_until <= now_wall)
+
+    def acquire(self, provider: str, prefer: Optional[str] = None,
+                allow: Optional[Callable[[str], bool]] = None) -> Optional[KeyLease]:
+        """
+        Empresta a chave menos carregada (sem bloquear)
+
+        Args:
+            provider: Provedor da requisição
+            prefer: key_id a usar se estiver elegível (ex.: operação criada com ela)
+            allow: Filtro externo por key_id (ex.: cota disponível)
+
+        Returns:
+            KeyLease ou None quando nenhuma chave está disponível agora
+        """
+        with self._lock:
+            now_wall, now = time.time(), time.monotonic()
+            eligible = self._eligible(provider, now_wall, now, allow)
+            if not eligible:
+                return None
+            preferred = [s for s in eligible if s.key_id == prefer]
+            if preferred:
+                state = preferred[0]
+            else:
+                state = min(eligible, key=lambda s: (s.in_flight / s.max_concurrent, s.last_assigned))
+            if state.bucket is not None:
+                state.bucket.try_take(now)
+            state.advance(now)
+            state.in_flight += 1
+            state.requests += 1
+            self._assignments += 1
+            state.last_assigned = self._assignments
+            return KeyLease(state.key_id, provider, state.api_key, state.token)
+
+    def _find(self, key_id: str) -> Optional[_KeyState]:
+        for states in self._keys.values():
+            for state in states:
+                if state.key_id == key_id:
+                    return state
+        return None
+
+    def release(self, lease: Optional[KeyLease], status_code: Optional[int] = None,
+                retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Devolve a chave; 401/403/429 colocam a chave em quarentena
+
+        Returns:
+            Segundos de quarentena aplicados (None quando não houve)
+        """
+        if lease is None:
+            return None
+        with self._lock:
+            state = self._find(lease.key_id)
+            if state is None:
+                return None
+            state.advance(time.monotonic())
+            state.in_flight = max(0, state.in_flight - 1)
+            if status_code in self.QUARANTINE_STATUSES:
+                state.errors += 1
+                if status_code == 429:
+                    seconds = max(self.throttle_quarantine_seconds, retry_after or 0.0)
+                else:
+                    seconds = self.auth_quarantine_seconds
+                state.quarantined_until = max(state.quarantined_until, time.time() + seconds)
+                return seconds
+            return None
+
+    def credentials(self, provider: str, key_id: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Credenciais de uma chave específica ou da primeira chave do provedor (sem emprestar)"""
+        with self._lock:
+            states = self._keys.get(provider, [])
+            for state in states:
+                if key_id is None or state.key_id == key_id:
+                    return {'api_key': state.api_key, 'token': state.token}
+            return None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna o estado por chave
+
+        Returns:
+            Dicionário key_id -> {'provider', 'label', 'in_flight', 'max_concurrent', 'requests',
+            'errors', 'quarantined_for', 'utilization'}
+        """
+        with self._lock:
+            now_wall, now = time.time(), time.monotonic()
+            stats: Dict[str, Dict[str, Any]] = {}
+            for provider, states in self._keys.items():
+                for state in states:
+                    state.advance(now)
+                    elapsed = max(1e-6, now - state.loaded_at)
+                    stats[state.key_id] = {
+                        "provider": provider,
+                        "label": self.mask(state.api_key),
+                        "in_flight": state.in_flight,
+                        "max_concurrent": state.max_concurrent,
+                        "requests": state.requests,
+                        "errors": state.errors,
+                        "quarantined_for": max(0.0, state.quarantined_until - now_wall),
+                        "utilization": state.busy_seconds / (state.max_concurrent * elapsed),
+                    }
+            return stats
@@ -0,0 +1,118 @@
+"""
+Prefetch de Payloads do Lote
+Monta em segundo plano o payload dos próximos prompts pendentes enquanto os slots
+estão ocupados; quando um slot libera, o worker recebe o payload pronto e vai
+direto para a requisição
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError
+from typing import Dict, Any, Optional, Callable, Hashable, Iterable, List, Tuple
+
+
+class PayloadPrefetcher:
+    """Janela limitada de payloads prontos por prompt, invalidados quando o prompt muda"""
+
+    def __init__(self, build: Callable[[Any], Any], fingerprint: Callable[[Any], Hashable],
+                 depth: int = 3, workers: int = 1):
+        """
+        Args:
+            build: Monta o payload de um PromptItem (roda no pool de prefetch)
+            fingerprint: Identifica o conteúdo do prompt usado no payload (texto, imagem, formato...)
+            depth: Quantos prompts pendentes manter prontos além dos que já estão em envio
+            workers: Threads do pool de prefetch
+        """
+        self.build = build
+        self.fingerprint = fingerprint
+        self.depth = max(0, int(depth))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="Prefetch")
+        self._entries: Dict[str, Tuple[Hashable, Future]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._invalidated = 0
+        self._lock = threading.Lock()
+
+    def schedule(self, prompts: List[Any], keep: Iterable[str] = ()) -> int:
+        """
+        Garante payloads em preparo para os `depth` primeiros prompts da lista
+
+        Args:
+            prompts: Prompts pendentes na ordem de despacho
+            keep: IDs cujos payloads devem ser mantidos mesmo fora da janela (já despachados)
+
+        Returns:
+            Número de novos payloads agendados
+        """
+        if self.depth <= 0:
+            return 0
+        window = prompts[:self.depth]
+        keep_ids = set(keep) | {p.id for p in window}
+        scheduled = 0
+        with self._lock:
+            # Fora da janela e não despachado (removido, reordenado, pausado): libera a memória
+            for prompt_id in [pid for pid in self._entries if pid not in keep_ids]:
+                self._entries.pop(prompt_id)[1].cancel()
+            for prompt in window:
+                fingerprint = self.fingerprint(prompt)
+                entry = self._entries.get(prompt.id)
+                if entry is not None and entry[0] == fingerprint:
+                    continue
+                if entry is not None:
+                    entry[1].cancel()
+                self._entries[prompt.id] = (fingerprint, self._executor.submit(self.build, prompt))
+                scheduled += 1
+        return scheduled
+
+    def take(self, prompt: Any) -> Optional[Any]:
+        """
+        Retira o payload pronto do prompt (espera se ainda estiver em preparo)
+
+        Returns:
+            Payload ou None quando não há prefetch válido (o chamador monta na hora)
+        """
+        with self._lock:
+            entry = self._entries.pop(prompt.id, None)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] != self.fingerprint(prompt):
+                entry[1].cancel()
+                self._stale += 1
+                return None
+        try:
+            payload = entry[1].result()
+        except (CancelledError, Exception):
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return payload
+
+    def invalidate(self, prompt_id: str) -> None:
+        """Descarta o payload de um prompt editado ou removido"""
+        with self._lock:
+            entry = self._entries.pop(prompt_id, None)
+            if entry is not None:
+                entry[1].cancel()
+                self._invalidated += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, future in self._entries.values():
+                future.cancel()
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            taken = self._hits + self._misses + self._stale
+            return {
+                "ready": sum(1 for _, future in self._entries.values() if future.done()),
+                "pending": sum(1 for _, future in self._entries.values() if not future.done()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "invalidated": self._invalidated,
+                "hit_rate": (self._hits / taken * 100) if taken else 0.0,
+            }
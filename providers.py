@@ -0,0 +1,506 @@
+"""
+Provedores de Geração por Operação Longa (Gemini Veo e WAN/DashScope)
+Separa a submissão (criação da operação) do acompanhamento: um único
+rastreador consulta todas as operações pendentes e notifica a conclusão
+"""
+
+import threading
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Callable, Any, List, Union
+import config
+import json_codec
+from rate_limiter import RateLimitCancelled
+from results import SUCCESS_STATUSES, FAILURE_STATUSES
+from retry_policy import RetryPolicy, parse_retry_after
+
+
+LRO_PROVIDERS = ("Gemini", "WAN")
+
+
+class ProviderError(Exception):
+    """Erro ao criar ou consultar uma operação no provedor"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Indica se vale a pena tentar novamente (rede, 408, 429 ou 5xx)"""
+        return RetryPolicy.is_retryable_status(self.status_code)
+
+
+# ==================== GEMINI (VEO) ====================
+
+def gemini_headers(api_key: str) -> Dict[str, str]:
+    headers = dict(config.GEMINI_HEADERS)
+    headers["x-goog-api-key"] = api_key
+    return headers
+
+
+def build_gemini_payload(prompt_text: str, aspect: Optional[str] = None) -> Dict[str, Any]:
+    """Monta o corpo do predictLongRunning (16:9 é o default do modelo)"""
+    payload: Dict[str, Any] = {"instances": [{"prompt": prompt_text}]}
+    if aspect and aspect != "16:9":
+        payload["parameters"] = {"aspectRatio": aspect}
+    return payload
+
+
+def gemini_start_operation(http, api_key: str, payload: Union[Dict[str, Any], bytes]) -> str:
+    """
+    Inicia uma operação Veo e retorna o nome da operação (payload em dict ou já serializado)
+
+    Raises:
+        ProviderError: Se a criação falhar ou a resposta não tiver operação
+    """
+    try:
+        resp = http.post(config.GEMINI_VEO_START_URL, headers=gemini_headers(api_key),
+                         data=payload if isinstance(payload, bytes) else json_codec.dumps(payload), timeout=config.REQUEST_TIMEOUT)
+    except RateLimitCancelled:
+        raise
+    except Exception as e:
+        raise ProviderError(f"Falha de conexão ao iniciar operação: {e}")
+    if resp.status_code not in (200, 201):
+        raise ProviderError(f"HTTP {resp.status_code} - {resp.text[:300]}", resp.status_code,
+                            parse_retry_after(resp.headers.get("Retry-After")))
+    try:
+        op = json_codec.response_json(resp)
+    except Exception:
+        raise ProviderError(f"Resposta inválida: {resp.text[:300]}", resp.status_code)
+    op_name = op.get("name") or op.get("operation")
+    if not op_name:
+        raise ProviderError(f"Resposta sem nome de operação: {op}", resp.status_code)
+    return op_name
+
+
+def gemini_poll_url(op_name: str) -> str:
+    if op_name.startswith("http"):
+        return op_name
+    return f"{config.GEMINI_API_BASE}/{op_name.lstrip('/')}"
+
+
+def parse_gemini_operation(op_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Interpreta o estado da operação: {'status': running|succeeded|failed, 'video_url', 'error'}"""
+    if op_state.get("done") is not True:
+        return {"status": "running", "video_url": None, "error": None}
+    if op_state.get("error"):
+        return {"status": "failed", "video_url": None, "error": str(op_state.get("error"))}
+    resp = op_state.get("response") or {}
+    video_uri = None
+    try:
+        gen = resp.get("generated_videos") or []
+        if gen:
+            vid_obj = gen[0].get("video") or {}
+            video_uri = vid_obj.get("uri") or vid_obj.get("videoUri")
+            if not video_uri and isinstance(vid_obj, dict):
+                inner = vid_obj.get("video") or {}
+                if isinstance(inner, dict):
+                    video_uri = inner.get("uri") or inner.get("videoUri")
+    except Exception:
+        video_uri = None
+    if not video_uri:
+        return {"status": "failed", "video_url": None,
+                "error": f"Operação concluída sem URI do vídeo: {json_codec.dumps_text(op_state)[:400]}"}
+    return {"status": "succeeded", "video_url": video_uri, "error": None}
+
+
+# ==================== WAN (DASHSCOPE) ====================
+
+def wan_headers(api_key: str) -> Dict[str, str]:
+    headers = dict(config.WAN_HEADERS_BASE)
+    headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def build_wan_payload(prompt_text: str, aspect: Optional[str] = None) -> Dict[str, Any]:
+    """Monta o payload mínimo de T2V (sem imagem de referência local)"""
+    payload: Dict[str, Any] = {
+        "model": config.WAN_DEFAULT_T2V_MODEL,
+        "input": {"prompt": prompt_text}
+    }
+    if aspect == "9:16":
+        payload["parameters"] = {"size": config.WAN_VERTICAL_SIZE}
+    return payload
+
+
+def wan_create_task(http, api_key: str, payload: Union[Dict[str, Any], bytes]) -> str:
+    """
+    Cria uma tarefa de video-synthesis e retorna o task_id (payload em dict ou já serializado)
+
+    Raises:
+        ProviderError: Se a criação falhar ou o task_id não vier na resposta
+    """
+    try:
+        resp = http.post(config.WAN_VIDEO_CREATE_URL, headers=wan_headers(api_key),
+                         data=payload if isinstance(payload, bytes) else json_codec.dumps(payload), timeout=config.REQUEST_TIMEOUT)
+    except RateLimitCancelled:
+        raise
+    except Exception as e:
+        raise ProviderError(f"Falha de conexão ao criar tarefa: {e}")
+    if resp.status_code not in (200, 201, 202):
+        raise ProviderError(f"HTTP {resp.status_code} - {resp.text[:300]}", resp.status_code,
+                            parse_retry_after(resp.headers.get("Retry-After")))
+    try:
+        create_json = json_codec.response_json(resp)
+    except Exception:
+        create_json = {}
+    task_id = (
+        (create_json.get("output") or {}).get("task_id")
+        or create_json.get("task_id")
+        or create_json.get("id")
+    )
+    if not task_id:
+        raise ProviderError(f"task_id não encontrado: {resp.text[:400]}", resp.status_code)
+    return task_id
+
+
+def wan_poll_url(task_id: str) -> str:
+    return config.WAN_TASK_QUERY_URL.format(task_id=task_id)
+
+
+def _find_url(obj: Any) -> Optional[str]:
+    if isinstance(obj, str) and obj.startswith("http"):
+        return obj
+    if isinstance(obj, dict):
+        for v in obj.values():
+            u = _find_url(v)
+            if u:
+                return u
+    if isinstance(obj, list):
+        for v in obj:
+            u = _find_url(v)
+            if u:
+                return u
+    return None
+
+
+def parse_wan_task(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Interpreta o estado da tarefa WAN de forma resiliente"""
+    out = state.get("output") or {}
+    raw_status = (
+        out.get("status")
+        or state.get("status")
+        or out.get("task_status")
+        or state.get("task_status")
+        or out.get("phase")
+        or state.get("phase")
+    )
+    progress = (
+        out.get("progress")
+        or out.get("percent")
+        or out.get("progress_percent")
+        or out.get("progress_in_percent")
+        or out.get("task_progress")
+        or out.get("stage")
+    )
+    result = {"status": "running", "raw_status": raw_status, "progress": progress,
+              "video_url": None, "error": None}
+    status = str(raw_status).lower() if raw_status else ""
+    if status in SUCCESS_STATUSES:
+        video_url = (
+            out.get("video_url") or out.get("url") or out.get("result_url")
+            or out.get("video") or out.get("result")
+        )
+        if not isinstance(video_url, str):
+            video_url = _find_url(out)
+        if video_url:
+            result.update(status="succeeded", video_url=video_url)
+        else:
+            result.update(status="failed",
+                          error=f"Tarefa concluída sem URL do vídeo: {json_codec.dumps_text(state)[:400]}")
+    elif status in FAILURE_STATUSES:
+        code = state.get("code") or out.get("code")
+        message = state.get("message") or out.get("message")
+        result.update(status="failed", error=f"Tarefa falhou no WAN ({code}): {message}")
+    return result
+
+
+# ==================== AGENDADOR ADAPTATIVO DE POLLING ====================
+
+def operation_profile(provider: str, aspect: Optional[str] = None) -> str:
+    """Chave de aprendizado dos tempos de conclusão: provedor/modelo/formato"""
+    model = config.GEMINI_VEO_MODEL if provider == "Gemini" else config.WAN_DEFAULT_T2V_MODEL
+    return f"{provider}/{model}/{aspect or '16:9'}"
+
+
+class PollScheduler:
+    """Decide quando consultar cada operação a partir dos tempos de conclusão observados.
+
+    Sem histórico, mantém o intervalo fixo. Com histórico, dorme até o início da
+    janela provável (p10), consulta de forma densa até o p90 e depois recua
+    gradualmente. Falhas da própria consulta ficam com a RetryPolicy do rastreador.
+    """
+
+    MIN_SAMPLES = 3
+
+    def __init__(self, stats_file: Optional[str] = None, max_samples: int = 50):
+        self.stats_file = stats_file
+        self.max_samples = max_samples
+        self._samples: Dict[str, List[float]] = {}
+        self._jobs: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.stats_file or not os.path.isfile(self.stats_file):
+            return
+        try:
+            data = json_codec.load_file(self.stats_file)
+            self._samples = {k: [float(x) for x in v][-self.max_samples:] for k, v in (data.get("samples") or {}).items()}
+        except Exception:
+            self._samples = {}
+
+    def _save(self) -> None:
+        if not self.stats_file:
+            return
+        try:
+            json_codec.dump_file({"samples": self._samples}, self.stats_file)
+        except Exception:
+            pass
+
+    def window(self, profile: str) -> Optional[Dict[str, float]]:
+        """Retorna p10/p50/p90 dos tempos de conclusão do perfil (None sem histórico suficiente)"""
+        with self._lock:
+            samples = sorted(self._samples.get(profile, []))
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+
+        def q(frac: float) -> float:
+            return samples[int(round(frac * (len(samples) - 1)))]
+
+        return {"p10": q(0.1), "p50": q(0.5), "p90": q(0.9), "samples": len(samples)}
+
+    def next_delay(self, profile: str, elapsed: float) -> float:
+        """
+        Calcula quantos segundos esperar até a próxima consulta
+
+        Args:
+            profile: Perfil da operação (provedor/modelo/formato)
+            elapsed: Segundos desde a submissão
+        """
+        win = self.window(profile)
+        if win is None:
+            if elapsed > getattr(config, "THREAD_TIMEOUT", 600):
+                return config.LRO_SLOW_POLL_INTERVAL
+            return config.LRO_POLL_INTERVAL
+
+        dense = config.LRO_DENSE_POLL_INTERVAL
+        if elapsed < win["p10"] - dense:
+            # Dormir até o início da janela provável de conclusão
+            return win["p10"] - elapsed
+        if elapsed <= win["p90"]:
+            return dense
+        # Além da janela conhecida: recuar aos poucos até o intervalo lento
+        return min(config.LRO_SLOW_POLL_INTERVAL, dense + (elapsed - win["p90"]) * 0.25)
+
+    def record_job(self, profile: str, polls: int, completion_estimate: Optional[float],
+                   detection_lag: float) -> None:
+        """Registra métricas de um job finalizado e aprende o tempo de conclusão (se sucesso)"""
+        with self._lock:
+            if completion_estimate is not None:
+                samples = self._samples.setdefault(profile, [])
+                samples.append(round(completion_estimate, 1))
+                del samples[:-self.max_samples]
+                self._save()
+            self._jobs.append({"profile": profile, "polls": polls, "lag": detection_lag})
+            del self._jobs[:-200]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resumo das consultas por job e do atraso de detecção"""
+        with self._lock:
+            jobs = list(self._jobs)
+            profiles = list(self._samples.keys())
+        stats: Dict[str, Any] = {
+            "jobs": len(jobs),
+            "avg_polls": (sum(j["polls"] for j in jobs) / len(jobs)) if jobs else 0.0,
+            "avg_lag": (sum(j["lag"] for j in jobs) / len(jobs)) if jobs else 0.0,
+            "profiles": {},
+        }
+        for profile in profiles:
+            stats["profiles"][profile] = self.window(profile)
+        return stats
+
+
+# ==================== RASTREADOR COMPARTILHADO ====================
+
+@dataclass
+class PendingOperation:
+    """Operação longa submetida e aguardando conclusão no provedor"""
+    prompt_id: str
+    provider: str
+    handle: str
+    poll_url: str
+    headers: Dict[str, str]
+    on_done: Callable[[str, Dict[str, Any]], None]
+    profile: str = ""
+    submitted_at: float = field(default_factory=time.time)
+    next_poll_at: float = 0.0
+    last_poll_at: float = 0.0
+    polls: int = 0
+    error_streak: int = 0
+    backoff: float = 0.0
+    last_status: Optional[str] = None
+
+
+class OperationTracker:
+    """Agenda em uma única thread as consultas de todas as operações Gemini/WAN pendentes;
+    as consultas vencidas rodam em paralelo em um pool pequeno"""
+
+    def __init__(self, http, log: Optional[Callable] = None, scheduler: Optional[PollScheduler] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.http = http
+        self._log = log or (lambda message, level="INFO": print(message))
+        self.scheduler = scheduler or PollScheduler(stats_file=getattr(config, 'LRO_STATS_FILE', None))
+        # Consultas com falha (429/5xx/rede): backoff com jitter, sem orçamento (o polling não pode parar)
+        self.retry_policy = retry_policy or RetryPolicy(base_delay=config.LRO_POLL_INTERVAL,
+                                                        max_delay=config.LRO_MAX_BACKOFF)
+        self.max_inflight: Dict[str, int] = {
+            "Gemini": getattr(config, 'GEMINI_MAX_INFLIGHT_OPERATIONS', 4),
+            "WAN": getattr(config, 'WAN_MAX_INFLIGHT_TASKS', 4),
+        }
+        self._operations: Dict[str, PendingOperation] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # Callbacks de conclusão podem baixar vídeos; não bloquear o polling
+        self._callback_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="LRODone")
+        # Consulta lenta (ou à espera do limite de taxa) não atrasa as demais operações vencidas
+        self._poll_executor = ThreadPoolExecutor(max_workers=max(1, getattr(config, 'LRO_POLL_WORKERS', 4)),
+                                                 thread_name_prefix="LROPoll")
+        self._polling: set = set()
+
+    def track(self, operation: PendingOperation) -> None:
+        """Passa a acompanhar uma operação já submetida"""
+        with self._cond:
+            if not operation.profile:
+                operation.profile = operation_profile(operation.provider)
+            if not operation.next_poll_at:
+                operation.next_poll_at = operation.submitted_at + self.scheduler.next_delay(operation.profile, 0.0)
+            operation.last_poll_at = operation.submitted_at
+            self._operations[operation.handle] = operation
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="LROTracker")
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pending_count(self, provider: Optional[str] = None) -> int:
+        with self._cond:
+            return sum(1 for op in self._operations.values() if provider is None or op.provider == provider)
+
+    def cancel_prompts(self, prompt_ids: List[str]) -> List[str]:
+        """Deixa de acompanhar as operações dos prompts informados; retorna os prompts que tinham operação"""
+        ids = set(prompt_ids)
+        with self._cond:
+            handles = [h for h, op in self._operations.items() if op.prompt_id in ids]
+            return [self._operations.pop(h).prompt_id for h in handles]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                # Operação já em consulta só volta ao agendamento quando a consulta termina
+                idle = [op for op in self._operations.values() if op.handle not in self._polling]
+                if not idle:
+                    self._cond.wait()
+                    continue
+                now = time.time()
+                next_due = min(op.next_poll_at for op in idle)
+                if next_due > now:
+                    self._cond.wait(timeout=next_due - now)
+                    continue
+                due = [op for op in idle if op.next_poll_at <= now]
+                self._polling.update(op.handle for op in due)
+            for op in due:
+                self._poll_executor.submit(self._poll_task, op)
+
+    def _poll_task(self, op: PendingOperation) -> None:
+        try:
+            self._poll(op)
+        except Exception as e:
+            self._log(f"❌ [LRO] Erro ao consultar {op.prompt_id}: {e}", "ERROR")
+        finally:
+            with self._cond:
+                self._polling.discard(op.handle)
+                self._cond.notify_all()
+
+    def _max_wait(self, provider: str) -> float:
+        if provider == "WAN":
+            return getattr(config, "WAN_MAX_WAIT_SECONDS", 1800)
+        return getattr(config, "GEMINI_MAX_WAIT_SECONDS", 1800)
+
+    def _poll(self, op: PendingOperation) -> None:
+        op.polls += 1
+        poll_started = time.time()
+        parsed: Optional[Dict[str, Any]] = None
+        retry_after: Optional[float] = None
+        failed_poll = False
+        try:
+            resp = self.http.get(op.poll_url, headers=op.headers, timeout=config.LRO_POLL_TIMEOUT)
+            if resp.status_code not in (200, 201):
+                self._log(f"⚠️ [LRO] {op.provider} {op.prompt_id}: falha no polling {resp.status_code} - {resp.text[:200]}", "WARNING")
+                failed_poll = RetryPolicy.is_retryable_status(resp.status_code)
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            else:
+                state = json_codec.response_json(resp)
+                parsed = parse_gemini_operation(state) if op.provider == "Gemini" else parse_wan_task(state)
+                if op.provider == "WAN":
+                    progress = parsed.get("progress") or "(não informado)"
+                    self._log(f"📊 [LRO] WAN {op.prompt_id}: status={parsed.get('raw_status')} progresso={progress}")
+                    if parsed.get("raw_status") is None:
+                        self._log(f"🧪 [LRO] WAN {op.prompt_id}: status ausente, estado compacto: {json_codec.dumps_text(state)[:500]}")
+        except Exception as e:
+            failed_poll = True
+            self._log(f"⚠️ [LRO] {op.provider} {op.prompt_id}: erro no polling: {e}", "WARNING")
+
+        now = time.time()
+        elapsed = now - op.submitted_at
+        result: Optional[Dict[str, Any]] = None
+        if parsed and parsed["status"] == "succeeded":
+            result = {'success': True, 'video_url': parsed["video_url"], 'processing_time': elapsed,
+                      'provider': op.provider}
+        elif parsed and parsed["status"] == "failed":
+            result = {'success': False, 'error': parsed["error"], 'processing_time': elapsed,
+                      'provider': op.provider}
+        elif elapsed > self._max_wait(op.provider):
+            result = {'success': False, 'processing_time': elapsed, 'provider': op.provider,
+                      'error': f"Tempo máximo de espera atingido ({int(elapsed)}s) no {op.provider}"}
+
+        with self._cond:
+            if op.handle not in self._operations:
+                # Cancelada durante a consulta
+                return
+            if result is None:
+                op.last_status = parsed.get("raw_status") if parsed else op.last_status
+                op.last_poll_at = poll_started
+                if failed_poll:
+                    op.error_streak += 1
+                    op.backoff = self.retry_policy.backoff(op.backoff, retry_after)
+                    op.next_poll_at = now + op.backoff
+                else:
+                    op.error_streak = 0
+                    op.backoff = 0.0
+                    op.next_poll_at = now + self.scheduler.next_delay(op.profile, elapsed)
+                return
+            self._operations.pop(op.handle, None)
+
+        # A conclusão ocorreu entre a consulta anterior e esta: atraso máximo = intervalo final
+        detection_lag = poll_started - op.last_poll_at
+        completion_estimate = None
+        if result['success']:
+            completion_estimate = (op.last_poll_at + poll_started) / 2 - op.submitted_at
+        self.scheduler.record_job(op.profile, op.polls, completion_estimate, detection_lag)
+        result['polls'] = op.polls
+        result['detection_lag'] = detection_lag
+        self._log(
+            f"🏁 [LRO] {op.provider} {op.prompt_id}: {'concluída' if result['success'] else 'falhou'} "
+            f"após {op.polls} consultas ({elapsed:.0f}s, atraso de detecção ≤ {detection_lag:.1f}s)"
+        )
+        self._callback_executor.submit(self._deliver, op, result)
+
+    def _deliver(self, op: PendingOperation, result: Dict[str, Any]) -> None:
+        try:
+            op.on_done(op.prompt_id, result)
+        except Exception as e:
+            self._log(f"❌ [LRO] Erro no callback de conclusão de {op.prompt_id}: {e}", "ERROR")
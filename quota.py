@@ -0,0 +1,142 @@
+"""
+Gerenciador de Cotas por Chave de API
+Conta o consumo de cada chave em janelas deslizantes configuráveis (por minuto,
+por dia, ...), persiste entre execuções e só admite trabalho com orçamento
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+import json_codec
+
+
+class QuotaManager:
+    """Controle de admissão por chave: limites por provedor, consumo persistido em JSON"""
+
+    def __init__(self, limits: Optional[Dict[str, List[List[float]]]] = None, path: Optional[str] = None):
+        """
+        Args:
+            limits: provedor -> lista de [janela_em_segundos, máximo_de_requisições] (por chave)
+            path: Arquivo de estado (None = apenas em memória)
+        """
+        self.limits: Dict[str, List[Tuple[float, int]]] = {
+            provider: [(float(window), int(limit)) for window, limit in windows]
+            for provider, windows in (limits or {}).items()
+        }
+        self.path = path
+        self._usage: Dict[str, List[float]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._providers: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            data = json_codec.load_file(self.path)
+            now = time.time()
+            for key_id, entry in data.items():
+                self._providers[key_id] = entry.get("provider", "")
+                self._usage[key_id] = [float(t) for t in entry.get("usage", [])]
+                if entry.get("blocked_until", 0) > now:
+                    self._blocked_until[key_id] = float(entry["blocked_until"])
+                self._prune(key_id, now)
+        except Exception:
+            self._usage, self._blocked_until, self._providers = {}, {}, {}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            data = {
+                key_id: {
+                    "provider": self._providers.get(key_id, ""),
+                    "usage": usage,
+                    "blocked_until": self._blocked_until.get(key_id, 0.0),
+                }
+                for key_id, usage in self._usage.items()
+            }
+            json_codec.dump_file(data, self.path)
+        except Exception:
+            pass
+
+    def _prune(self, key_id: str, now: float) -> None:
+        windows = self.limits.get(self._providers.get(key_id, ""), [])
+        horizon = max((w for w, _ in windows), default=0.0)
+        self._usage[key_id] = [t for t in self._usage.get(key_id, []) if now - t < horizon]
+
+    def _wait(self, key_id: str, provider: str, now: float) -> float:
+        """Segundos até a chave ter orçamento (0 = admite agora)"""
+        self._providers[key_id] = provider
+        self._prune(key_id, now)
+        wait = max(0.0, self._blocked_until.get(key_id, 0.0) - now)
+        usage = self._usage.get(key_id, [])
+        for window, limit in self.limits.get(provider, []):
+            in_window = [t for t in usage if now - t < window]
+            if len(in_window) >= limit:
+                # Libera quando a requisição mais antiga que excede o limite sair da janela
+                oldest = sorted(in_window)[len(in_window) - limit]
+                wait = max(wait, oldest + window - now)
+        return wait
+
+    def has_budget(self, key_id: str, provider: str) -> bool:
+        with self._lock:
+            return self._wait(key_id, provider, time.time()) <= 0
+
+    def reserve(self, key_id: str, provider: str) -> bool:
+        """Consome uma unidade da cota da chave; False quando não há orçamento"""
+        with self._lock:
+            now = time.time()
+            if self._wait(key_id, provider, now) > 0:
+                return False
+            if self.limits.get(provider):
+                self._usage.setdefault(key_id, []).append(now)
+                self._save()
+            return True
+
+    def refund(self, key_id: str, provider: str, count: int = 1) -> None:
+        """Devolve unidades reservadas que não chegaram a virar requisição (reuso, circuito aberto, cancelamento)"""
+        with self._lock:
+            usage = self._usage.get(key_id)
+            if not self.limits.get(provider) or not usage or count <= 0:
+                return
+            del usage[-count:]
+            self._save()
+
+    def block(self, key_id: str, provider: str, seconds: float) -> None:
+        """Cota esgotada informada pelo servidor (429 com Retry-After): chave suspensa por `seconds`"""
+        with self._lock:
+            self._providers[key_id] = provider
+            self._blocked_until[key_id] = max(self._blocked_until.get(key_id, 0.0), time.time() + seconds)
+            self._usage.setdefault(key_id, [])
+            self._save()
+
+    def resume_in(self, key_ids: List[str], provider: str) -> Optional[float]:
+        """Menor espera até alguma das chaves ter orçamento (None sem chaves)"""
+        with self._lock:
+            now = time.time()
+            waits = [self._wait(key_id, provider, now) for key_id in key_ids]
+            return min(waits) if waits else None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna o consumo por chave
+
+        Returns:
+            Dicionário key_id -> {'provider', 'windows': [(janela, usado, limite)], 'blocked_for'}
+        """
+        with self._lock:
+            now = time.time()
+            stats: Dict[str, Dict[str, Any]] = {}
+            for key_id, usage in self._usage.items():
+                provider = self._providers.get(key_id, "")
+                stats[key_id] = {
+                    "provider": provider,
+                    "windows": [(window, sum(1 for t in usage if now - t < window), limit)
+                                for window, limit in self.limits.get(provider, [])],
+                    "blocked_for": max(0.0, self._blocked_until.get(key_id, 0.0) - now),
+                }
+            return stats
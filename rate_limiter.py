@@ -0,0 +1,160 @@
+"""
+Limitador de Taxa por Endpoint (token bucket)
+Controla requisições/segundo e rajada por endpoint, compartilhado entre
+lote, geração individual e polling de operações longas
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class RateLimitCancelled(Exception):
+    """Espera por token interrompida (ex.: processamento em lote parado)"""
+
+
+class TokenBucket:
+    """Balde de tokens: reabastece `rate` tokens/segundo até `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = max(1e-6, float(rate))
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, now: float) -> float:
+        """Consome um token se houver; senão retorna quantos segundos faltam para o próximo"""
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def tokens(self, now: float) -> float:
+        self._refill(now)
+        return self._tokens
+
+
+class RateLimiter:
+    """Mantém um token bucket por endpoint (prefixo de URL; vence o prefixo mais longo)"""
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._cond = threading.Condition()
+        self._generation = 0
+
+    def configure(self, endpoint: str, rate: float, burst: int = 1) -> None:
+        """
+        Define (ou redefine) o limite de um endpoint
+
+        Args:
+            endpoint: Prefixo de URL (ex.: "https://dashscope-intl.aliyuncs.com/api/v1")
+            rate: Requisições por segundo
+            burst: Requisições permitidas em rajada
+        """
+        with self._cond:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                self._buckets[endpoint] = TokenBucket(rate, burst)
+                self._stats.setdefault(endpoint, {"requests": 0, "waits": 0, "total_wait": 0.0, "last_wait": 0.0})
+            else:
+                bucket.rate = max(1e-6, float(rate))
+                bucket.burst = max(1, int(burst))
+            self._cond.notify_all()
+
+    def remove(self, endpoint: str) -> None:
+        """Remove o limite de um endpoint"""
+        with self._cond:
+            self._buckets.pop(endpoint, None)
+            self._stats.pop(endpoint, None)
+            self._cond.notify_all()
+
+    def _match(self, url: str) -> Optional[str]:
+        best = None
+        for endpoint in self._buckets:
+            if url.startswith(endpoint) and (best is None or len(endpoint) > len(best)):
+                best = endpoint
+        return best
+
+    def acquire(self, url: str) -> float:
+        """
+        Bloqueia até haver token para o endpoint da URL
+
+        Returns:
+            Segundos esperados (0.0 quando a URL não tem limite)
+
+        Raises:
+            RateLimitCancelled: se cancel_waits() for chamado durante a espera
+        """
+        start = time.monotonic()
+        with self._cond:
+            generation = self._generation
+            blocked = False
+            while True:
+                if generation != self._generation:
+                    raise RateLimitCancelled("Espera por limite de taxa cancelada")
+                endpoint = self._match(url)
+                if endpoint is None:
+                    return 0.0
+                now = time.monotonic()
+                wait = self._buckets[endpoint].try_take(now)
+                if wait <= 0:
+                    waited = now - start
+                    stats = self._stats[endpoint]
+                    stats["requests"] += 1
+                    stats["last_wait"] = waited
+                    if blocked:
+                        stats["waits"] += 1
+                        stats["total_wait"] += waited
+                    return waited
+                blocked = True
+                self._cond.wait(timeout=wait)
+
+    def wait_time(self, url: str) -> float:
+        """Segundos até haver token para a URL, sem consumir (0.0 quando livre ou sem limite)"""
+        with self._cond:
+            endpoint = self._match(url)
+            if endpoint is None:
+                return 0.0
+            bucket = self._buckets[endpoint]
+            tokens = bucket.tokens(time.monotonic())
+            return 0.0 if tokens >= 1.0 else (1.0 - tokens) / bucket.rate
+
+    def cancel_waits(self) -> None:
+        """Acorda todas as threads aguardando token com RateLimitCancelled"""
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna o estado por endpoint
+
+        Returns:
+            Dicionário endpoint -> {'rate', 'burst', 'tokens', 'next_wait', 'requests',
+            'waits', 'avg_wait', 'last_wait'}
+        """
+        with self._cond:
+            now = time.monotonic()
+            stats: Dict[str, Dict[str, Any]] = {}
+            for endpoint, bucket in self._buckets.items():
+                tokens = bucket.tokens(now)
+                counters = self._stats.get(endpoint, {})
+                waits = int(counters.get("waits", 0))
+                stats[endpoint] = {
+                    "rate": bucket.rate,
+                    "burst": bucket.burst,
+                    "tokens": tokens,
+                    "next_wait": 0.0 if tokens >= 1.0 else (1.0 - tokens) / bucket.rate,
+                    "requests": int(counters.get("requests", 0)),
+                    "waits": waits,
+                    "avg_wait": (counters.get("total_wait", 0.0) / waits) if waits else 0.0,
+                    "last_wait": counters.get("last_wait", 0.0),
+                }
+            return stats
+
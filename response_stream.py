@@ -0,0 +1,154 @@
+"""
+Respostas em Streaming
+Identifica o corpo das respostas do webhook pelo primeiro bloco (magic bytes de
+MP4/QuickTime/WebM/AVI, início de JSON e Content-Type) sem carregá-lo inteiro:
+vídeos vão direto para o disco em blocos e só corpos pequenos (JSON, link,
+texto) são lidos em memória. A memória por worker não depende do tamanho do vídeo
+"""
+
+import os
+from typing import Iterator
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Bytes mínimos do primeiro bloco: assinatura do formato + prévia para os logs
+SNIFF_BYTES = 512
+
+_VIDEO_SIGNATURES = (
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),  # WebM/Matroska (EBML)
+    (4, b"ftyp", "video/mp4"),               # MP4/MOV/3GP (ISO BMFF)
+    (4, b"moov", "video/quicktime"),
+    (4, b"mdat", "video/quicktime"),
+    (4, b"wide", "video/quicktime"),
+    (4, b"free", "video/quicktime"),
+)
+
+
+def sniff_body(head: bytes, content_type: str = "") -> str:
+    """
+    Tipo do corpo pelo primeiro bloco
+
+    Returns:
+        "video", "json", "text" ou "binary" (bytes não textuais sem assinatura de vídeo)
+    """
+    for offset, signature, _ in _VIDEO_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return "video"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video"
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if stripped[:1] in (b"{", b"["):
+        return "json"
+    if content_type.lower().startswith("video/"):
+        return "video"
+    if any(byte < 32 and byte not in (9, 10, 13) for byte in head[:100]):
+        return "binary"
+    return "text"
+
+
+def video_mime(head: bytes) -> str:
+    for offset, signature, mime in _VIDEO_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video/x-msvideo"
+    return "application/octet-stream"
+
+
+class ResponseBody:
+    """Corpo de uma resposta requests aberta com stream=True, lido sob demanda"""
+
+    def __init__(self, response, chunk_size: int = STREAM_CHUNK_SIZE):
+        self.response = response
+        self.content_type = response.headers.get('content-type', '')
+        self._chunks: Iterator[bytes] = response.iter_content(chunk_size=chunk_size)
+        self.head = self._read_head()
+        self.kind = sniff_body(self.head, self.content_type)
+
+    def _read_head(self) -> bytes:
+        parts = []
+        size = 0
+        for chunk in self._chunks:
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= SNIFF_BYTES:
+                break
+        return b"".join(parts)
+
+    @property
+    def is_binary(self) -> bool:
+        return self.kind in ("video", "binary")
+
+    @property
+    def declared_length(self) -> str:
+        return self.response.headers.get('Content-Length', 'chunked')
+
+    def preview(self, limit: int = 200) -> str:
+        """Início do corpo como texto (apenas para logs)"""
+        return self.head[:limit].decode('utf-8', errors='replace')
+
+    def read_bytes(self, limit: int) -> bytes:
+        """
+        Corpo inteiro em memória (JSON/texto)
+
+        Raises:
+            ValueError: Corpo maior que `limit` (a conexão é descartada)
+        """
+        parts = [self.head]
+        size = len(self.head)
+        for chunk in self._chunks:
+            size += len(chunk)
+            if size > limit:
+                self.response.close()
+                raise ValueError(f"resposta maior que {limit // 1024} KB para ser lida em memória")
+            parts.append(chunk)
+        return b"".join(parts)
+
+    def read_text(self, limit: int) -> str:
+        return self.read_bytes(limit).decode('utf-8', errors='replace')
+
+    def save_to(self, path: str) -> int:
+        """
+        Grava o corpo no arquivo bloco a bloco (arquivo .part até terminar)
+
+        Returns:
+            Bytes gravados
+        """
+        tmp_path = f"{path}.part"
+        written = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.head)
+                written += len(self.head)
+                for chunk in self._chunks:
+                    if chunk:
+                        f.write(chunk)
+                        written += len(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self.response.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return written
+
+    def close(self) -> None:
+        self.response.close()
+
+
+def read_preview(response, limit: int = 200, drain_bytes: int = STREAM_CHUNK_SIZE) -> str:
+    """
+    Início do corpo de uma resposta (ex.: erro HTTP) para logs. Corpos pequenos são
+    lidos até o fim para a conexão voltar ao pool; maiores têm a conexão descartada
+    """
+    try:
+        body = ResponseBody(response)
+        preview = body.preview(limit)
+        try:
+            body.read_bytes(drain_bytes)
+        except ValueError:
+            pass
+        return preview
+    except Exception:
+        return ""
+    finally:
+        response.close()
@@ -0,0 +1,75 @@
+"""
+Interpretação de Resultados de Geração
+Status e formatos de resultado compartilhados pelos caminhos que recebem a
+resposta de uma geração: resposta síncrona do webhook, callback, itens do envio
+em bloco e estado das operações Gemini/WAN
+"""
+
+from typing import Dict, Any, Optional
+
+import json_codec
+
+SUCCESS_STATUSES = ("succeeded", "success", "completed", "done", "finished")
+FAILURE_STATUSES = ("failed", "error", "canceled", "cancelled")
+
+
+def parse_language_videos(data: Any) -> Dict[str, str]:
+    """
+    Vídeos por idioma de uma geração multi-idioma (fan-out): {"videos": {"pt": url, ...}}
+    ou {"videos": [{"language": "pt", "video_url": url}, ...]}. Vazio quando não há
+    """
+    videos = data.get('videos') if isinstance(data, dict) else None
+    if isinstance(videos, dict):
+        return {str(lang): url for lang, url in videos.items() if isinstance(url, str) and url}
+    result: Dict[str, str] = {}
+    if isinstance(videos, list):
+        for entry in videos:
+            if not isinstance(entry, dict):
+                continue
+            lang = entry.get('language') or entry.get('lang') or entry.get('idioma')
+            url = entry.get('video_url') or entry.get('url') or entry.get('link')
+            if lang and isinstance(url, str) and url:
+                result[str(lang)] = url
+    return result
+
+
+def parse_video_result(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Sucesso ou falha informados em um resultado JSON (video_url/url/link, videos por idioma,
+    status, error). None quando o resultado não traz vídeo nem falha
+    """
+    videos = parse_language_videos(data)
+    video_url = data.get('video_url') or data.get('url') or data.get('link') or next(iter(videos.values()), None)
+    status = str(data.get('status', '')).lower()
+    if video_url and status not in FAILURE_STATUSES:
+        result = {'success': True, 'video_url': video_url}
+        if videos:
+            result['language_videos'] = videos
+        return result
+    if data.get('error') or status in FAILURE_STATUSES:
+        return {'success': False, 'error': data.get('error') or status}
+    return None
+
+
+def parse_callback_result(raw: bytes) -> Dict[str, Any]:
+    """
+    Resultado no formato das respostas síncronas do webhook (video_url/url/link) ou erro
+
+    Raises:
+        ValueError: Corpo sem URL do vídeo nem erro
+    """
+    text = raw.decode('utf-8', errors='replace').strip()
+    if text.startswith('http'):
+        return {'success': True, 'video_url': text}
+    try:
+        data = json_codec.loads(raw)
+    except json_codec.JSONDecodeError:
+        raise ValueError("corpo não é JSON nem URL de vídeo")
+    if not isinstance(data, dict):
+        raise ValueError("JSON do corpo deve ser um objeto")
+    result = parse_video_result(data)
+    if result is None:
+        raise ValueError("video_url ausente")
+    if not result['success']:
+        result['error'] = f"Webhook informou falha: {result['error']}"
+    return result
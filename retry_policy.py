@@ -0,0 +1,116 @@
+"""
+Política de Retry Compartilhada
+Backoff exponencial com jitter decorrelacionado, respeito ao Retry-After e
+orçamento global de retries (limita a amplificação durante quedas)
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos; None se ausente/inválido"""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class RetryBudget:
+    """Orçamento de retries: cada requisição original deposita `ratio` tokens e cada retry consome 1"""
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = max(0.0, float(ratio))
+        self.max_tokens = max(1.0, float(max_tokens))
+        self._tokens = self.max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class RetryPolicy:
+    """Decide se e quando tentar novamente; reutilizável por lote, individual, download e polling"""
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0,
+                 budget: Optional[RetryBudget] = None, max_retry_after: Optional[float] = None):
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+        self.budget = budget
+        self.max_retry_after = max_retry_after
+        self._requests = 0
+        self._retries = 0
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_retryable_status(status_code: Optional[int]) -> bool:
+        """Rede (None), 408, 429 e 5xx transitórios"""
+        return status_code is None or status_code in (408, 429) or 500 <= status_code < 600
+
+    def on_request(self) -> None:
+        """Registra uma requisição original (alimenta o orçamento)"""
+        with self._lock:
+            self._requests += 1
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def allow_retry(self) -> bool:
+        """Consome o orçamento para um retry; False quando esgotado"""
+        allowed = self.budget.withdraw() if self.budget is not None else True
+        with self._lock:
+            if allowed:
+                self._retries += 1
+            else:
+                self._denied += 1
+        return allowed
+
+    def backoff(self, previous: float = 0.0, retry_after: Optional[float] = None) -> float:
+        """
+        Próximo intervalo de espera (jitter decorrelacionado)
+
+        Args:
+            previous: Espera usada na tentativa anterior (0 na primeira)
+            retry_after: Segundos pedidos pelo servidor (Retry-After), se houver
+        """
+        upper = max(self.base_delay, previous * 3)
+        delay = min(self.max_delay, random.uniform(self.base_delay, upper))
+        if retry_after is not None:
+            if self.max_retry_after is not None:
+                retry_after = min(retry_after, self.max_retry_after)
+            delay = max(delay, retry_after)
+        return delay
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests_made, retries, denied = self._requests, self._retries, self._denied
+        return {
+            "requests": requests_made,
+            "retries": retries,
+            "denied": denied,
+            "amplification": ((requests_made + retries) / requests_made) if requests_made else 1.0,
+            "budget_tokens": self.budget.tokens if self.budget is not None else None,
+        }
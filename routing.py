@@ -0,0 +1,113 @@
+"""
+Roteamento Multi-provedor do Lote
+Distribui prompts entre Veta, Gemini e WAN por peso e saúde observada
+(taxa de erro e latência), com failover automático para os provedores saudáveis
+"""
+
+import random
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Iterable, List
+
+
+class ProviderRouter:
+    """Escolhe o provedor de cada prompt (peso x saúde) e registra os resultados"""
+
+    def __init__(self, weights: Dict[str, float],
+                 error_rate_threshold: float = 0.5,
+                 max_latency: Optional[float] = None,
+                 window_size: int = 10,
+                 min_calls: int = 3):
+        self.weights = {name: max(0.0, float(w)) for name, w in weights.items()}
+        self.error_rate_threshold = error_rate_threshold
+        self.max_latency = max_latency
+        self.window_size = max(1, int(window_size))
+        self.min_calls = max(1, int(min_calls))
+        self._outcomes: Dict[str, deque] = {}
+        self._routed: Dict[str, int] = {}
+        self._failovers = 0
+        self._lock = threading.Lock()
+
+    def _window(self, provider: str) -> deque:
+        window = self._outcomes.get(provider)
+        if window is None:
+            window = self._outcomes[provider] = deque(maxlen=self.window_size)
+        return window
+
+    def record(self, provider: Optional[str], success: bool, latency: Optional[float] = None) -> None:
+        """Registra o resultado de uma geração do provedor"""
+        if not provider:
+            return
+        with self._lock:
+            self._window(provider).append((bool(success), latency))
+
+    def _health(self, provider: str) -> Dict[str, Any]:
+        outcomes = list(self._outcomes.get(provider, ()))
+        calls = len(outcomes)
+        failures = sum(1 for ok, _ in outcomes if not ok)
+        latencies = [lat for ok, lat in outcomes if ok and lat]
+        error_rate = failures / calls if calls else 0.0
+        avg_latency = sum(latencies) / len(latencies) if latencies else 0.0
+        healthy = True
+        if calls >= self.min_calls:
+            if error_rate >= self.error_rate_threshold:
+                healthy = False
+            if self.max_latency and latencies and avg_latency > self.max_latency:
+                healthy = False
+        return {"calls": calls, "error_rate": error_rate, "avg_latency": avg_latency, "healthy": healthy}
+
+    def is_healthy(self, provider: str) -> bool:
+        with self._lock:
+            return self._health(provider)["healthy"]
+
+    def choose(self, candidates: Iterable[str],
+               available: Optional[Callable[[str], bool]] = None,
+               current: Optional[str] = None, record: bool = True) -> Optional[str]:
+        """
+        Escolhe um provedor entre os candidatos
+
+        Args:
+            candidates: Provedores configurados para o lote
+            available: Filtro externo (ex.: circuito fechado, vagas de operações)
+            current: Provedor já usado pelo prompt; mantido enquanto saudável
+            record: False = só consulta; a escolha entra nas estatísticas via record_route quando o prompt é enviado
+
+        Returns:
+            Provedor escolhido ou None quando nenhum está disponível
+        """
+        candidates: List[str] = [c for c in candidates if self.weights.get(c, 0) > 0]
+        if available is not None:
+            candidates = [c for c in candidates if available(c)]
+        if not candidates:
+            return None
+        with self._lock:
+            health = {c: self._health(c) for c in candidates}
+            if current in health and health[current]["healthy"]:
+                choice = current
+            else:
+                healthy = [c for c in candidates if health[c]["healthy"]]
+                if healthy:
+                    choice = random.choices(healthy, weights=[self.weights[c] for c in healthy])[0]
+                else:
+                    # Todos degradados: o de menor taxa de erro segue atendendo
+                    choice = min(candidates, key=lambda c: health[c]["error_rate"])
+        if record:
+            self.record_route(choice, current)
+        return choice
+
+    def record_route(self, choice: str, current: Optional[str] = None) -> None:
+        """Conta o prompt roteado para `choice` (e o failover, quando sai de `current`)"""
+        with self._lock:
+            if current and choice != current:
+                self._failovers += 1
+            self._routed[choice] = self._routed.get(choice, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = {}
+            for name in self.weights:
+                health = self._health(name)
+                health["weight"] = self.weights[name]
+                health["routed"] = self._routed.get(name, 0)
+                providers[name] = health
+            return {"providers": providers, "failovers": self._failovers}
@@ -0,0 +1,68 @@
+"""
+Fixtures dos testes: aplicação do lote sem janela Tk e stand-ins HTTP locais
+"""
+
+import logging
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+class FakeRoot:
+    """Substitui a janela Tk: agendamentos de UI são descartados"""
+
+    def title(self, *args):
+        pass
+
+    def geometry(self, *args):
+        pass
+
+    def after(self, ms, func=None, *args):
+        return None
+
+
+@pytest.fixture
+def local_server():
+    """Sobe um ThreadingHTTPServer local com o handler informado; devolve a URL base"""
+    servers = []
+
+    def start(handler_class):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """VideoGeneratorApp real com estado só em memória, sem UI nem aquecimento de conexões"""
+    import gerador_video
+
+    monkeypatch.setattr(config, 'IDEMPOTENCY_STORE_FILE', None, raising=False)
+    monkeypatch.setattr(config, 'QUOTA_STATE_FILE', None, raising=False)
+    monkeypatch.setattr(config, 'RATE_LIMITS', {}, raising=False)
+    monkeypatch.setattr(config, 'ENDPOINT_POOLS', {}, raising=False)
+    monkeypatch.setattr(gerador_video.VideoGeneratorApp, 'setup_logging',
+                        lambda self: setattr(self, 'logger', logging.getLogger('tests')))
+    monkeypatch.setattr(gerador_video.VideoGeneratorApp, 'setup_ui', lambda self: None)
+    monkeypatch.setattr(gerador_video.VideoGeneratorApp, 'prewarm_connections', lambda self, *args, **kwargs: None)
+
+    def build(credentials=None):
+        app = gerador_video.VideoGeneratorApp(FakeRoot())
+        app.key_pool.load("Veta", credentials or [{"api_key": "chave-teste", "token": "token-teste"}])
+        return app
+
+    return build
@@ -0,0 +1,94 @@
+"""
+AsyncBatchEngine: fila grande sem threads paradas, E/S síncrona limitada pelos slots
+e aviso de slot livre entregue pela ponte da UI
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+from batch_processor import AsyncBatchEngine, PromptItem
+
+
+def make_prompts(count):
+    return [PromptItem(id=f"p{i}", prompt_text=f"cena {i}", language="pt") for i in range(count)]
+
+
+def test_queued_prompts_do_not_hold_threads_and_io_respects_slots():
+    engine = AsyncBatchEngine(max_threads=3)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+    done = queue.Queue()
+
+    def blocking_io(prompt):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return {'success': True, 'video_url': f"https://cdn.exemplo/{prompt.id}.mp4", 'processing_time': 0.02}
+
+    threads_before = threading.active_count()
+    for prompt in make_prompts(200):
+        engine.submit_prompt(prompt, blocking_io, lambda prompt_id, result: done.put(prompt_id))
+    # 200 prompts na fila: apenas o loop e as threads de E/S dos slots (+ callbacks) existem
+    assert threading.active_count() - threads_before <= 1 + 2 * 3
+    finished = {done.get(timeout=10) for _ in range(200)}
+    assert len(finished) == 200
+    assert running["peak"] <= 3
+    engine.stop_all_threads()
+
+
+def test_async_process_function_runs_on_the_loop():
+    engine = AsyncBatchEngine(max_threads=2)
+    done = queue.Queue()
+    loop_threads = set()
+
+    async def process(prompt):
+        loop_threads.add(threading.current_thread().name)
+        await asyncio.sleep(0.01)
+        return {'success': True, 'video_url': "u", 'processing_time': 0.01}
+
+    for prompt in make_prompts(10):
+        engine.submit_prompt(prompt, process, lambda prompt_id, result: done.put(result))
+    results = [done.get(timeout=5) for _ in range(10)]
+    assert all(r['success'] for r in results)
+    assert loop_threads == {"AsyncBatchLoop"}
+    engine.stop_all_threads()
+
+
+def test_slot_release_goes_through_ui_scheduler():
+    ui_calls = queue.Queue()
+    released = []
+    engine = AsyncBatchEngine(max_threads=1, on_slot_released=lambda: released.append(threading.current_thread().name),
+                              ui_scheduler=lambda func: ui_calls.put(func))
+    engine.submit_prompt(make_prompts(1)[0], lambda prompt: {'success': True, 'video_url': "u", 'processing_time': 0})
+    func = ui_calls.get(timeout=5)
+    # A "thread da UI" (aqui, a do teste) executa o aviso agendado
+    func()
+    assert released == [threading.current_thread().name]
+    engine.stop_all_threads()
+
+
+def test_raising_max_threads_wakes_waiting_prompts():
+    engine = AsyncBatchEngine(max_threads=1)
+    gate = threading.Event()
+    started = queue.Queue()
+
+    def process(prompt):
+        started.put(prompt.id)
+        gate.wait(5)
+        return {'success': True, 'video_url': "u", 'processing_time': 0}
+
+    for prompt in make_prompts(3):
+        engine.submit_prompt(prompt, process)
+    started.get(timeout=5)
+    time.sleep(0.1)
+    assert engine.get_active_count() == 1 and engine.get_waiting_count() == 2
+    engine.update_max_threads(3)
+    started.get(timeout=5)
+    started.get(timeout=5)
+    gate.set()
+    engine.stop_all_threads()
@@ -0,0 +1,101 @@
+"""
+Envelope do envio em bloco e leitura da resposta por item
+"""
+
+import json
+
+import pytest
+
+from bulk_submit import build_bulk_envelope, parse_bulk_response
+from json_stream import Base64File
+
+
+def attachment(data, name="ref.jpg"):
+    return {"name": name, "type": "image/jpeg", "data": data}
+
+
+def test_repeated_images_are_sent_once_and_referenced_by_index(tmp_path):
+    ref = tmp_path / "ref.jpg"
+    ref.write_bytes(b"\xff\xd8" + b"x" * 298)
+    other = tmp_path / "outra.jpg"
+    other.write_bytes(b"\xff\xd8" + b"y" * 98)
+    shared = Base64File(str(ref))
+    items = [
+        ("p1", {"prompt": "a", "languages": ["pt"], "images": [attachment(shared)]}),
+        ("p2", {"prompt": "b", "languages": ["en"], "images": [attachment(Base64File(str(ref)))]}),
+        ("p3", {"prompt": "c", "languages": ["pt"], "images": [attachment(Base64File(str(other)), "outra.jpg"),
+                                                               attachment(shared)]}),
+        ("p4", {"prompt": "d", "languages": ["pt"]}),
+    ]
+
+    envelope, saved = build_bulk_envelope(items, {"api_key": "k", "auth_token": "t"})
+
+    assert envelope["bulk"] is True
+    assert envelope["api_key"] == "k" and envelope["auth_token"] == "t"
+    assert [img["name"] for img in envelope["images"]] == ["ref.jpg", "outra.jpg"]
+    refs = {entry["id"]: entry.get("image_refs") for entry in envelope["items"]}
+    assert refs == {"p1": [0], "p2": [0], "p3": [1, 0], "p4": None}
+    assert all("images" not in entry for entry in envelope["items"])
+    assert saved == 2 * shared.encoded_length()
+
+
+def test_inline_base64_is_deduplicated_by_value():
+    items = [("p1", {"prompt": "a", "images": [attachment("QUJD")]}),
+             ("p2", {"prompt": "b", "images": [attachment("QUJD")]}),
+             ("p3", {"prompt": "c", "images": [attachment("REVG")]})]
+    envelope, saved = build_bulk_envelope(items, {})
+    assert len(envelope["images"]) == 2
+    assert [entry["image_refs"] for entry in envelope["items"]] == [[0], [0], [1]]
+    assert saved == 4
+
+
+def test_items_missing_from_response_are_retryable():
+    raw = json.dumps({"results": [{"id": "p1", "video_url": "https://cdn/p1.mp4"}]}).encode()
+    results = parse_bulk_response(raw, ["p1", "p2", "p3"])
+    assert results["p1"] == {"success": True, "video_url": "https://cdn/p1.mp4"}
+    for item_id in ("p2", "p3"):
+        assert results[item_id]["success"] is False
+        assert results[item_id]["retryable"] is True
+
+
+def test_per_item_failures_and_language_videos():
+    raw = json.dumps([
+        {"id": "ok", "videos": {"pt": "https://cdn/pt.mp4", "en": "https://cdn/en.mp4"}},
+        {"id": "falhou", "status": "failed"},
+        {"id": "erro", "error": "moderação", "retryable": False},
+        {"id": "transitorio", "error": "fila cheia", "retryable": True},
+        {"id": "url_com_erro", "video_url": "https://cdn/x.mp4", "status": "error"},
+        {"id": "sem_url"},
+        {"id": "estranho", "video_url": "https://cdn/nao-pedido.mp4"},
+    ]).encode()
+    ids = ["ok", "falhou", "erro", "transitorio", "url_com_erro", "sem_url"]
+    results = parse_bulk_response(raw, ids)
+
+    assert set(results) == set(ids)
+    assert results["ok"]["success"] is True
+    assert results["ok"]["language_videos"] == {"pt": "https://cdn/pt.mp4", "en": "https://cdn/en.mp4"}
+    assert results["ok"]["video_url"] == "https://cdn/pt.mp4"
+    for item_id in ("falhou", "erro", "url_com_erro"):
+        assert results[item_id] == {"success": False, "retryable": False, "error": results[item_id]["error"]}
+    assert "failed" in results["falhou"]["error"]
+    assert "moderação" in results["erro"]["error"]
+    assert results["transitorio"]["retryable"] is True
+    assert results["sem_url"]["success"] is False and results["sem_url"]["retryable"] is True
+
+
+@pytest.mark.parametrize("raw", [b"<html>erro</html>", b'{"status": "ok"}', b'"texto"'])
+def test_body_outside_contract_raises(raw):
+    with pytest.raises(ValueError):
+        parse_bulk_response(raw, ["p1"])
+
+
+@pytest.mark.parametrize("status", ["canceled", "cancelled"])
+def test_cancelled_status_fails_everywhere(status):
+    from providers import parse_wan_task
+    from results import parse_callback_result
+
+    item = parse_bulk_response(json.dumps({"results": [
+        {"id": "p1", "status": status, "video_url": "https://cdn/p1.mp4"}]}).encode(), ["p1"])["p1"]
+    assert item["success"] is False and status in item["error"]
+    assert parse_callback_result(json.dumps({"status": status}).encode())["success"] is False
+    assert parse_wan_task({"output": {"task_status": status.upper()}})["status"] == "failed"
@@ -0,0 +1,109 @@
+"""
+Modo callback: stand-in local do n8n que aceita a submissão e devolve o resultado
+no receptor, e validação do Content-Length dos callbacks
+"""
+
+import http.client
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from callback_receiver import CallbackReceiver
+
+
+class AcceptingWebhook(BaseHTTPRequestHandler):
+    """Stand-in do n8n: responde 202 na hora e faz POST do vídeo no callback_url depois"""
+    protocol_version = "HTTP/1.1"
+    submissions = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.submissions.append(body)
+        data = json.dumps({"status": "accepted"}).encode()
+        self.send_response(202)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+        def deliver():
+            time.sleep(0.1)
+            requests.post(body["callback_url"], timeout=5,
+                          json={"correlation_id": body["correlation_id"],
+                                "video_url": f"https://cdn.exemplo/{body['idempotency_key']}.mp4"})
+        threading.Thread(target=deliver, daemon=True).start()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def receiver():
+    receiver = CallbackReceiver(host="127.0.0.1", port=0, log=lambda message, level="INFO": None)
+    receiver.start()
+    yield receiver
+    receiver.stop()
+
+
+def test_default_host_is_loopback():
+    import config
+    assert config.CALLBACK_HOST == "127.0.0.1"
+    assert CallbackReceiver().host == "127.0.0.1"
+
+
+def test_submission_completes_through_callback(make_app, local_server):
+    AcceptingWebhook.submissions.clear()
+    url = local_server(AcceptingWebhook) + "/webhook/gerar"
+    app = make_app()
+    app.batch_config.callback_enabled = True
+    app.callback_receiver.port = 0
+    app.callback_receiver.start()
+    completed = queue.Queue()
+    app.on_prompt_completed = lambda prompt_id, result: completed.put((prompt_id, result))
+    try:
+        app.prompt_manager.add_prompts_from_text("um farol na tempestade")
+        prompt = app.prompt_manager.get_all_prompts()[0]
+        prompt.provider = "Veta"
+        prompt.endpoint = url
+
+        result = app.process_single_prompt_batch(prompt)
+        assert result['success'] and result['deferred'], result
+        # Slot liberado, chave segue com a geração até o callback
+        assert prompt.id in app.operation_leases
+
+        prompt_id, final = completed.get(timeout=5)
+        assert prompt_id == prompt.id
+        assert final['success']
+        assert final['video_url'] == f"https://cdn.exemplo/{prompt.idempotency_key}.mp4"
+        submission = AcceptingWebhook.submissions[0]
+        assert submission['correlation_id'] == prompt.idempotency_key
+        assert submission['callback_url'].startswith(app.callback_receiver.base_url)
+        assert app.callback_receiver.get_stats()['received'] == 1
+    finally:
+        app.callback_receiver.stop()
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1e3"])
+def test_invalid_content_length_is_rejected(receiver, length):
+    done = []
+    url = receiver.register("corr-1", "p1", lambda prompt_id, result: done.append(result), timeout=60)
+    receiver.arm("corr-1")
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=5)
+    conn.putrequest("POST", parsed.path)
+    conn.putheader("Content-Type", "application/json")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == 400
+    assert "Content-Length" in json.loads(response.read())["error"]
+    conn.close()
+    # O prompt segue aguardando um callback válido
+    assert receiver.pending_count() == 1
+    assert not done
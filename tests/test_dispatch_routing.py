@@ -0,0 +1,60 @@
+"""
+Despacho multi-provedor: o roteamento (provedor, failover, chave de idempotência e
+estatísticas do roteador) só vale para os prompts de fato enviados
+"""
+
+import config
+from routing import ProviderRouter
+
+
+def test_skipped_candidates_keep_their_routing(make_app, monkeypatch):
+    app = make_app()
+    full_endpoint = "http://127.0.0.1:9/webhook/cheio"
+    monkeypatch.setattr(config, 'ENDPOINT_POOLS', {full_endpoint: {"max_concurrent": 1, "min_interval": 0}})
+    app.batch_providers = ["Veta", "Gemini"]
+    app.provider_router = ProviderRouter(weights={"Veta": 1.0, "Gemini": 1.0})
+    app.prompt_manager.add_prompts_from_text("a\nb\nc\nd")
+    prompts = app.prompt_manager.get_all_prompts()
+    # Todos vinham do Gemini (sem chaves agora: failover para Veta); c e d usam um endpoint Veta com pool de 1
+    for index, prompt in enumerate(prompts):
+        prompt.provider = "Gemini"
+        prompt.idempotency_key = f"chave-{index}"
+        if index >= 2:
+            prompt.endpoint = full_endpoint
+
+    selected = app.select_dispatchable(prompts, capacity=1)
+    assert [(p.id, provider) for p, provider in selected] == [(prompts[0].id, "Veta")]
+    # Escolher não altera nenhum prompt nem conta roteamentos
+    assert all(p.provider == "Gemini" for p in prompts)
+    assert [p.idempotency_key for p in prompts] == ["chave-0", "chave-1", "chave-2", "chave-3"]
+    assert app.provider_router.get_stats()["failovers"] == 0
+
+    selected = app.select_dispatchable(prompts, capacity=4)
+    assert [p.id for p, _ in selected] == [prompts[0].id, prompts[1].id, prompts[2].id]
+    for prompt, provider in selected[:1]:
+        app.assign_provider(prompt, provider)
+    assert prompts[0].provider == "Veta" and prompts[0].idempotency_key is None
+    assert [p.provider for p in prompts[1:]] == ["Gemini"] * 3
+    assert [p.idempotency_key for p in prompts[1:]] == ["chave-1", "chave-2", "chave-3"]
+    assert app.provider_router.get_stats()["failovers"] == 1
+
+
+def test_dispatch_routes_only_claimed_prompts(make_app, monkeypatch):
+    app = make_app()
+    app.batch_providers = ["Veta", "Gemini"]
+    app.provider_router = ProviderRouter(weights={"Veta": 1.0, "Gemini": 1.0})
+    app.batch_processing = True
+    submitted = []
+    monkeypatch.setattr(app.thread_pool, 'submit_prompt',
+                        lambda prompt, process, callback=None: submitted.append((prompt.id, prompt.provider)))
+    monkeypatch.setattr(app.thread_pool, 'max_threads', 2)
+    app.prompt_manager.add_prompts_from_text("a\nb\nc\nd\ne")
+    prompts = app.prompt_manager.get_all_prompts()
+    for prompt in prompts:
+        prompt.provider = "Gemini"
+        prompt.idempotency_key = f"chave-{prompt.id}"
+
+    app.dispatch_pending_prompts()
+    assert submitted == [(prompts[0].id, "Veta"), (prompts[1].id, "Veta")]
+    for prompt in prompts[2:]:
+        assert prompt.provider == "Gemini" and prompt.idempotency_key == f"chave-{prompt.id}"
@@ -0,0 +1,88 @@
+"""
+Hedge das submissões do lote: a cópia sai com outra chave emprestada (vaga e cota próprias)
+e não é disparada quando não há outra chave para usar
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import config
+
+CREDENTIALS = [{"api_key": "chave-a", "token": "token-a"}, {"api_key": "chave-b", "token": "token-b"}]
+
+
+class SlowKeyWebhook(BaseHTTPRequestHandler):
+    """Stand-in do n8n: a chave marcada como lenta demora; as demais respondem na hora"""
+    protocol_version = "HTTP/1.1"
+    slow_key = None
+    lock = threading.Lock()
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            self.requests.append((body["api_key"], body["auth_token"], self.headers.get("Idempotency-Key")))
+        if body["api_key"] == self.slow_key:
+            time.sleep(0.8)
+        data = json.dumps({"video_url": f"https://cdn.exemplo/{body['api_key']}.mp4"}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def submit(app, endpoint):
+    app.batch_config.hedge_enabled = True
+    app.hedge_policy.min_delay = 0.0
+    app.hedge_policy.min_samples = 3
+    for _ in range(3):
+        app.hedge_policy.record(endpoint, 0.05)
+    lease = app.lease_key("Veta")
+    SlowKeyWebhook.slow_key = lease.api_key
+    headers = dict(config.DEFAULT_HEADERS)
+    headers['Idempotency-Key'] = "chave-idem"
+    data = {"prompt": "um farol na tempestade", "api_key": lease.api_key, "token": lease.token,
+            "auth_token": lease.token, "idempotency_key": "chave-idem"}
+    try:
+        response = app.post_batch_submission(endpoint, headers, data, "p1", "teste", "Veta", lease)
+        body = json.loads(response.content)
+        response.close()
+    finally:
+        app.release_key(lease, 200, None, "teste")
+    return lease, body
+
+
+def test_hedge_uses_another_leased_key(make_app, local_server):
+    SlowKeyWebhook.requests.clear()
+    endpoint = local_server(SlowKeyWebhook) + "/webhook"
+    app = make_app(CREDENTIALS)
+    lease, body = submit(app, endpoint)
+
+    other = next(c for c in CREDENTIALS if c["api_key"] != lease.api_key)
+    assert body["video_url"].endswith(f"{other['api_key']}.mp4")
+    assert (other["api_key"], other["token"], "chave-idem-hedge") in SlowKeyWebhook.requests
+    assert app.hedge_policy.get_stats()["hedge_wins"] == 1
+    # Cada chave foi emprestada uma vez e a do hedge voltou ao pool
+    stats = app.key_pool.get_stats()
+    assert [s["requests"] for s in stats.values()] == [1, 1]
+    assert all(s["in_flight"] == 0 for s in stats.values())
+
+
+def test_no_hedge_without_another_key(make_app, local_server):
+    SlowKeyWebhook.requests.clear()
+    endpoint = local_server(SlowKeyWebhook) + "/webhook"
+    app = make_app(CREDENTIALS[:1])
+    lease, body = submit(app, endpoint)
+
+    assert body["video_url"].endswith(f"{lease.api_key}.mp4")
+    assert len(SlowKeyWebhook.requests) == 1
+    assert app.hedge_policy.get_stats()["hedges"] == 0
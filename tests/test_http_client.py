@@ -0,0 +1,38 @@
+"""
+Aquecimento do pool de conexões: HEAD só na raiz do host, nunca no caminho do webhook
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler
+
+from http_client import SessionPool
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    requests = []
+
+    def do_HEAD(self):
+        with self.lock:
+            self.requests.append((self.command, self.path))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_prewarm_heads_host_root_only(local_server):
+    RecordingHandler.requests.clear()
+    base = local_server(RecordingHandler)
+    pool = SessionPool(max_connections=4)
+    try:
+        result = pool.prewarm(base + "/webhook/gerar-video", connections=2)
+    finally:
+        pool.close()
+
+    assert result["error"] is None
+    assert result["opened"] == 2
+    assert RecordingHandler.requests == [("HEAD", "/"), ("HEAD", "/")]
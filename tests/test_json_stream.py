@@ -0,0 +1,125 @@
+"""
+Corpo em streaming das submissões: o que chega ao servidor é o mesmo JSON que
+json.dumps geraria com a imagem em base64 embutida, com Content-Length exato
+"""
+
+import base64
+import gzip
+import json
+import os
+import zlib
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from json_stream import Base64Data, Base64File, CompressedBody, CompressionStats, encode_body
+
+
+class RecordingServer(BaseHTTPRequestHandler):
+    """Guarda headers e corpo recebidos (Content-Length ou chunked)"""
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def _read_chunked(self):
+        body = b""
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if size == 0:
+                self.rfile.readline()
+                return body
+            body += self.rfile.read(size)
+            self.rfile.readline()
+
+    def do_POST(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = self._read_chunked()
+        else:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.received.append((dict(self.headers), body))
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url(local_server):
+    RecordingServer.received.clear()
+    return local_server(RecordingServer) + "/webhook/gerar"
+
+
+@pytest.fixture
+def image(tmp_path):
+    # Tamanho que não é múltiplo de 3 nem do bloco de leitura (padding no último bloco)
+    path = tmp_path / "ref.jpg"
+    path.write_bytes(b"\xff\xd8\xff" + os.urandom(200 * 1024 + 1))
+    return str(path)
+
+
+def payloads(image_path):
+    encoded = base64.b64encode(open(image_path, 'rb').read()).decode('ascii')
+    streamed = {"prompt": "pôr do sol em Óbidos", "languages": ["pt", "en"],
+                "images": [{"name": "ref.jpg", "type": "image/jpeg", "data": Base64File(image_path)},
+                           {"name": "mem.jpg", "type": "image/jpeg", "data": Base64Data(encoded.encode('ascii'))}],
+                "api_key": "k"}
+    expected = {"prompt": "pôr do sol em Óbidos", "languages": ["pt", "en"],
+                "images": [{"name": "ref.jpg", "type": "image/jpeg", "data": encoded},
+                           {"name": "mem.jpg", "type": "image/jpeg", "data": encoded}],
+                "api_key": "k"}
+    return streamed, expected
+
+
+def test_streamed_body_matches_json_dumps(server_url, image):
+    streamed, expected = payloads(image)
+    reference = json.dumps(expected, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    body = encode_body(streamed)
+    assert len(body) == len(reference)
+
+    response = requests.post(server_url, data=body, headers={"Content-Type": "application/json"}, timeout=10)
+    assert response.status_code == 204
+    headers, received = RecordingServer.received[0]
+    assert "Transfer-Encoding" not in headers
+    assert int(headers["Content-Length"]) == len(reference) == len(received)
+    assert received == reference
+    assert json.loads(received) == expected
+
+
+def test_streamed_body_can_be_sent_again(server_url, image):
+    streamed, expected = payloads(image)
+    body = encode_body(streamed)
+    for _ in range(2):
+        requests.post(server_url, data=body, timeout=10)
+    (_, first), (_, second) = RecordingServer.received
+    assert first == second
+    assert json.loads(first) == expected
+
+
+@pytest.mark.parametrize("encoding, decompress", [
+    ("gzip", gzip.decompress),
+    ("deflate", zlib.decompress),
+])
+def test_compressed_body_round_trip(server_url, image, encoding, decompress):
+    streamed, expected = payloads(image)
+    body = encode_body(streamed)
+    stats = CompressionStats()
+    requests.post(server_url, data=CompressedBody(body, encoding, stats=stats), timeout=10,
+                  headers={"Content-Type": "application/json", "Content-Encoding": encoding})
+    headers, received = RecordingServer.received[0]
+    assert headers["Content-Encoding"] == encoding
+    assert headers.get("Transfer-Encoding", "").lower() == "chunked"
+    raw = decompress(received)
+    assert raw == json.dumps(expected, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    st = stats.get_stats()
+    assert st["requests"] == 1
+    assert st["raw_bytes"] == len(raw)
+    assert st["compressed_bytes"] == len(received)
+
+
+def test_payload_without_images_is_plain_bytes():
+    payload = {"prompt": "sem imagem", "languages": ["pt"]}
+    body = encode_body(payload)
+    assert isinstance(body, bytes)
+    assert body == json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,64 @@
+"""
+Rastreador de operações Gemini/WAN: consultas vencidas rodam em paralelo, então
+um endpoint de polling lento não atrasa a detecção das demais operações
+"""
+
+import json
+import queue
+import time
+from http.server import BaseHTTPRequestHandler
+
+from http_client import SessionPool
+from providers import OperationTracker, PendingOperation, PollScheduler
+
+
+class TaskStatus(BaseHTTPRequestHandler):
+    """Stand-in do polling WAN: /lenta demora a responder, /rapida responde na hora; ambas concluídas"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/lenta"):
+            time.sleep(1.5)
+        data = json.dumps({"output": {"task_status": "SUCCEEDED",
+                                      "video_url": f"https://cdn.exemplo{self.path}.mp4"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_slow_poll_does_not_delay_other_operations(local_server):
+    base = local_server(TaskStatus)
+    tracker = OperationTracker(SessionPool(4), log=lambda message, level="INFO": None,
+                               scheduler=PollScheduler(stats_file=None))
+    done = queue.Queue()
+    now = time.time()
+    for name in ("lenta", "rapida"):
+        tracker.track(PendingOperation(prompt_id=name, provider="WAN", handle=f"task-{name}",
+                                       poll_url=f"{base}/{name}", headers={},
+                                       on_done=lambda prompt_id, result: done.put((prompt_id, result, time.time())),
+                                       submitted_at=now, next_poll_at=now))
+
+    prompt_id, result, finished_at = done.get(timeout=5)
+    assert prompt_id == "rapida"
+    assert result['success'] and result['video_url'].endswith("/rapida.mp4")
+    assert finished_at - now < 1.0
+    prompt_id, result, _ = done.get(timeout=5)
+    assert prompt_id == "lenta" and result['success']
+    assert tracker.pending_count() == 0
+
+
+def test_cancelled_operations_are_returned_by_prompt(local_server):
+    tracker = OperationTracker(SessionPool(1), log=lambda message, level="INFO": None,
+                               scheduler=PollScheduler(stats_file=None))
+    later = time.time() + 3600
+    for prompt_id in ("p1", "p2", "p3"):
+        tracker.track(PendingOperation(prompt_id=prompt_id, provider="Gemini", handle=f"op-{prompt_id}",
+                                       poll_url="http://127.0.0.1:1/", headers={}, on_done=lambda *a: None,
+                                       next_poll_at=later))
+    assert sorted(tracker.cancel_prompts(["p1", "p3", "p9"])) == ["p1", "p3"]
+    assert tracker.pending_count() == 1